@@ -3,14 +3,24 @@
 from typing import Dict, Any, Optional, List
 import os
 import logging
+import time
 from dataclasses import dataclass
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from prometheus_client import Histogram
 from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__)
 
+# LLM call latency, exported on the server's /api/metrics
+LLM_CALL_DURATION = Histogram(
+    "llm_call_duration_seconds",
+    "Duration of BaseAgent.execute calls",
+    ["agent", "model", "status"],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+
 
 @dataclass
 class AgentConfig:
@@ -102,6 +112,17 @@ class BaseAgent:
             self.mcp_tools = []
     
     async def execute(self, prompt: str, use_tools: bool = True) -> AgentResponse:
+        # Execute agent, recording call duration
+        start = time.perf_counter()
+        response = await self._execute(prompt, use_tools)
+        LLM_CALL_DURATION.labels(
+            agent=self.__class__.__name__,
+            model=self.config.model_name,
+            status="success" if response.success else "error"
+        ).observe(time.perf_counter() - start)
+        return response
+
+    async def _execute(self, prompt: str, use_tools: bool) -> AgentResponse:
         # Execute agent with LangGraph
         try:
             messages = [
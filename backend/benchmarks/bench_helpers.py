@@ -0,0 +1,117 @@
+"""Micro-benchmarks for hot helpers in server.py.
+
+Payloads mirror production documents, including profiles carrying a
+multi-megabyte base64 photo and uploaded documents. See pytest.ini in this
+directory for recording and comparing baselines.
+"""
+
+import base64
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from server import (
+    build_user_document,
+    calculate_days,
+    create_jwt_token,
+    decode_jwt_token,
+    leave_to_response,
+    profile_to_response,
+    user_to_response,
+)
+
+
+def _base64_blob(size_bytes: int) -> str:
+    return base64.b64encode(os.urandom(size_bytes)).decode("ascii")
+
+
+USER = build_user_document(
+    "priya.sharma", "priya.sharma@example.com", "$2b$12$" + "x" * 53, "employee",
+    department="Engineering", designation="Senior Engineer", site="bangalore",
+)
+
+PROFILE = {
+    **USER,
+    "phone": "+91 98765 43210",
+    "emergency_contact": "Arjun Sharma",
+    "emergency_phone": "+91 91234 56789",
+    "address": "42 MG Road, Bengaluru 560001",
+    "joining_date": "2021-04-12",
+    "date_of_birth": "1990-08-23",
+    "blood_group": "O+",
+    "skills": ["python", "fastapi", "mongodb", "react", "kubernetes"],
+}
+
+PROFILE_WITH_UPLOADS = {
+    **PROFILE,
+    "profile_photo": "data:image/jpeg;base64," + _base64_blob(1_500_000),  # ~2 MB once encoded
+    "documents": {
+        "id_proof": _base64_blob(400_000),
+        "address_proof": _base64_blob(400_000),
+        "offer_letter": _base64_blob(250_000),
+    },
+}
+
+LEAVE = {
+    "_id": "5f0c6f1e-8d1a-4f5e-9a57-0d7c9b1a2e3f",
+    "employee_id": USER["_id"],
+    "leave_type": "el",
+    "start_date": "2025-12-22",
+    "end_date": "2026-01-02",
+    "days_count": 12.0,
+    "reason": "Year-end family trip",
+    "status": "approved",
+    "applied_date": "2025-11-30T08:15:42.123456+00:00",
+    "reviewed_by": "b7e5d8c2-1f3a-4e6b-9c0d-2a4b6c8e0f1a",
+    "reviewed_date": "2025-12-01T10:02:11.654321+00:00",
+    "comments": "Approved",
+}
+
+# Parametrized by name so saved baselines record the id rather than megabytes of payload
+PROFILES = {"text_only": PROFILE, "with_uploads": PROFILE_WITH_UPLOADS}
+
+TOKEN = create_jwt_token(USER["_id"], USER["username"], USER["role"])
+
+
+def test_create_jwt_token(benchmark):
+    token = benchmark(create_jwt_token, USER["_id"], USER["username"], USER["role"])
+    assert decode_jwt_token(token)["user_id"] == USER["_id"]
+
+
+def test_decode_jwt_token(benchmark):
+    payload = benchmark(decode_jwt_token, TOKEN)
+    assert payload["username"] == USER["username"]
+
+
+def test_user_to_response(benchmark):
+    response = benchmark(user_to_response, USER)
+    assert response.leave_balances["el"] == 15.0
+
+
+def test_leave_to_response(benchmark):
+    response = benchmark(leave_to_response, LEAVE, USER["username"])
+    assert response.days_count == 12.0
+
+
+def test_calculate_days(benchmark):
+    assert benchmark(calculate_days, LEAVE["start_date"], LEAVE["end_date"]) == 12
+
+
+@pytest.mark.parametrize("profile", list(PROFILES))
+def test_profile_to_response(benchmark, profile):
+    document = PROFILES[profile]
+    response = benchmark(profile_to_response, document)
+    assert response.profile_photo == document.get("profile_photo")
+
+
+@pytest.mark.parametrize("profile", list(PROFILES))
+def test_profile_response_serialization(benchmark, profile):
+    response = profile_to_response(PROFILES[profile])
+    body = benchmark(response.model_dump_json)
+    assert body.startswith("{")
@@ -0,0 +1,19 @@
+from pathlib import Path
+
+import pytest
+from pytest_benchmark.utils import parse_compare_fail
+
+# Committed baselines live next to this file, whatever directory pytest is run from
+BASELINE_STORAGE = f"file://{Path(__file__).resolve().parent / 'baselines'}"
+
+# Slowdown of the fastest round, relative to the compared baseline, that fails the run
+DEFAULT_COMPARE_FAIL = "min:25%"
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    if config.getoption("benchmark_storage") == "file://./.benchmarks":
+        config.option.benchmark_storage = BASELINE_STORAGE
+    # Only meaningful alongside --benchmark-compare; pytest-benchmark rejects it otherwise
+    if config.getoption("benchmark_compare") and not config.getoption("benchmark_compare_fail"):
+        config.option.benchmark_compare_fail = [parse_compare_fail(DEFAULT_COMPARE_FAIL)]
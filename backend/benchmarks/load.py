@@ -0,0 +1,382 @@
+"""In-process load benchmarks for the HRIS API.
+
+Drives the FastAPI ``app`` through httpx's ASGI transport, so no server has
+to be running. Data lives in a throwaway database on a local mongod
+(``--mongo-url``) or, by default, in mongomock's in-memory stand-in. The
+stand-in is handy for comparing Python-side cost between commits, but its
+query timings say nothing about real MongoDB.
+
+    cd backend
+    python benchmarks/load.py --employees 300 --concurrency 50
+    python benchmarks/load.py --mongo-url mongodb://localhost:27017 --compare benchmarks/results/<file>.json
+
+Each run prints per-step throughput and p50/p95/p99 latency and saves them
+to ``benchmarks/results/<timestamp>-<commit>.json``.
+"""
+
+import asyncio
+import json
+import logging
+import subprocess
+import sys
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+import typer
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import server
+from server import app, build_user_document, create_jwt_token, ensure_indexes, hash_password
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+PASSWORD = "bench-password"
+
+cli = typer.Typer(help="In-process load benchmarks for the HRIS API")
+
+
+class LatencyRecorder:
+    """Collects per-step latencies and error counts for one scenario."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self._measured_only = set()  # Labels recorded directly rather than as requests
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> httpx.Response:
+        start = perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[label].append(perf_counter() - start)
+        if response.status_code >= 400:
+            self.errors[label] += 1
+        return response
+
+    def record(self, label: str, seconds: float):
+        self._measured_only.add(label)
+        self.samples[label].append(seconds)
+
+    def summary(self, wall_seconds: float) -> Dict:
+        steps = {}
+        for label, samples in self.samples.items():
+            values = np.array(samples) * 1000
+            steps[label] = {
+                "count": len(samples),
+                "errors": self.errors[label],
+                "mean_ms": round(float(values.mean()), 2),
+                "p50_ms": round(float(np.percentile(values, 50)), 2),
+                "p95_ms": round(float(np.percentile(values, 95)), 2),
+                "p99_ms": round(float(np.percentile(values, 99)), 2),
+            }
+        total = sum(len(samples) for label, samples in self.samples.items() if label not in self._measured_only)
+        return {
+            "wall_seconds": round(wall_seconds, 3),
+            "requests": total,
+            "throughput_rps": round(total / wall_seconds, 1) if wall_seconds else None,
+            "steps": steps,
+        }
+
+
+async def run_concurrently(items: List, concurrency: int, fn: Callable):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(item):
+        async with semaphore:
+            await fn(item)
+
+    await asyncio.gather(*[run_one(item) for item in items])
+
+
+class BenchEnvironment:
+    """A freshly seeded database wired into ``app`` plus an ASGI client."""
+
+    def __init__(self, mongo_url: Optional[str], employees: int, history_days: int):
+        self.mongo_url = mongo_url
+        self.employee_count = employees
+        self.history_days = history_days
+        self.users: Dict[str, List[Dict]] = {}
+
+    async def __aenter__(self):
+        if self.mongo_url:
+            from motor.motor_asyncio import AsyncIOMotorClient
+
+            self._mongo_client = AsyncIOMotorClient(self.mongo_url)
+            self._db_name = f"hris_bench_{uuid.uuid4().hex[:8]}"
+            self.db = self._mongo_client[self._db_name]
+        else:
+            from mongomock_motor import AsyncMongoMockClient
+
+            self._mongo_client = None
+            self.db = AsyncMongoMockClient()["hris_bench"]
+
+        # Start from clean app state; the getters recreate caches and boards lazily
+        for key in list(app.state._state):
+            delattr(app.state, key)
+        app.state.db = self.db
+        app.state.report_db = self.db
+
+        await ensure_indexes(self.db)
+        await self._seed()
+
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench/api", timeout=None)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+        if self._mongo_client is not None:
+            await self._mongo_client.drop_database(self._db_name)
+            self._mongo_client.close()
+
+    async def _seed(self):
+        # One real hash shared by every account keeps seeding fast while logins still pay for bcrypt
+        password_hash = hash_password(PASSWORD)
+
+        admin = build_user_document("bench_admin", "bench_admin@example.com", password_hash, "admin")
+        manager = build_user_document("bench_manager", "bench_manager@example.com", password_hash, "manager")
+        employees = [
+            build_user_document(
+                f"employee{i:05d}", f"employee{i:05d}@example.com", password_hash, "employee",
+                department=f"dept{i % 10}", manager_id=manager["_id"], manager_path=[manager["_id"]]
+            )
+            for i in range(self.employee_count)
+        ]
+        await self.db.users.insert_many([admin, manager] + employees)
+        self.users = {"admin": [admin], "manager": [manager], "employee": employees}
+
+        today = datetime.now(timezone.utc).date()
+        history = []
+        for offset in range(1, self.history_days + 1):
+            day = today - timedelta(days=offset)
+            if day.weekday() >= 5:
+                continue
+            for i, employee in enumerate(employees):
+                check_in = datetime(day.year, day.month, day.day, 9, i % 30, tzinfo=timezone.utc)
+                history.append({
+                    "_id": str(uuid.uuid4()),
+                    "employee_id": employee["_id"],
+                    "site": None,
+                    "date": day.isoformat(),
+                    "check_in": check_in.isoformat(),
+                    "check_out": (check_in + timedelta(hours=9)).isoformat(),
+                    "work_hours": 9.0,
+                    "status": "late" if i % 30 > 15 else "present",
+                    "notes": None,
+                })
+        if history:
+            await self.db.attendance.insert_many(history)
+
+    def headers(self, user: Dict) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {create_jwt_token(user['_id'], user['username'], user['role'])}"}
+
+
+# ============= SCENARIOS =============
+
+async def checkin_storm(env: BenchEnvironment, recorder: LatencyRecorder, concurrency: int):
+    """9 AM rush: every employee logs in and checks in at once."""
+
+    async def employee_morning(employee):
+        response = await recorder.call(
+            env.client, "POST /auth/login", "POST", "/auth/login",
+            json={"username": employee["username"], "password": PASSWORD}
+        )
+        token = response.json().get("token")
+        await recorder.call(
+            env.client, "POST /attendance/check-in", "POST", "/attendance/check-in",
+            json={}, headers={"Authorization": f"Bearer {token}"}
+        )
+
+    await run_concurrently(env.users["employee"], concurrency, employee_morning)
+
+
+async def approval_sweep(env: BenchEnvironment, recorder: LatencyRecorder, concurrency: int):
+    """A manager clears a pending leave request from every employee."""
+    start_date = (datetime.now(timezone.utc).date() + timedelta(days=14)).isoformat()
+    leaves = [
+        {
+            "_id": str(uuid.uuid4()),
+            "employee_id": employee["_id"],
+            "leave_type": "cl",
+            "start_date": start_date,
+            "end_date": start_date,
+            "days_count": 1.0,
+            "reason": "Benchmark",
+            "status": "pending",
+            "applied_date": datetime.now(timezone.utc).isoformat(),
+            "reviewed_by": None,
+            "reviewed_date": None,
+            "comments": None,
+        }
+        for employee in env.users["employee"]
+    ]
+    await env.db.leave_requests.insert_many(leaves)
+
+    headers = env.headers(env.users["manager"][0])
+    response = await recorder.call(env.client, "GET /leaves/pending", "GET", "/leaves/pending", headers=headers)
+
+    async def approve(leave):
+        await recorder.call(
+            env.client, "PUT /leaves/{id}/approve", "PUT", f"/leaves/{leave['id']}/approve",
+            json={"comments": "ok"}, headers=headers
+        )
+
+    await run_concurrently(response.json(), concurrency, approve)
+
+
+async def report_export(env: BenchEnvironment, recorder: LatencyRecorder, concurrency: int):
+    """Admins pull the heavy reports and exports over the seeded history."""
+    headers = env.headers(env.users["admin"][0])
+    end = datetime.now(timezone.utc).date()
+    start = (end - timedelta(days=env.history_days)).isoformat()
+    window = f"start_date={start}&end_date={end.isoformat()}"
+
+    requests = [
+        ("GET /attendance/report", f"/attendance/report?{window}"),
+        ("GET /leaves/report", "/leaves/report"),
+        ("GET /attendance/export csv", f"/attendance/export?{window}&format=csv"),
+        ("GET /attendance/export parquet", f"/attendance/export?{window}&format=parquet"),
+        ("GET /attendance/heatmap", f"/attendance/heatmap?{window}"),
+    ]
+
+    async def fetch(item):
+        label, url = item
+        await recorder.call(env.client, label, "GET", url, headers=headers)
+
+    # Several admins at once, each round covering every report
+    await run_concurrently(requests * max(1, concurrency // len(requests)), concurrency, fetch)
+
+
+async def announcement_fanout(env: BenchEnvironment, recorder: LatencyRecorder, concurrency: int):
+    """An admin posts announcements to every connected employee, who then read the feed.
+
+    Connected SSE clients are modelled by subscribing directly to the app's
+    broadcaster; delivery latency runs from the POST to each subscriber's
+    queue receiving the event.
+    """
+    broadcaster = app.state.announcement_broadcaster = server.AnnouncementBroadcaster()
+    queues = [broadcaster.subscribe("employee") for _ in env.users["employee"]]
+    posted_at: Dict[str, float] = {}
+
+    async def consume(queue):
+        while True:
+            message = await queue.get()
+            if message is None:
+                return
+            event, data, _ = message
+            if event == "announcement":
+                recorder.record("delivery to subscriber", perf_counter() - posted_at[data["title"]])
+
+    consumers = [asyncio.create_task(consume(queue)) for queue in queues]
+
+    admin_headers = env.headers(env.users["admin"][0])
+    for n in range(5):
+        title = f"Benchmark announcement {n}"
+        posted_at[title] = perf_counter()
+        await recorder.call(
+            env.client, "POST /announcements", "POST", "/announcements",
+            json={"title": title, "content": "Load test " * 50, "priority": "normal"}, headers=admin_headers
+        )
+
+    async def read_feed(employee):
+        headers = env.headers(employee)
+        await recorder.call(env.client, "GET /announcements", "GET", "/announcements?limit=20", headers=headers)
+        await recorder.call(env.client, "GET /announcements/unread-count", "GET", "/announcements/unread-count", headers=headers)
+
+    await run_concurrently(env.users["employee"], concurrency, read_feed)
+
+    for queue in queues:
+        broadcaster.unsubscribe(queue)
+        queue.put_nowait(None)
+    await asyncio.gather(*consumers)
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "checkin_storm": checkin_storm,
+    "approval_sweep": approval_sweep,
+    "report_export": report_export,
+    "announcement_fanout": announcement_fanout,
+}
+
+
+# ============= RUNNER =============
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run_scenarios(names: List[str], mongo_url: Optional[str], employees: int, history_days: int, concurrency: int) -> Dict:
+    results = {}
+    for name in names:
+        async with BenchEnvironment(mongo_url, employees, history_days) as env:
+            recorder = LatencyRecorder()
+            start = perf_counter()
+            await SCENARIOS[name](env, recorder, concurrency)
+            results[name] = recorder.summary(perf_counter() - start)
+    return results
+
+
+def print_results(results: Dict, baseline: Optional[Dict] = None):
+    for name, scenario in results.items():
+        typer.echo(f"\n{name}: {scenario['requests']} requests in {scenario['wall_seconds']}s "
+                   f"({scenario['throughput_rps']} req/s)")
+        typer.echo(f"  {'step':<34}{'count':>7}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        base_steps = (baseline or {}).get(name, {}).get("steps", {})
+        for label, step in scenario["steps"].items():
+            line = f"  {label:<34}{step['count']:>7}{step['errors']:>5}{step['p50_ms']:>10}{step['p95_ms']:>10}{step['p99_ms']:>10}"
+            if label in base_steps and base_steps[label]["p95_ms"]:
+                change = (step["p95_ms"] - base_steps[label]["p95_ms"]) / base_steps[label]["p95_ms"] * 100
+                line += f"  p95 {change:+.1f}%"
+            typer.echo(line)
+
+
+@cli.command()
+def main(
+    scenario: List[str] = typer.Option(list(SCENARIOS), "--scenario", "-s", help="Scenario(s) to run"),
+    employees: int = typer.Option(200, help="Employees to seed"),
+    history_days: int = typer.Option(30, help="Days of attendance history to seed"),
+    concurrency: int = typer.Option(50, help="Maximum requests in flight"),
+    mongo_url: Optional[str] = typer.Option(None, help="Local mongod to use instead of the in-memory stand-in"),
+    compare: Optional[Path] = typer.Option(None, exists=True, dir_okay=False, help="Earlier result file to diff against"),
+    save: bool = typer.Option(True, help="Save results under benchmarks/results"),
+):
+    unknown = [name for name in scenario if name not in SCENARIOS]
+    if unknown:
+        raise typer.BadParameter(f"Unknown scenario(s): {', '.join(unknown)}")
+
+    # Per-request logging would dominate the measurements
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    logging.getLogger("server").setLevel(logging.WARNING)
+
+    results = asyncio.run(run_scenarios(scenario, mongo_url, employees, history_days, concurrency))
+    baseline = json.loads(compare.read_text())["scenarios"] if compare else None
+    print_results(results, baseline)
+
+    if save:
+        commit = current_commit()
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"{timestamp}-{commit}.json"
+        path.write_text(json.dumps({
+            "timestamp": timestamp,
+            "commit": commit,
+            "database": "mongod" if mongo_url else "mongomock",
+            "params": {"employees": employees, "history_days": history_days, "concurrency": concurrency},
+            "scenarios": results,
+        }, indent=2))
+        typer.echo(f"\nSaved {path.relative_to(ROOT_DIR)}")
+
+
+if __name__ == "__main__":
+    cli()
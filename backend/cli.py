@@ -0,0 +1,121 @@
+"""Maintenance commands for the HRIS backend.
+
+Run from the backend directory, e.g. ``python cli.py import-users staff.csv``.
+Connection settings come from the same ``.env`` as the API server.
+"""
+
+import asyncio
+import json
+import os
+from pathlib import Path
+
+import typer
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from server import (
+    ROOT_DIR,
+    audit_indexes,
+    dedupe_attendance,
+    ensure_indexes,
+    import_users_from_csv,
+    rebuild_manager_paths,
+    shutdown_password_hash_pool,
+)
+
+
+app = typer.Typer(help="HRIS backend maintenance commands")
+
+
+def get_database():
+    load_dotenv(ROOT_DIR / ".env")
+
+    mongo_url = os.getenv("MONGO_URL")
+    db_name = os.getenv("DB_NAME")
+
+    if not mongo_url or not db_name:
+        missing = [name for name, value in {"MONGO_URL": mongo_url, "DB_NAME": db_name}.items() if not value]
+        raise typer.BadParameter(f"Missing required environment variables: {', '.join(missing)}")
+
+    client = AsyncIOMotorClient(mongo_url)
+    return client, client[db_name]
+
+
+@app.command("import-users")
+def import_users(csv_file: Path = typer.Argument(..., exists=True, dir_okay=False, readable=True)):
+    """Bulk-create users from a CSV file (same format as POST /api/users/import)."""
+
+    async def run():
+        client, db = get_database()
+        try:
+            return await import_users_from_csv(db, csv_file.read_text(encoding="utf-8-sig"))
+        finally:
+            shutdown_password_hash_pool()
+            client.close()
+
+    summary = asyncio.run(run())
+    typer.echo(json.dumps(summary, indent=2))
+    if summary["failed"]:
+        raise typer.Exit(code=1)
+
+
+@app.command("rebuild-org-paths")
+def rebuild_org_paths():
+    """Recompute every user's materialized manager path from manager_id."""
+
+    async def run():
+        client, db = get_database()
+        try:
+            return await rebuild_manager_paths(db)
+        finally:
+            client.close()
+
+    typer.echo(f"Updated manager paths for {asyncio.run(run())} users")
+
+
+@app.command("audit-indexes")
+def audit_indexes_command(
+    create_missing: bool = typer.Option(False, "--create-missing", help="Create any missing required indexes first")
+):
+    """List required indexes that are missing and indexes with no recorded use."""
+
+    async def run():
+        client, db = get_database()
+        try:
+            if create_missing:
+                await ensure_indexes(db)
+            return await audit_indexes(db)
+        finally:
+            client.close()
+
+    report = asyncio.run(run())
+    for index in report["missing"]:
+        typer.echo(f"MISSING  {index['collection']}.{index['name']}  {index['keys']}")
+    for index in report["unused"]:
+        typer.echo(f"UNUSED   {index['collection']}.{index['name']}  (no ops since {index['since']})")
+    if not report["missing"] and not report["unused"]:
+        typer.echo("All required indexes present and in use")
+    if report["missing"]:
+        raise typer.Exit(code=1)
+
+
+@app.command("dedupe-attendance")
+def dedupe_attendance_command():
+    """Remove duplicate attendance rows and switch to the unique (employee_id, date) index."""
+
+    async def run():
+        client, db = get_database()
+        try:
+            removed = await dedupe_attendance(db)
+            if "employee_date" in await db.attendance.index_information():
+                await db.attendance.drop_index("employee_date")
+            await ensure_indexes(db)
+            return removed
+        finally:
+            client.close()
+
+    typer.echo(f"Removed {asyncio.run(run())} duplicate attendance rows; employee_date_unique is in place")
+
+
+if __name__ == "__main__":
+    app()
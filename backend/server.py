@@ -1,21 +1,55 @@
 """FastAPI server exposing AI agent endpoints."""
 
+import asyncio
+import bisect
+import calendar
+import csv
+import gc
+import hmac
+import io
+import json
 import logging
+import multiprocessing
 import os
+import random
+import sys
+import threading
+import tracemalloc
+import traceback
 import uuid
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from datetime import datetime, timezone, timedelta
+from contextvars import ContextVar
+from datetime import datetime, time, timezone, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from dotenv import load_dotenv
-from fastapi import APIRouter, FastAPI, HTTPException, Request, Depends, Header
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Response, Depends, File, Header, UploadFile
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel, Field, EmailStr
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from pydantic import BaseModel, Field, EmailStr, ValidationError
+from pymongo import UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Match
 import bcrypt
 import jwt
+import numpy as np
+import orjson
+import pandas as pd
+
+try:
+    import brotli
+except ImportError:  # Optional: responses fall back to gzip
+    brotli = None
 
 from ai_agents.agents import AgentConfig, ChatAgent, SearchAgent
 
@@ -34,6 +68,91 @@ JWT_SECRET = os.getenv("JWT_SECRET", "hris-secret-key-change-in-production")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 JWT_EXPIRY_HOURS = int(os.getenv("JWT_EXPIRY_HOURS", "24"))
 
+# Metrics configuration
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # Scrapers send it as a bearer token; /api/metrics is off while unset
+SLOW_QUERY_THRESHOLD_MS = int(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "false").lower() == "true"
+SLOW_QUERY_MAX_SHAPES = int(os.getenv("SLOW_QUERY_MAX_SHAPES", "500"))
+
+# Event loop monitor configuration
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_MONITOR_INTERVAL_SECONDS = float(os.getenv("LOOP_MONITOR_INTERVAL_SECONDS", "0.25"))
+LOOP_BLOCKED_THRESHOLD_MS = int(os.getenv("LOOP_BLOCKED_THRESHOLD_MS", "200"))
+
+# Request profiling configuration
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile").lower().encode("latin-1")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # Fraction of all requests, 0 disables
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.001"))
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "20"))
+
+# Memory diagnostics configuration
+MEMORY_STATS_INTERVAL_SECONDS = int(os.getenv("MEMORY_STATS_INTERVAL_SECONDS", "15"))
+MEMORY_MAX_SNAPSHOTS = int(os.getenv("MEMORY_MAX_SNAPSHOTS", "5"))
+
+# Response compression configuration
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # Bytes; smaller bodies go out as-is
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "32"))
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "300"))  # Bounds staleness from other workers
+
+# MongoDB connection configuration
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+# Reports and analytics get their own pool, preferring secondaries
+MONGO_REPORT_MAX_POOL_SIZE = int(os.getenv("MONGO_REPORT_MAX_POOL_SIZE", "10"))
+MONGO_REPORT_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_REPORT_SOCKET_TIMEOUT_MS", "120000"))
+MONGO_REPORT_MAX_STALENESS_SECONDS = int(os.getenv("MONGO_REPORT_MAX_STALENESS_SECONDS", "120"))  # Server minimum is 90
+
+# User listing configuration
+USER_PAGE_MAX_LIMIT = int(os.getenv("USER_PAGE_MAX_LIMIT", "1000"))
+USER_STREAM_BATCH_SIZE = int(os.getenv("USER_STREAM_BATCH_SIZE", "1000"))
+
+# Bulk user import configuration
+USER_IMPORT_MAX_ROWS = int(os.getenv("USER_IMPORT_MAX_ROWS", "10000"))
+USER_IMPORT_HASH_WORKERS = int(os.getenv("USER_IMPORT_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+# Bulk leave balance configuration
+LEAVE_BALANCE_BULK_MAX_ROWS = int(os.getenv("LEAVE_BALANCE_BULK_MAX_ROWS", "50000"))
+
+# Attendance export configuration
+ATTENDANCE_EXPORT_MAX_DAYS = int(os.getenv("ATTENDANCE_EXPORT_MAX_DAYS", "366"))
+ATTENDANCE_EXPORT_BATCH_SIZE = int(os.getenv("ATTENDANCE_EXPORT_BATCH_SIZE", "2000"))
+ATTENDANCE_RECOMPUTE_MAX_DAYS = int(os.getenv("ATTENDANCE_RECOMPUTE_MAX_DAYS", "366"))
+
+# Presence board configuration
+PRESENCE_QUEUE_SIZE = int(os.getenv("PRESENCE_QUEUE_SIZE", "100"))
+
+# Server-Sent Events keepalive interval, shared by all streams
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+# Shift policies are cached per worker; other workers' edits are picked up on reload
+SHIFT_POLICY_CACHE_TTL_SECONDS = float(os.getenv("SHIFT_POLICY_CACHE_TTL_SECONDS", "30"))
+
+# End-of-day attendance close job (runs daily at HH:MM UTC and closes the previous two days)
+ATTENDANCE_CLOSE_ENABLED = os.getenv("ATTENDANCE_CLOSE_ENABLED", "true").lower() == "true"
+ATTENDANCE_CLOSE_TIME_UTC = os.getenv("ATTENDANCE_CLOSE_TIME_UTC", "00:30")
+
+# Attendance analytics cache configuration
+ATTENDANCE_CACHE_MAX_MONTHS = int(os.getenv("ATTENDANCE_CACHE_MAX_MONTHS", "24"))
+ATTENDANCE_CACHE_TTL_SECONDS = float(os.getenv("ATTENDANCE_CACHE_TTL_SECONDS", "60"))  # Bounds staleness from other workers
+ATTENDANCE_HEATMAP_MAX_DAYS = int(os.getenv("ATTENDANCE_HEATMAP_MAX_DAYS", "93"))
+ATTENDANCE_PAGE_MAX_LIMIT = int(os.getenv("ATTENDANCE_PAGE_MAX_LIMIT", "100"))
+
+# Announcement feed configuration
+ANNOUNCEMENT_PAGE_MAX_LIMIT = int(os.getenv("ANNOUNCEMENT_PAGE_MAX_LIMIT", "100"))
+ANNOUNCEMENT_FEED_CACHE_TTL = float(os.getenv("ANNOUNCEMENT_FEED_CACHE_TTL", "60"))
+ANNOUNCEMENT_STREAM_QUEUE_SIZE = int(os.getenv("ANNOUNCEMENT_STREAM_QUEUE_SIZE", "50"))
+ANNOUNCEMENT_REPLAY_LIMIT = int(os.getenv("ANNOUNCEMENT_REPLAY_LIMIT", "100"))
+ANNOUNCEMENT_READ_SET_MAX = int(os.getenv("ANNOUNCEMENT_READ_SET_MAX", "500"))
+ANNOUNCEMENT_SCHEDULER_INTERVAL_SECONDS = float(os.getenv("ANNOUNCEMENT_SCHEDULER_INTERVAL_SECONDS", "30"))
+ANNOUNCEMENT_ARCHIVE_BATCH_SIZE = int(os.getenv("ANNOUNCEMENT_ARCHIVE_BATCH_SIZE", "1000"))
+ANNOUNCEMENT_HISTORY_RETENTION_DAYS = int(os.getenv("ANNOUNCEMENT_HISTORY_RETENTION_DAYS", "730"))
+
 
 # ============= MODELS =============
 
@@ -70,6 +189,26 @@ class UpdateRoleRequest(BaseModel):
     role: str
 
 
+class UpdateSiteRequest(BaseModel):
+    site: Optional[str] = None  # None falls back to the default shift policy
+
+
+class LeaveBalanceAdjustment(BaseModel):
+    user_id: Optional[str] = None
+    username: Optional[str] = None
+    leave_type: str
+    balance: Optional[float] = None  # Absolute value to set
+    delta: Optional[float] = None  # Or an amount to add (negative to deduct)
+
+
+class BulkLeaveBalanceRequest(BaseModel):
+    adjustments: List[LeaveBalanceAdjustment]
+
+
+class UpdateManagerRequest(BaseModel):
+    manager_id: Optional[str] = None
+
+
 class UpdateLeaveBalanceRequest(BaseModel):
     leave_type: str
     balance: float
@@ -138,6 +277,7 @@ class EmployeeProfileResponse(BaseModel):
     address: Optional[str] = None
     department: Optional[str] = None
     designation: Optional[str] = None
+    site: Optional[str] = None
     joining_date: Optional[str] = None
     date_of_birth: Optional[str] = None
     blood_group: Optional[str] = None
@@ -155,12 +295,41 @@ class AttendanceCheckOut(BaseModel):
     notes: Optional[str] = None
 
 
+class ShiftPolicy(BaseModel):
+    site: str = "default"
+    timezone: str = "UTC"
+    shift_start: str = "09:00"  # HH:MM in the site's timezone
+    grace_minutes: int = 15
+    half_day_hours: float = 4.0
+    shift_hours: float = 9.0  # used for automatic check-out
+    work_days: List[int] = Field(default_factory=lambda: [0, 1, 2, 3, 4])  # Monday=0
+
+
+class ShiftPolicyUpdate(BaseModel):
+    timezone: str = "UTC"
+    shift_start: str = "09:00"
+    grace_minutes: int = 15
+    half_day_hours: float = 4.0
+    shift_hours: float = 9.0
+    work_days: List[int] = Field(default_factory=lambda: [0, 1, 2, 3, 4])
+
+
+class AttendanceCloseRequest(BaseModel):
+    date: str
+
+
+class AttendanceRecomputeRequest(BaseModel):
+    start_date: str
+    end_date: str
+    site: Optional[str] = None
+
+
 class AttendanceResponse(BaseModel):
     id: str
     employee_id: str
     employee_name: str
     date: str
-    check_in: str
+    check_in: Optional[str] = None
     check_out: Optional[str] = None
     work_hours: Optional[float] = None
     status: str  # present, late, absent, half_day
@@ -173,6 +342,8 @@ class AnnouncementCreate(BaseModel):
     content: str
     priority: str = "normal"  # low, normal, high, urgent
     target_roles: Optional[List[str]] = None  # None means all roles
+    publish_at: Optional[str] = None  # ISO datetime; None means now
+    expires_at: Optional[str] = None  # ISO datetime; None means never
 
 
 class AnnouncementResponse(BaseModel):
@@ -185,6 +356,8 @@ class AnnouncementResponse(BaseModel):
     created_by_name: str
     created_at: str
     is_active: bool
+    publish_at: Optional[str] = None
+    expires_at: Optional[str] = None
 
 
 # Original Models
@@ -234,16 +407,724 @@ def _ensure_db(request: Request):
         raise HTTPException(status_code=503, detail="Database not ready") from exc
 
 
+def _ensure_report_db(request: Request):
+    """Database handle for heavy read-only reports; reads may lag the primary slightly."""
+    report_db = getattr(request.app.state, "report_db", None)
+    return report_db if report_db is not None else _ensure_db(request)
+
+
+# ============= METRICS =============
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, until the response body completes",
+    ["method", "route"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served, including open streams",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency by collection and command",
+    ["collection", "command", "status"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+MONGO_SLOW_COMMANDS = Counter(
+    "mongodb_slow_commands_total",
+    "MongoDB commands over SLOW_QUERY_THRESHOLD_MS by originating route",
+    ["collection", "command", "route"],
+)
+WORKER_RSS_BYTES = Gauge(
+    "worker_memory_rss_bytes",
+    "Resident set size of this worker, sampled every MEMORY_STATS_INTERVAL_SECONDS",
+    multiprocess_mode="all",
+)
+GC_PENDING_OBJECTS = Gauge(
+    "python_gc_pending_objects",
+    "Allocations counted towards the next collection, per GC generation",
+    ["generation"],
+    multiprocess_mode="all",
+)
+TRACEMALLOC_TRACED_BYTES = Gauge(
+    "tracemalloc_traced_bytes",
+    "Memory traced by tracemalloc while it is running",
+    ["kind"],
+    multiprocess_mode="all",
+)
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when the loop monitor's timer was due and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+EVENT_LOOP_BLOCKED = Counter(
+    "event_loop_blocked_total",
+    "Times the event loop stayed blocked past LOOP_BLOCKED_THRESHOLD_MS",
+)
+BCRYPT_DURATION = Histogram(
+    "bcrypt_duration_seconds",
+    "Time spent hashing and verifying passwords",
+    ["operation"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2),
+)
+
+
+# Set per request by MetricsMiddleware; Motor copies context into its executor threads,
+# so command listeners can see which route issued a query
+request_route: ContextVar[str] = ContextVar("request_route", default="background")
+
+
+def _route_template(scope) -> str:
+    """Route path template for a request, keeping metric label cardinality bounded."""
+    for route in scope["app"].routes:
+        match, _ = route.matches(scope)
+        if match != Match.NONE:
+            return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware so streamed responses are timed to completion."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(scope)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        route_token = request_route.set(f"{method} {route}")
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_DURATION.labels(method, route).observe(perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            in_progress.dec()
+            request_route.reset(route_token)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records MongoDB command latencies; runs on the driver's threads."""
+
+    def __init__(self):
+        self._collections: Dict[Tuple, str] = {}
+
+    def started(self, event):
+        target = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+
+    def succeeded(self, event):
+        self._observe(event, "success")
+
+    def failed(self, event):
+        self._observe(event, "error")
+
+    def _observe(self, event, status: str):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMAND_DURATION.labels(collection, event.command_name, status).observe(event.duration_micros / 1_000_000)
+
+
+mongo_command_metrics = MongoCommandMetrics()
+
+
+# Commands whose shape can be replayed through explain
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+# Session and routing fields that must not be echoed into an explain
+EXPLAIN_STRIPPED_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "$clusterTime", "$db", "$readPreference"}
+
+
+def query_shape(value):
+    """Replace literal values with placeholders, keeping field names and operators."""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [query_shape(value[0])] if value and isinstance(value[0], (dict, list)) else "?"
+    return "?"
+
+
+def command_shape(command_name: str, command: Dict) -> str:
+    """Stable key for a command's shape: collection, filter/pipeline structure and sort."""
+    if command_name == "update":
+        predicate = [u.get("q") for u in command.get("updates", [])[:1]]
+    elif command_name == "delete":
+        predicate = [d.get("q") for d in command.get("deletes", [])[:1]]
+    elif command_name == "aggregate":
+        predicate = command.get("pipeline")
+    else:
+        predicate = command.get("filter", command.get("query"))
+
+    return json.dumps({
+        "command": command_name,
+        "collection": command.get(command_name),
+        "predicate": query_shape(predicate),
+        "sort": list((command.get("sort") or {}).keys()),
+    }, sort_keys=True, default=str)
+
+
+def summarize_explain(explain: Dict) -> Dict:
+    """Pull plan stages, indexes used and examination counts out of explain output."""
+    stages, indexes = [], []
+    stats: Dict = {}
+
+    def walk(node):
+        if isinstance(node, dict):
+            if "stage" in node and node["stage"] not in stages:
+                stages.append(node["stage"])
+            if "indexName" in node and node["indexName"] not in indexes:
+                indexes.append(node["indexName"])
+            if "executionStats" in node and not stats:
+                stats.update(node["executionStats"])
+            for key, child in node.items():
+                if key not in ["rejectedPlans", "allPlansExecution"]:
+                    walk(child)
+        elif isinstance(node, list):
+            for child in node:
+                walk(child)
+
+    walk(explain)
+    return {
+        "collscan": "COLLSCAN" in stages,
+        "stages": stages,
+        "indexes": indexes,
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+        "explain_ms": stats.get("executionTimeMillis"),
+    }
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """Logs commands over SLOW_QUERY_THRESHOLD_MS with the route that issued them.
+
+    With SLOW_QUERY_EXPLAIN on, the first slow occurrence of each query shape
+    is re-run through explain on a background thread and its plan summary
+    kept for /api/admin/slow-queries.
+    """
+
+    def __init__(self, threshold_ms: int = SLOW_QUERY_THRESHOLD_MS, explain: bool = SLOW_QUERY_EXPLAIN):
+        self.threshold_micros = threshold_ms * 1000
+        self.explain = explain
+        self._started: Dict[Tuple, Tuple] = {}
+        self.shapes: "OrderedDict[str, Dict]" = OrderedDict()
+        self._client = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def attach(self, client):
+        """Give the log a synchronous (pymongo) client to run explains with."""
+        self._client = client
+
+    def close(self):
+        self._client = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def started(self, event):
+        if event.command_name == "explain":
+            return
+        self._started[(event.connection_id, event.request_id)] = (event.command, request_route.get())
+
+    def succeeded(self, event):
+        self._check(event)
+
+    def failed(self, event):
+        self._check(event)
+
+    def _check(self, event):
+        started = self._started.pop((event.connection_id, event.request_id), None)
+        if started is None or event.duration_micros < self.threshold_micros:
+            return
+
+        command, route = started
+        target = command.get("collection" if event.command_name == "getMore" else event.command_name)
+        collection = target if isinstance(target, str) else ""
+        MONGO_SLOW_COMMANDS.labels(collection, event.command_name, route).inc()
+
+        shape = command_shape(event.command_name, command)
+        logger.warning(
+            "Slow MongoDB %s on %s.%s took %.1fms (route %s) shape=%s",
+            event.command_name, event.database_name, collection, event.duration_micros / 1000, route, shape
+        )
+
+        entry = self.shapes.get(shape)
+        if entry is not None:
+            entry["count"] += 1
+            entry["max_ms"] = max(entry["max_ms"], event.duration_micros / 1000)
+            entry["last_route"] = route
+            self.shapes.move_to_end(shape)
+            return
+
+        self.shapes[shape] = {
+            "shape": json.loads(shape),
+            "count": 1,
+            "max_ms": event.duration_micros / 1000,
+            "last_route": route,
+            "plan": None,
+        }
+        while len(self.shapes) > SLOW_QUERY_MAX_SHAPES:
+            self.shapes.popitem(last=False)
+
+        if self.explain and self._client is not None and event.command_name in EXPLAINABLE_COMMANDS:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+            self._executor.submit(self._explain, shape, event.database_name, command)
+
+    def _explain(self, shape: str, database_name: str, command: Dict):
+        try:
+            replay = {key: value for key, value in command.items() if key not in EXPLAIN_STRIPPED_FIELDS}
+            explain = self._client[database_name].command({"explain": replay, "verbosity": "executionStats"})
+            plan = summarize_explain(explain)
+        except Exception as exc:
+            logger.warning("Explain failed for slow query shape %s: %s", shape, exc)
+            return
+
+        if shape in self.shapes:
+            self.shapes[shape]["plan"] = plan
+        logger.warning(
+            "Slow query plan %s: %s, indexes=%s, docs examined=%s, keys examined=%s, returned=%s",
+            shape, "COLLSCAN" if plan["collscan"] else "/".join(plan["stages"]),
+            plan["indexes"], plan["docs_examined"], plan["keys_examined"], plan["returned"]
+        )
+
+
+slow_query_log = SlowQueryLog()
+
+
+def render_metrics() -> bytes:
+    """Prometheus text exposition, aggregated across workers in multiprocess mode."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
+
+
+# ============= EVENT LOOP MONITOR =============
+
+class EventLoopMonitor:
+    """Measures event loop lag and logs the stack of whatever is blocking it.
+
+    A heartbeat task on the loop records how late each timer fires. A
+    watchdog thread notices when heartbeats stop for longer than the
+    threshold and logs the loop thread's current stack, which is the
+    synchronous code holding the loop, once per blocking episode.
+    """
+
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL_SECONDS, threshold_ms: int = LOOP_BLOCKED_THRESHOLD_MS):
+        self.interval = interval
+        self.threshold = threshold_ms / 1000
+        self._last_beat = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = perf_counter()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="event-loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.observe(max(loop.time() - due, 0.0))
+            self._last_beat = perf_counter()
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stopped.wait(self.threshold / 2):
+            last_beat = self._last_beat
+            stalled = perf_counter() - last_beat - self.interval
+            if stalled < self.threshold or last_beat == reported_beat:
+                continue
+
+            reported_beat = last_beat
+            EVENT_LOOP_BLOCKED.inc()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>\n"
+            logger.warning("Event loop blocked for %.0fms so far; loop thread stack:\n%s", stalled * 1000, stack)
+
+
+# ============= REQUEST PROFILING =============
+
+class ProfileStore:
+    """Most recent request profiles for this worker, as pyinstrument sessions."""
+
+    def __init__(self, max_profiles: int = PROFILE_MAX_STORED):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def add(self, profile: Dict):
+        self._profiles[profile["id"]] = profile
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict]:
+        return [
+            {key: value for key, value in profile.items() if key != "session"}
+            for profile in reversed(self._profiles.values())
+        ]
+
+
+def _get_profile_store(app: FastAPI) -> ProfileStore:
+    if not hasattr(app.state, "profile_store"):
+        app.state.profile_store = ProfileStore()
+    return app.state.profile_store
+
+
+async def _profile_trigger(scope) -> Optional[str]:
+    """Why this request should be profiled, if at all.
+
+    The header only counts when it comes with a valid token for a user whose
+    stored role is admin; the token's own role claim may be out of date.
+    """
+    headers = dict(scope["headers"])
+    if PROFILE_HEADER in headers:
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        if authorization.startswith("Bearer "):
+            try:
+                payload = jwt.decode(authorization[7:], JWT_SECRET, algorithms=[JWT_ALGORITHM])
+            except jwt.InvalidTokenError:
+                payload = {}
+            db = getattr(scope["app"].state, "db", None)
+            if payload.get("user_id") and db is not None:
+                user = await db.users.find_one({"_id": payload["user_id"]}, {"role": 1})
+                if user and user.get("role") == "admin":
+                    return "header"
+
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+class ProfilerMiddleware:
+    """Runs pyinstrument around requests that ask for it or fall in the sample.
+
+    Profiled responses carry an ``X-Profile-Id`` header; the output is kept in
+    the worker's ProfileStore for /api/admin/profiles. Only one request is
+    profiled at a time. Event streams stay open indefinitely, so profiling
+    stops (and is discarded) as soon as one starts rather than holding the
+    profiler for the life of the connection.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._active = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._active:
+            await self.app(scope, receive, send)
+            return
+
+        trigger = await _profile_trigger(scope)
+        if trigger is None or self._active:
+            await self.app(scope, receive, send)
+            return
+
+        from pyinstrument import Profiler
+
+        profile_id = str(uuid.uuid4())
+        status_code = 500
+        session = None
+        streaming = False
+
+        def stop_profiler():
+            nonlocal session
+            if session is None:
+                session = profiler.stop()
+                self._active = False
+
+        async def send_with_profile_id(message):
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if Headers(raw=message.get("headers", [])).get("content-type", "").startswith("text/event-stream"):
+                    streaming = True
+                    stop_profiler()
+                else:
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler = Profiler(interval=PROFILE_INTERVAL_SECONDS, async_mode="enabled")
+        self._active = True
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            stop_profiler()
+            if not streaming:
+                _get_profile_store(scope["app"]).add({
+                    "id": profile_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": _route_template(scope),
+                    "status": status_code,
+                    "trigger": trigger,
+                    "duration_ms": round(session.duration * 1000, 2),
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "session": session,
+                })
+
+
+# ============= RESPONSE COMPRESSION =============
+
+# Streams that must reach the client unbuffered, and formats that are already compressed
+COMPRESSION_SKIP_TYPES = ("text/event-stream", "application/vnd.apache.parquet", "application/zip", "image/")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick ``br`` (when brotli is installed) or ``gzip`` from an Accept-Encoding header."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    for encoding in (["br"] if brotli is not None else []) + ["gzip"]:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class StreamCompressor:
+    """Incremental gzip or brotli encoder for one response body."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        """Compress a chunk; ``flush`` makes everything so far decodable by the client."""
+        if self.encoding == "br":
+            return self._compressor.process(data) + (self._compressor.flush() if flush else b"")
+        return self._compressor.compress(data) + (self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else b"")
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    compressor = StreamCompressor(encoding)
+    return compressor.compress(body) + compressor.finish()
+
+
+class CompressionMiddleware:
+    """Compresses responses with brotli or gzip when the client accepts it.
+
+    The body is buffered until it reaches ``COMPRESSION_MIN_SIZE``: smaller
+    responses go out untouched, larger ones are compressed whole, and
+    streaming responses are compressed chunk by chunk with a flush after each
+    so exports keep flowing. Responses that already set Content-Encoding
+    (such as cached reports) and ``COMPRESSION_SKIP_TYPES`` pass through.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", "")) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        buffered: List[bytes] = []
+        buffered_size = 0
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, buffered_size, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or content_type.startswith(COMPRESSION_SKIP_TYPES):
+                    passthrough = True
+                    await send(message)
+                    return
+                start_message = {**message, "headers": list(message.get("headers", []))}
+                MutableHeaders(raw=start_message["headers"]).add_vary_header("Accept-Encoding")
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                buffered.append(body)
+                buffered_size += len(body)
+                if buffered_size < self.minimum_size:
+                    if more_body:
+                        return
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": b"".join(buffered)})
+                    return
+
+                body = b"".join(buffered)
+                buffered.clear()
+                compressor = StreamCompressor(encoding)
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers["Content-Encoding"] = encoding
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = compressor.compress(body) + compressor.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start_message)
+
+            chunk = compressor.compress(body, flush=more_body)
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+class ReportCache:
+    """Encoded bytes of recently generated reports, per worker.
+
+    Keys include the version of every collection the report reads, captured
+    before querying, so a write that lands mid-build can never be hidden by
+    the entry it produces. Local writes bump versions; entries also expire
+    after ``REPORT_CACHE_TTL_SECONDS`` since other workers' writes are not seen.
+    """
+
+    def __init__(self, max_entries: int = REPORT_CACHE_MAX_ENTRIES, ttl_seconds: float = REPORT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._versions: Dict[str, int] = {}
+        self._entries: "OrderedDict[Tuple, Tuple[float, Optional[str], bytes]]" = OrderedDict()
+
+    def key(self, request: Request, encoding: Optional[str], collections: Tuple[str, ...]) -> Tuple:
+        return (
+            request.url.path,
+            tuple(sorted(request.query_params.multi_items())),
+            encoding,
+            tuple((name, self._versions.get(name, 0)) for name in collections),
+        )
+
+    def bump(self, collection: str):
+        self._versions[collection] = self._versions.get(collection, 0) + 1
+
+    def get(self, key: Tuple) -> Optional[Tuple[Optional[str], bytes]]:
+        """Return ``(content_encoding, body)`` for a live entry."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= perf_counter():
+            return None
+        self._entries.move_to_end(key)
+        return entry[1:]
+
+    def put(self, key: Tuple, content_encoding: Optional[str], body: bytes):
+        self._entries[key] = (perf_counter() + self.ttl_seconds, content_encoding, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def _get_report_cache(app: FastAPI) -> ReportCache:
+    if not hasattr(app.state, "report_cache"):
+        app.state.report_cache = ReportCache()
+    return app.state.report_cache
+
+
+def encoded_json_response(body: bytes, encoding: Optional[str]) -> Response:
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def cached_report_response(cache: ReportCache, key: Tuple, encoding: Optional[str], content: Dict) -> Response:
+    """Serialize and encode a freshly built report once and keep the bytes for repeat downloads."""
+    body = orjson.dumps(content)
+    if encoding and len(body) < COMPRESSION_MIN_SIZE:
+        encoding = None
+    if encoding:
+        body = compress_body(body, encoding)
+    cache.put(key, encoding, body)
+    return encoded_json_response(body, encoding)
+
+
 # ============= AUTH UTILITIES =============
 
+def _bcrypt_hash(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    with BCRYPT_DURATION.labels("hash").time():
+        return _bcrypt_hash(password)
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """Hash a batch of passwords; runs inside the import process pool.
+
+    Metrics recorded in a pool worker never reach /api/metrics, so the caller
+    times the batch instead.
+    """
+    return [_bcrypt_hash(password) for password in passwords]
 
 
 def verify_password(password: str, hashed: str) -> bool:
     """Verify a password against its hash."""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    with BCRYPT_DURATION.labels("verify").time():
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
 
 def create_jwt_token(user_id: str, username: str, role: str) -> str:
@@ -286,7 +1167,9 @@ async def get_current_user(request: Request, credentials: HTTPAuthorizationCrede
         "email": user["email"],
         "role": user["role"],
         "leave_balances": user.get("leave_balances", {}),
-        "manager_id": user.get("manager_id")
+        "manager_id": user.get("manager_id"),
+        "site": user.get("site"),
+        "department": user.get("department")
     }
 
 
@@ -300,9 +1183,45 @@ async def require_role(required_roles: List[str]):
     return role_checker
 
 
+def build_user_document(username: str, email: str, password_hash: str, role: str, **profile) -> Dict:
+    """Build a new user document with default leave balances."""
+    return {
+        "_id": str(uuid.uuid4()),
+        "username": username,
+        "email": email,
+        "password_hash": password_hash,
+        "role": role,
+        "leave_balances": {
+            "cl": 12.0,  # Default leave balances
+            "el": 15.0,
+            "sl": 10.0,
+            "wfh": 24.0,
+            "compensatory": 0.0
+        },
+        "manager_id": None,
+        "manager_path": [],  # Ancestor ids from the top of the org down to the direct manager
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        **profile
+    }
+
+
+def trusted_json_response(items: List[BaseModel], headers: Optional[Dict[str, str]] = None) -> ORJSONResponse:
+    """Serialize response models built from our own documents with orjson.
+
+    Returning a Response skips FastAPI's second validation pass through the
+    route's ``response_model``, which stays on the decorator for the schema.
+    Headers must be passed here; ones set on an injected ``Response`` are lost.
+    """
+    return ORJSONResponse([item.model_dump() for item in items], headers=headers)
+
+
 def user_to_response(user: Dict) -> UserResponse:
-    """Convert database user to UserResponse."""
-    return UserResponse(
+    """Convert database user to UserResponse.
+
+    Uses ``model_construct``: documents in ``users`` were validated on write,
+    so re-validating every row on the way out is wasted work.
+    """
+    return UserResponse.model_construct(
         id=user["_id"],
         username=user["username"],
         email=user["email"],
@@ -335,6 +1254,421 @@ async def _get_or_create_agent(request: Request, agent_type: str):
     return cache[agent_type]
 
 
+# ============= PRESENCE BOARD =============
+
+class PresenceBoard:
+    """In-memory set of employees currently checked in, grouped by team.
+
+    Updated by the check-in/check-out endpoints and rebuilt from today's
+    attendance at startup, so presence reads never touch Mongo. Subscribers
+    receive change events through bounded queues; a subscriber that falls
+    behind gets a single ``resync`` event instead of an unbounded backlog.
+    """
+
+    def __init__(self, queue_size: int = PRESENCE_QUEUE_SIZE):
+        self.date = datetime.now(timezone.utc).date().isoformat()
+        self.version = 0
+        self._present: Dict[str, Dict] = {}
+        self._subscribers: set = set()
+        self._queue_size = queue_size
+
+    def _roll_over(self):
+        today = datetime.now(timezone.utc).date().isoformat()
+        if today != self.date:
+            self.date = today
+            self._present.clear()
+            self._publish({"type": "reset", "date": today})
+
+    def load(self, date: str, entries: List[Dict]):
+        self.date = date
+        self._present = {entry["employee_id"]: entry for entry in entries}
+        self._publish({"type": "reset", "date": date})
+
+    def check_in(self, entry: Dict):
+        self._roll_over()
+        self._present[entry["employee_id"]] = entry
+        self._publish({"type": "check_in", "employee": entry})
+
+    def check_out(self, employee_id: str):
+        self._roll_over()
+        entry = self._present.pop(employee_id, None)
+        if entry:
+            self._publish({"type": "check_out", "employee": entry})
+
+    def snapshot(self, team: Optional[str] = None) -> Dict:
+        self._roll_over()
+        teams: Dict[str, Dict] = {}
+        for entry in self._present.values():
+            if team and entry["team"] != team:
+                continue
+            bucket = teams.setdefault(entry["team"], {"count": 0, "employees": []})
+            bucket["count"] += 1
+            bucket["employees"].append(entry)
+
+        return {
+            "date": self.date,
+            "version": self.version,
+            "count": sum(bucket["count"] for bucket in teams.values()),
+            "teams": teams,
+        }
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def _publish(self, event: Dict):
+        self.version += 1
+        event = {**event, "version": self.version}
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and ask it to reload a snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync", "version": self.version})
+
+
+def presence_entry(employee_id: str, employee_name: str, department: Optional[str], check_in_time: str) -> Dict:
+    return {
+        "employee_id": employee_id,
+        "employee_name": employee_name,
+        "team": department or "Unassigned",
+        "check_in": check_in_time,
+    }
+
+
+def _get_presence_board(request: Request) -> PresenceBoard:
+    if not hasattr(request.app.state, "presence_board"):
+        request.app.state.presence_board = PresenceBoard()
+    return request.app.state.presence_board
+
+
+async def rebuild_presence_board(db, board: PresenceBoard):
+    """Load everyone checked in today and not yet checked out into the board."""
+    today = datetime.now(timezone.utc).date().isoformat()
+    records = await db.attendance.find(
+        {"date": today, "check_in": {"$ne": None}, "check_out": None},
+        {"employee_id": 1, "check_in": 1}
+    ).to_list(None)
+
+    employee_ids = [record["employee_id"] for record in records]
+    users = await db.users.find({"_id": {"$in": employee_ids}}, {"username": 1, "department": 1}).to_list(None)
+    user_map = {u["_id"]: u for u in users}
+
+    board.load(today, [
+        presence_entry(
+            record["employee_id"],
+            user_map.get(record["employee_id"], {}).get("username", "Unknown"),
+            user_map.get(record["employee_id"], {}).get("department"),
+            record["check_in"],
+        )
+        for record in records
+    ])
+    logger.info("Presence board rebuilt with %s employees checked in", len(records))
+
+
+# ============= ATTENDANCE COLUMNAR CACHE =============
+
+ATTENDANCE_STATUS_CODES = {"present": 1, "late": 2, "half_day": 3, "absent": 4}
+
+
+class AttendanceColumnarCache:
+    """Attendance held as per-month (employee x day) NumPy arrays.
+
+    Months are loaded lazily from Mongo on first use and kept in LRU order;
+    rows come from a shared employee index so slices across months line up.
+    Status is stored as ``ATTENDANCE_STATUS_CODES`` (0 = no record) and
+    hours as float64 with NaN for missing values.
+
+    Writes handled by this worker are applied in place, but other workers'
+    writes are not seen, so a month is reloaded once it is older than
+    ``ttl_seconds``.
+    """
+
+    def __init__(self, max_months: int = ATTENDANCE_CACHE_MAX_MONTHS, ttl_seconds: float = ATTENDANCE_CACHE_TTL_SECONDS):
+        self._index: Dict[str, int] = {}
+        self._months: "OrderedDict[str, Dict[str, np.ndarray]]" = OrderedDict()
+        self._loaded_at: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._max_months = max_months
+        self._ttl_seconds = ttl_seconds
+
+    def _row(self, employee_id: str) -> int:
+        if employee_id not in self._index:
+            self._index[employee_id] = len(self._index)
+        return self._index[employee_id]
+
+    def _fit(self, block: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        # Grow row capacity geometrically when new employees join the index
+        rows = block["status"].shape[0]
+        if rows < len(self._index):
+            extra = max(len(self._index), rows * 2) - rows
+            block["status"] = np.pad(block["status"], ((0, extra), (0, 0)))
+            block["hours"] = np.pad(block["hours"], ((0, extra), (0, 0)), constant_values=np.nan)
+        return block
+
+    async def _load_month(self, db, month: str) -> Dict[str, np.ndarray]:
+        year, month_number = (int(part) for part in month.split("-"))
+        days = calendar.monthrange(year, month_number)[1]
+
+        records = await db.attendance.find(
+            {"date": {"$gte": f"{month}-01", "$lte": f"{month}-{days:02d}"}},
+            {"employee_id": 1, "date": 1, "status": 1, "work_hours": 1}
+        ).to_list(None)
+
+        rows = np.array([self._row(r["employee_id"]) for r in records], dtype=np.int64)
+        columns = np.array([int(r["date"][8:10]) - 1 for r in records], dtype=np.int64)
+        codes = np.array([ATTENDANCE_STATUS_CODES.get(r["status"], 0) for r in records], dtype=np.int8)
+        hours = np.array(
+            [np.nan if r.get("work_hours") is None else r["work_hours"] for r in records],
+            dtype=np.float64
+        )
+
+        block = {
+            "status": np.zeros((len(self._index), days), dtype=np.int8),
+            "hours": np.full((len(self._index), days), np.nan, dtype=np.float64),
+        }
+        block["status"][rows, columns] = codes
+        block["hours"][rows, columns] = hours
+        return block
+
+    def _fresh(self, month: str) -> bool:
+        return month in self._months and perf_counter() - self._loaded_at[month] < self._ttl_seconds
+
+    async def month(self, db, month: str) -> Dict[str, np.ndarray]:
+        if self._fresh(month):
+            self._months.move_to_end(month)
+            return self._fit(self._months[month])
+
+        async with self._locks.setdefault(month, asyncio.Lock()):
+            if not self._fresh(month):
+                self._months[month] = await self._load_month(db, month)
+                self._loaded_at[month] = perf_counter()
+                self._months.move_to_end(month)
+                while len(self._months) > self._max_months:
+                    self._loaded_at.pop(self._months.popitem(last=False)[0], None)
+
+        return self._fit(self._months[month])
+
+    def record(self, employee_id: str, day: str, status: str, work_hours: Optional[float]):
+        """Apply a single check-in/check-out to a loaded month; unloaded months load fresh later."""
+        block = self._months.get(day[:7])
+        if block is None:
+            return
+        row = self._row(employee_id)
+        self._fit(block)
+        block["status"][row, int(day[8:10]) - 1] = ATTENDANCE_STATUS_CODES.get(status, 0)
+        block["hours"][row, int(day[8:10]) - 1] = np.nan if work_hours is None else work_hours
+
+    def invalidate(self, start_date: str, end_date: str):
+        """Drop loaded months overlapping a date range after bulk rewrites."""
+        for month in [m for m in self._months if start_date[:7] <= m <= end_date[:7]]:
+            del self._months[month]
+            self._loaded_at.pop(month, None)
+
+    async def slice(self, db, employee_ids: List[str], start_date: str, end_date: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (status, hours) matrices of shape (len(employee_ids), days in range)."""
+        start = datetime.fromisoformat(start_date).date()
+        end = datetime.fromisoformat(end_date).date()
+
+        status_parts, hours_parts = [], []
+        cursor = start.replace(day=1)
+        while cursor <= end:
+            block = await self.month(db, cursor.strftime("%Y-%m"))
+            days = block["status"].shape[1]
+            first = start.day - 1 if cursor.year == start.year and cursor.month == start.month else 0
+            last = end.day if cursor.year == end.year and cursor.month == end.month else days
+
+            rows = np.array([self._index.get(e, -1) for e in employee_ids], dtype=np.int64)
+            known = rows >= 0
+            status = np.zeros((len(employee_ids), last - first), dtype=np.int8)
+            hours = np.full((len(employee_ids), last - first), np.nan, dtype=np.float64)
+            status[known] = block["status"][rows[known], first:last]
+            hours[known] = block["hours"][rows[known], first:last]
+            status_parts.append(status)
+            hours_parts.append(hours)
+
+            cursor = (cursor.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+        return np.concatenate(status_parts, axis=1), np.concatenate(hours_parts, axis=1)
+
+
+def _get_attendance_cache(request: Request) -> AttendanceColumnarCache:
+    if not hasattr(request.app.state, "attendance_cache"):
+        request.app.state.attendance_cache = AttendanceColumnarCache()
+    return request.app.state.attendance_cache
+
+
+def longest_streaks(mask: np.ndarray, recorded: np.ndarray) -> np.ndarray:
+    """Longest run of True per row, counting only days that have a record."""
+    streaks = np.zeros(mask.shape[0], dtype=np.int64)
+    for i in range(mask.shape[0]):
+        values = mask[i][recorded[i]]
+        if not values.any():
+            continue
+        # Run lengths from the positions where the boolean sequence changes
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], values.astype(np.int8), [0]))))
+        streaks[i] = (edges[1::2] - edges[::2]).max()
+    return streaks
+
+
+# collection -> [(keys, options)]; ensure_indexes creates these and audit_indexes reports against them
+REQUIRED_INDEXES: Dict[str, List[Tuple[List[Tuple[str, int]], Dict]]] = {
+    "users": [
+        # Login, registration and import duplicate checks
+        ([("username", 1)], {"name": "username_unique", "unique": True}),
+        ([("email", 1)], {"name": "email_unique", "unique": True}),
+        # Filtered /users pages: equality on role or department, keyset on username
+        ([("role", 1), ("username", 1)], {"name": "role_username"}),
+        ([("department", 1), ("username", 1)], {"name": "department_username"}),
+        # /team: direct reports by manager_id, full subtree via the multikey ancestor path
+        ([("manager_id", 1), ("username", 1)], {"name": "manager_username"}),
+        ([("manager_path", 1), ("username", 1)], {"name": "manager_path_username"}),
+    ],
+    "attendance": [
+        # One row per employee and day (check-in races, concurrent closes) plus check-in/out
+        # lookups and /attendance/my-records keyset pages. Deployments that still have the old
+        # non-unique employee_date index migrate with ``python cli.py dedupe-attendance``.
+        ([("employee_id", 1), ("date", -1)], {"name": "employee_date_unique", "unique": True}),
+        # Date-window scans: reports, export, heatmap and end-of-day close
+        ([("date", 1), ("employee_id", 1)], {"name": "date_employee"}),
+    ],
+    "leave_requests": [
+        # /leaves/my-requests, newest first
+        ([("employee_id", 1), ("applied_date", -1)], {"name": "employee_applied_date"}),
+        # Pending/approved queues and reports
+        ([("status", 1), ("applied_date", 1)], {"name": "status_applied_date"}),
+    ],
+    "announcements": [
+        # Unfiltered feed and scheduler sweeps
+        ([("is_active", 1), ("created_at", -1)], {"name": "active_created_at"}),
+        # Multikey on target_roles: each branch of the role $or in /announcements scans its own range,
+        # with the publish/expiry window checked from the index before fetching documents
+        (
+            [("is_active", 1), ("target_roles", 1), ("created_at", -1), ("publish_at", 1), ("expires_at", 1)],
+            {"name": "live_feed"}
+        ),
+        ([("expires_at", 1)], {"name": "expires_at"}),
+    ],
+    "announcements_history": [
+        (
+            [("archived_at", 1)],
+            {"name": "archived_at_ttl", "expireAfterSeconds": ANNOUNCEMENT_HISTORY_RETENTION_DAYS * 86400}
+        ),
+    ],
+}
+
+
+async def ensure_indexes(db):
+    """Create the indexes the query paths rely on (idempotent).
+
+    Each index is attempted on its own so one failure, e.g. a unique index
+    over existing duplicates, does not leave the rest uncreated.
+    """
+    for collection, indexes in REQUIRED_INDEXES.items():
+        for keys, options in indexes:
+            try:
+                await db[collection].create_index(keys, **options)
+            except Exception:
+                logger.exception("Failed to create index %s.%s", collection, options["name"])
+
+
+async def audit_indexes(db) -> Dict:
+    """Compare live indexes with REQUIRED_INDEXES and usage from $indexStats.
+
+    Usage counters reset when mongod restarts, so "unused" is relative to
+    the reported ``since`` timestamp.
+    """
+    missing, unused = [], []
+    collections = set(await db.list_collection_names())
+
+    for collection in sorted(set(REQUIRED_INDEXES) | collections):
+        existing = await db[collection].index_information() if collection in collections else {}
+        existing_keys = {
+            (tuple(tuple(k) for k in info["key"]), bool(info.get("unique"))) for info in existing.values()
+        }
+
+        for keys, options in REQUIRED_INDEXES.get(collection, []):
+            if (tuple(keys), options.get("unique", False)) not in existing_keys:
+                missing.append({"collection": collection, "name": options["name"], "keys": keys})
+
+        if not existing:
+            continue
+        async for stats in db[collection].aggregate([{"$indexStats": {}}]):
+            if stats["name"] != "_id_" and stats["accesses"]["ops"] == 0:
+                unused.append({
+                    "collection": collection,
+                    "name": stats["name"],
+                    "since": stats["accesses"]["since"].isoformat(),
+                })
+
+    return {"missing": missing, "unused": unused}
+
+
+async def dedupe_attendance(db) -> int:
+    """Delete duplicate (employee_id, date) attendance rows so the unique index can be built.
+
+    Keeps the most complete row of each group: a real check-in over an
+    auto-marked absence, then a closed record over an open one, then the
+    earliest check-in. Returns the number of rows deleted.
+    """
+    groups = await db.attendance.aggregate([
+        {"$group": {"_id": {"employee_id": "$employee_id", "date": "$date"}, "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ], allowDiskUse=True).to_list(None)
+    if not groups:
+        return 0
+
+    rows = await db.attendance.find(
+        {"_id": {"$in": [row_id for group in groups for row_id in group["ids"]]}},
+        {"check_in": 1, "check_out": 1}
+    ).to_list(None)
+    rows_by_id = {row["_id"]: row for row in rows}
+
+    remove = []
+    for group in groups:
+        ranked = sorted(
+            (rows_by_id[row_id] for row_id in group["ids"] if row_id in rows_by_id),
+            key=lambda r: (r.get("check_in") is None, r.get("check_out") is None, r.get("check_in") or "")
+        )
+        remove.extend(row["_id"] for row in ranked[1:])
+
+    await db.attendance.delete_many({"_id": {"$in": remove}})
+    return len(remove)
+
+
+def create_mongo_clients(mongo_url: str) -> Tuple[AsyncIOMotorClient, AsyncIOMotorClient]:
+    """Build the primary client and a separate secondaryPreferred client for reports.
+
+    On a standalone server or single-node replica set the report client
+    simply reads from the primary, using its own pool.
+    """
+    pool_options = {
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "event_listeners": [mongo_command_metrics, slow_query_log],
+    }
+
+    client = AsyncIOMotorClient(mongo_url, maxPoolSize=MONGO_MAX_POOL_SIZE, **pool_options)
+    report_client = AsyncIOMotorClient(
+        mongo_url,
+        maxPoolSize=MONGO_REPORT_MAX_POOL_SIZE,
+        socketTimeoutMS=MONGO_REPORT_SOCKET_TIMEOUT_MS,
+        readPreference="secondaryPreferred",
+        maxStalenessSeconds=MONGO_REPORT_MAX_STALENESS_SECONDS,
+        **pool_options
+    )
+    return client, report_client
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     load_dotenv(ROOT_DIR / ".env")
@@ -346,16 +1680,49 @@ async def lifespan(app: FastAPI):
         missing = [name for name, value in {"MONGO_URL": mongo_url, "DB_NAME": db_name}.items() if not value]
         raise RuntimeError(f"Missing required environment variables: {', '.join(missing)}")
 
-    client = AsyncIOMotorClient(mongo_url)
+    client, report_client = create_mongo_clients(mongo_url)
 
     try:
         app.state.mongo_client = client
         app.state.db = client[db_name]
+        app.state.report_db = report_client[db_name]
+        slow_query_log.attach(client.delegate)
         app.state.agent_config = AgentConfig()
         app.state.agent_cache = {}
+        app.state.presence_board = PresenceBoard()
+        app.state.attendance_cache = AttendanceColumnarCache()
+        app.state.announcement_broadcaster = AnnouncementBroadcaster()
+        app.state.announcement_feed_cache = {}
+        app.state.announcement_timeline = AnnouncementTimeline()
+        try:
+            await ensure_indexes(app.state.db)
+        except Exception:
+            logger.exception("Failed to ensure indexes")
+        try:
+            await rebuild_presence_board(app.state.db, app.state.presence_board)
+        except Exception:
+            logger.exception("Failed to rebuild presence board; starting empty")
+        if ATTENDANCE_CLOSE_ENABLED:
+            app.state.attendance_close_task = asyncio.create_task(run_attendance_close_scheduler(app))
+        app.state.announcement_scheduler_task = asyncio.create_task(run_announcement_scheduler(app))
+        app.state.memory_stats_task = asyncio.create_task(run_memory_stats_sampler())
+        if LOOP_MONITOR_ENABLED:
+            app.state.loop_monitor = EventLoopMonitor()
+            app.state.loop_monitor.start()
         logger.info("AI Agents API starting up")
         yield
     finally:
+        if hasattr(app.state, "attendance_close_task"):
+            app.state.attendance_close_task.cancel()
+        if hasattr(app.state, "announcement_scheduler_task"):
+            app.state.announcement_scheduler_task.cancel()
+        if hasattr(app.state, "memory_stats_task"):
+            app.state.memory_stats_task.cancel()
+        if hasattr(app.state, "loop_monitor"):
+            app.state.loop_monitor.stop()
+        shutdown_password_hash_pool()
+        slow_query_log.close()
+        report_client.close()
         client.close()
         logger.info("AI Agents API shutdown complete")
 
@@ -364,11 +1731,23 @@ app = FastAPI(
     title="AI Agents API",
     description="Minimal AI Agents API with LangGraph and MCP support",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 api_router = APIRouter(prefix="/api")
 
 
+@api_router.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus scrape endpoint; hidden unless METRICS_TOKEN is configured."""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest((authorization or "").encode(), f"Bearer {METRICS_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 @api_router.get("/")
 async def root():
     return {"message": "Hello World"}
@@ -391,25 +1770,9 @@ async def register_user(user_data: UserRegister, request: Request):
         raise HTTPException(status_code=400, detail="Invalid role")
 
     # Create user
-    user_id = str(uuid.uuid4())
     hashed_pwd = hash_password(user_data.password)
-
-    user = {
-        "_id": user_id,
-        "username": user_data.username,
-        "email": user_data.email,
-        "password_hash": hashed_pwd,
-        "role": user_data.role,
-        "leave_balances": {
-            "cl": 12.0,  # Default leave balances
-            "el": 15.0,
-            "sl": 10.0,
-            "wfh": 24.0,
-            "compensatory": 0.0
-        },
-        "manager_id": None,
-        "created_at": datetime.now(timezone.utc).isoformat()
-    }
+    user = build_user_document(user_data.username, user_data.email, hashed_pwd, user_data.role)
+    user_id = user["_id"]
 
     await db.users.insert_one(user)
 
@@ -455,15 +1818,66 @@ async def get_current_user_info(user: Dict = Depends(get_current_user)):
 
 # ============= USER MANAGEMENT ENDPOINTS (ADMIN) =============
 
+# Only the fields UserResponse needs; keeps password hashes and base64 photos out of list reads
+USER_LIST_PROJECTION = {
+    "username": 1,
+    "email": 1,
+    "role": 1,
+    "leave_balances": 1,
+    "manager_id": 1,
+}
+
+
+async def _stream_users_ndjson(db, query: Dict):
+    cursor = db.users.find(query, USER_LIST_PROJECTION).sort("username", 1).batch_size(USER_STREAM_BATCH_SIZE)
+    async for u in cursor:
+        yield user_to_response(u).model_dump_json().encode("utf-8") + b"\n"
+
+
 @api_router.get("/users", response_model=List[UserResponse])
-async def get_all_users(request: Request, user: Dict = Depends(get_current_user)):
-    """Get all users (Admin only)."""
+async def get_all_users(
+    request: Request,
+    user: Dict = Depends(get_current_user),
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    role: Optional[str] = None,
+    department: Optional[str] = None,
+    format: str = "json"
+):
+    """List users ordered by username (Admin only).
+
+    Pages are keyset-based: pass the ``X-Next-Cursor`` response header back
+    as ``cursor``. ``format=ndjson`` streams every matching user instead.
+    """
     if user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
 
+    if format not in ["json", "ndjson"]:
+        raise HTTPException(status_code=400, detail="Invalid format")
+
+    if not 1 <= limit <= USER_PAGE_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {USER_PAGE_MAX_LIMIT}")
+
+    query: Dict = {}
+    if role:
+        query["role"] = role
+    if department:
+        query["department"] = department
+    if cursor:
+        query["username"] = {"$gt": cursor}
+
     db = _ensure_db(request)
-    users = await db.users.find().to_list(1000)
-    return [user_to_response(u) for u in users]
+
+    if format == "ndjson":
+        return StreamingResponse(_stream_users_ndjson(db, query), media_type="application/x-ndjson")
+
+    users = await db.users.find(query, USER_LIST_PROJECTION).sort("username", 1).limit(limit + 1).to_list(limit + 1)
+    headers = {}
+    if len(users) > limit:
+        users = users[:limit]
+        headers["X-Next-Cursor"] = users[-1]["username"]
+
+    return trusted_json_response([user_to_response(u) for u in users], headers)
 
 
 @api_router.put("/users/{user_id}/role")
@@ -484,6 +1898,25 @@ async def update_user_role(user_id: str, role_data: UpdateRoleRequest, request:
     return {"success": True, "message": "Role updated successfully"}
 
 
+@api_router.put("/users/{user_id}/site")
+async def update_user_site(user_id: str, site_data: UpdateSiteRequest, request: Request, user: Dict = Depends(get_current_user)):
+    """Assign the site whose shift policy applies to a user (Admin only).
+
+    Not part of the self-service profile: the site decides late and half-day
+    classification, so employees must not be able to change their own.
+    """
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    db = _ensure_db(request)
+    result = await db.users.update_one({"_id": user_id}, {"$set": {"site": site_data.site}})
+
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return {"success": True, "message": "Site updated successfully"}
+
+
 @api_router.put("/users/{user_id}/leave-balance")
 async def update_user_leave_balance(
     user_id: str,
@@ -510,99 +1943,531 @@ async def update_user_leave_balance(
     return {"success": True, "message": "Leave balance updated successfully"}
 
 
-# ============= LEAVE MANAGEMENT ENDPOINTS =============
-
-def calculate_days(start_date: str, end_date: str) -> float:
-    """Calculate number of days between two dates."""
-    from datetime import datetime
-    start = datetime.fromisoformat(start_date)
-    end = datetime.fromisoformat(end_date)
-    return (end - start).days + 1
+# ============= BULK USER IMPORT =============
 
+USER_IMPORT_PROFILE_FIELDS = ["department", "designation", "site", "phone", "joining_date"]
 
-def leave_to_response(leave: Dict, employee_name: str = "") -> LeaveResponse:
-    """Convert database leave to LeaveResponse."""
-    return LeaveResponse(
-        id=leave["_id"],
-        employee_id=leave["employee_id"],
-        employee_name=employee_name,
-        leave_type=leave["leave_type"],
-        start_date=leave["start_date"],
-        end_date=leave["end_date"],
-        days_count=leave["days_count"],
-        reason=leave["reason"],
-        status=leave["status"],
-        applied_date=leave["applied_date"],
-        reviewed_by=leave.get("reviewed_by"),
-        reviewed_date=leave.get("reviewed_date"),
-        comments=leave.get("comments")
-    )
+_password_hash_pool: Optional[ProcessPoolExecutor] = None
 
 
-@api_router.post("/leaves/apply", response_model=LeaveResponse)
-async def apply_leave(leave_data: LeaveRequest, request: Request, user: Dict = Depends(get_current_user)):
-    """Apply for leave."""
-    db = _ensure_db(request)
+def _get_password_hash_pool() -> ProcessPoolExecutor:
+    global _password_hash_pool
+    if _password_hash_pool is None:
+        # Forking a process that runs the event loop and driver threads can copy held locks
+        _password_hash_pool = ProcessPoolExecutor(
+            max_workers=USER_IMPORT_HASH_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _password_hash_pool
+
+
+def shutdown_password_hash_pool():
+    global _password_hash_pool
+    if _password_hash_pool is not None:
+        _password_hash_pool.shutdown(cancel_futures=True)
+        _password_hash_pool = None
+
+
+async def hash_passwords_parallel(passwords: List[str]) -> List[str]:
+    """Spread bcrypt hashing across the process pool, one chunk per worker."""
+    if not passwords:
+        return []
+
+    loop = asyncio.get_running_loop()
+    pool = _get_password_hash_pool()
+    chunk_size = -(-len(passwords) // USER_IMPORT_HASH_WORKERS)
+    chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+
+    async def hash_chunk(chunk: List[str]) -> List[str]:
+        start = perf_counter()
+        hashed = await loop.run_in_executor(pool, hash_passwords, chunk)
+        per_password = (perf_counter() - start) / len(chunk)
+        for _ in chunk:
+            BCRYPT_DURATION.labels("hash").observe(per_password)
+        return hashed
+
+    results = await asyncio.gather(*[hash_chunk(chunk) for chunk in chunks])
+    return [hashed for chunk in results for hashed in chunk]
+
+
+def parse_user_import_csv(content: str) -> Tuple[List[Dict], List[Dict]]:
+    """Validate CSV rows in memory; returns (valid rows, per-row errors).
+
+    Row numbers count the header as row 1, matching what spreadsheets show.
+    """
+    reader = csv.DictReader(io.StringIO(content))
+    missing = {"username", "email", "password"} - set(reader.fieldnames or [])
+    if missing:
+        raise HTTPException(status_code=400, detail=f"CSV is missing columns: {', '.join(sorted(missing))}")
+
+    rows, errors = [], []
+    seen_usernames, seen_emails = set(), set()
+    for row_number, row in enumerate(reader, start=2):
+        if row_number - 1 > USER_IMPORT_MAX_ROWS:
+            raise HTTPException(status_code=400, detail=f"CSV cannot exceed {USER_IMPORT_MAX_ROWS} rows")
+
+        values = {key: (value or "").strip() for key, value in row.items() if key}
+        try:
+            user_data = UserRegister(
+                username=values["username"],
+                email=values["email"],
+                password=values["password"],
+                role=values.get("role") or "employee",
+            )
+        except ValidationError as exc:
+            errors.append({"row": row_number, "username": values.get("username"), "error": exc.errors()[0]["msg"]})
+            continue
+
+        error = None
+        if not user_data.username or not user_data.password:
+            error = "Username and password are required"
+        elif user_data.role not in ["employee", "manager", "admin"]:
+            error = "Invalid role"
+        elif user_data.username in seen_usernames or user_data.email in seen_emails:
+            error = "Duplicate username or email in file"
+
+        if error:
+            errors.append({"row": row_number, "username": user_data.username, "error": error})
+            continue
+
+        seen_usernames.add(user_data.username)
+        seen_emails.add(user_data.email)
+        rows.append({
+            "row": row_number,
+            "user": user_data,
+            "profile": {field: values[field] for field in USER_IMPORT_PROFILE_FIELDS if values.get(field)},
+        })
 
-    # Validate leave type
-    if leave_data.leave_type not in ["cl", "el", "sl", "wfh", "compensatory"]:
-        raise HTTPException(status_code=400, detail="Invalid leave type")
+    return rows, errors
+
+
+async def import_users_from_csv(db, content: str) -> Dict:
+    """Validate, de-duplicate, hash and insert users from CSV content."""
+    rows, errors = parse_user_import_csv(content)
+    total_rows = len(rows) + len(errors)
+
+    # One round trip to find rows that clash with existing users
+    existing = await db.users.find(
+        {"$or": [
+            {"username": {"$in": [r["user"].username for r in rows]}},
+            {"email": {"$in": [r["user"].email for r in rows]}},
+        ]},
+        {"username": 1, "email": 1}
+    ).to_list(None) if rows else []
+    taken_usernames = {u["username"] for u in existing}
+    taken_emails = {u["email"] for u in existing}
+
+    new_rows = []
+    for r in rows:
+        if r["user"].username in taken_usernames or r["user"].email in taken_emails:
+            errors.append({"row": r["row"], "username": r["user"].username, "error": "Username or email already exists"})
+        else:
+            new_rows.append(r)
+
+    hashes = await hash_passwords_parallel([r["user"].password for r in new_rows])
+    documents = [
+        build_user_document(r["user"].username, r["user"].email, password_hash, r["user"].role, **r["profile"])
+        for r, password_hash in zip(new_rows, hashes)
+    ]
 
-    # Calculate days
-    days = calculate_days(leave_data.start_date, leave_data.end_date)
+    imported = len(documents)
+    if documents:
+        try:
+            await db.users.insert_many(documents, ordered=False)
+        except BulkWriteError as exc:
+            write_errors = exc.details.get("writeErrors", [])
+            imported -= len(write_errors)
+            for write_error in write_errors:
+                r = new_rows[write_error["index"]]
+                message = "Username or email already exists" if write_error["code"] == 11000 else write_error["errmsg"]
+                errors.append({"row": r["row"], "username": r["user"].username, "error": message})
 
-    # Check leave balance
-    current_balance = user["leave_balances"].get(leave_data.leave_type, 0)
-    if current_balance < days:
-        raise HTTPException(status_code=400, detail=f"Insufficient {leave_data.leave_type.upper()} balance")
+    logger.info("User import: %s imported, %s failed", imported, len(errors))
 
-    # Create leave request
-    leave_id = str(uuid.uuid4())
-    leave = {
-        "_id": leave_id,
-        "employee_id": user["id"],
-        "leave_type": leave_data.leave_type,
-        "start_date": leave_data.start_date,
-        "end_date": leave_data.end_date,
-        "days_count": days,
-        "reason": leave_data.reason,
-        "status": "pending",
-        "applied_date": datetime.now(timezone.utc).isoformat(),
-        "reviewed_by": None,
-        "reviewed_date": None,
-        "comments": None
+    return {
+        "success": True,
+        "total_rows": total_rows,
+        "imported": imported,
+        "failed": len(errors),
+        "errors": sorted(errors, key=lambda e: e["row"]),
     }
 
-    await db.leave_requests.insert_one(leave)
 
-    return leave_to_response(leave, user["username"])
+@api_router.post("/users/import")
+async def import_users(request: Request, file: UploadFile = File(...), user: Dict = Depends(get_current_user)):
+    """Bulk-create users from a CSV upload (Admin only).
 
+    Columns: username, email, password, optional role (default employee)
+    and optional profile fields (department, designation, site, phone,
+    joining_date).
+    """
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    try:
+        content = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
 
-@api_router.get("/leaves/my-requests", response_model=List[LeaveResponse])
-async def get_my_leave_requests(request: Request, user: Dict = Depends(get_current_user)):
-    """Get employee's leave requests."""
     db = _ensure_db(request)
-    leaves = await db.leave_requests.find({"employee_id": user["id"]}).sort("applied_date", -1).to_list(1000)
-    return [leave_to_response(leave, user["username"]) for leave in leaves]
+    return await import_users_from_csv(db, content)
 
 
-@api_router.get("/leaves/pending", response_model=List[LeaveResponse])
-async def get_pending_leaves(request: Request, user: Dict = Depends(get_current_user)):
-    """Get pending leave requests (Manager/Admin)."""
-    if user["role"] not in ["manager", "admin"]:
-        raise HTTPException(status_code=403, detail="Manager or Admin access required")
+# ============= ORG HIERARCHY =============
 
-    db = _ensure_db(request)
+def compute_manager_paths(managers: Dict[str, Optional[str]]) -> Dict[str, List[str]]:
+    """Derive each user's ancestor path from a user_id -> manager_id map.
+
+    Dangling manager ids end the path; cycles are cut where they close.
+    """
+    paths: Dict[str, List[str]] = {}
+
+    for user_id in managers:
+        chain = []
+        current = user_id
+        while current not in paths:
+            chain.append(current)
+            manager_id = managers.get(current)
+            if manager_id is None or manager_id not in managers or manager_id in chain:
+                paths[current] = []
+                chain.pop()
+                break
+            current = manager_id
+        for member in reversed(chain):
+            manager_id = managers[member]
+            paths[member] = paths[manager_id] + [manager_id]
+
+    return paths
+
+
+async def rebuild_manager_paths(db) -> int:
+    """Recompute manager_path for every user from manager_id; returns users changed."""
+    users = await db.users.find({}, {"manager_id": 1, "manager_path": 1}).to_list(None)
+    paths = compute_manager_paths({u["_id"]: u.get("manager_id") for u in users})
+
+    operations = [
+        UpdateOne({"_id": u["_id"]}, {"$set": {"manager_path": paths[u["_id"]]}})
+        for u in users
+        if u.get("manager_path") != paths[u["_id"]]
+    ]
+    if operations:
+        await db.users.bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+@api_router.put("/users/{user_id}/manager")
+async def update_user_manager(
+    user_id: str,
+    manager_data: UpdateManagerRequest,
+    request: Request,
+    user: Dict = Depends(get_current_user)
+):
+    """Assign or clear a user's manager (Admin only).
+
+    Re-roots the user's whole subtree so ``manager_path`` stays consistent.
+    """
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    db = _ensure_db(request)
+    if not await db.users.find_one({"_id": user_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    new_path: List[str] = []
+    if manager_data.manager_id:
+        manager = await db.users.find_one({"_id": manager_data.manager_id}, {"manager_path": 1})
+        if not manager:
+            raise HTTPException(status_code=404, detail="Manager not found")
+        new_path = manager.get("manager_path", []) + [manager["_id"]]
+        if user_id in new_path:
+            raise HTTPException(status_code=400, detail="A user cannot report to themselves or their own reports")
+
+    await db.users.update_one(
+        {"_id": user_id},
+        {"$set": {"manager_id": manager_data.manager_id, "manager_path": new_path}}
+    )
+
+    # Everyone below keeps their path from this user down and swaps the prefix above it.
+    # The split point comes from each report's own path rather than the user's old depth,
+    # so re-sending the request after a partial failure repairs whatever was left stale.
+    reports = await db.users.find({"manager_path": user_id}, {"manager_path": 1}).to_list(None)
+    operations = []
+    for r in reports:
+        path = new_path + r["manager_path"][r["manager_path"].index(user_id):]
+        if path != r["manager_path"]:
+            operations.append(UpdateOne({"_id": r["_id"]}, {"$set": {"manager_path": path}}))
+    if operations:
+        await db.users.bulk_write(operations, ordered=False)
+
+    return {"success": True, "message": "Manager updated successfully", "reports_updated": len(operations)}
+
+
+@api_router.get("/team", response_model=List[UserResponse])
+async def get_team(
+    request: Request,
+    user: Dict = Depends(get_current_user),
+    manager_id: Optional[str] = None,
+    scope: str = "direct"
+):
+    """List a manager's reports (Manager/Admin).
+
+    ``scope=direct`` returns direct reports, ``scope=all`` the full subtree.
+    Defaults to the caller's own team; managers may also look at any
+    manager within their own subtree.
+    """
+    if user["role"] not in ["manager", "admin"]:
+        raise HTTPException(status_code=403, detail="Manager or admin access required")
+
+    if scope not in ["direct", "all"]:
+        raise HTTPException(status_code=400, detail="Invalid scope")
+
+    db = _ensure_db(request)
+    manager_id = manager_id or user["id"]
+
+    if manager_id != user["id"] and user["role"] != "admin":
+        in_subtree = await db.users.find_one({"_id": manager_id, "manager_path": user["id"]}, {"_id": 1})
+        if not in_subtree:
+            raise HTTPException(status_code=403, detail="Not authorized to view this team")
+
+    query = {"manager_id": manager_id} if scope == "direct" else {"manager_path": manager_id}
+    reports = await db.users.find(query, USER_LIST_PROJECTION).sort("username", 1).to_list(None)
+    return trusted_json_response([user_to_response(u) for u in reports])
+
+
+# ============= BULK LEAVE BALANCE ADJUSTMENTS =============
+
+def parse_leave_balance_csv(content: str) -> Tuple[List[Tuple[int, LeaveBalanceAdjustment]], List[Dict]]:
+    """Parse adjustment rows from CSV; returns (numbered adjustments, per-row errors)."""
+    reader = csv.DictReader(io.StringIO(content))
+    fields = set(reader.fieldnames or [])
+    if "leave_type" not in fields or not fields & {"user_id", "username"} or not fields & {"balance", "delta"}:
+        raise HTTPException(
+            status_code=400,
+            detail="CSV needs leave_type, user_id or username, and balance or delta columns"
+        )
+
+    adjustments, errors = [], []
+    for row_number, row in enumerate(reader, start=2):
+        if row_number - 1 > LEAVE_BALANCE_BULK_MAX_ROWS:
+            raise HTTPException(status_code=400, detail=f"CSV cannot exceed {LEAVE_BALANCE_BULK_MAX_ROWS} rows")
+
+        values = {key: value.strip() for key, value in row.items() if key and value and value.strip()}
+        try:
+            adjustments.append((row_number, LeaveBalanceAdjustment(**values)))
+        except ValidationError as exc:
+            errors.append({"row": row_number, "error": exc.errors()[0]["msg"]})
+
+    return adjustments, errors
+
+
+async def apply_leave_balance_adjustments(
+    db,
+    adjustments: List[Tuple[int, LeaveBalanceAdjustment]],
+    errors: Optional[List[Dict]] = None
+) -> Dict:
+    """Validate adjustments in memory and apply them with one unordered bulk_write."""
+    errors = list(errors or [])
+    total_rows = len(adjustments) + len(errors)
+
+    # Resolve every referenced user in one query
+    user_ids = {a.user_id for _, a in adjustments if a.user_id}
+    usernames = {a.username for _, a in adjustments if a.username and not a.user_id}
+    clauses = []
+    if user_ids:
+        clauses.append({"_id": {"$in": list(user_ids)}})
+    if usernames:
+        clauses.append({"username": {"$in": list(usernames)}})
+    users = await db.users.find({"$or": clauses}, {"username": 1, "leave_balances": 1}).to_list(None) if clauses else []
+    balances = {u["_id"]: u.get("leave_balances", {}) for u in users}
+    ids_by_username = {u["username"]: u["_id"] for u in users}
+
+    operations, operation_rows = [], []
+    seen = set()
+    for row_number, adjustment in adjustments:
+        target_id = adjustment.user_id if adjustment.user_id else ids_by_username.get(adjustment.username)
+
+        error = None
+        if not adjustment.user_id and not adjustment.username:
+            error = "user_id or username is required"
+        elif adjustment.leave_type not in ["cl", "el", "sl", "wfh", "compensatory"]:
+            error = "Invalid leave type"
+        elif (adjustment.balance is None) == (adjustment.delta is None):
+            error = "Provide exactly one of balance or delta"
+        elif target_id not in balances:
+            error = "User not found"
+        elif (target_id, adjustment.leave_type) in seen:
+            # Unordered writes give no ordering guarantee between rows for the same balance
+            error = "Duplicate entry for this user and leave type"
+        elif adjustment.balance is not None and adjustment.balance < 0:
+            error = "Balance cannot be negative"
+        elif adjustment.delta is not None and balances[target_id].get(adjustment.leave_type, 0) + adjustment.delta < 0:
+            error = "Adjustment would make the balance negative"
+
+        if error:
+            errors.append({"row": row_number, "error": error})
+            continue
+
+        seen.add((target_id, adjustment.leave_type))
+        field = f"leave_balances.{adjustment.leave_type}"
+        update = {"$set": {field: adjustment.balance}} if adjustment.balance is not None else {"$inc": {field: adjustment.delta}}
+        operations.append(UpdateOne({"_id": target_id}, update))
+        operation_rows.append(row_number)
+
+    updated = len(operations)
+    if operations:
+        try:
+            await db.users.bulk_write(operations, ordered=False)
+        except BulkWriteError as exc:
+            write_errors = exc.details.get("writeErrors", [])
+            updated -= len(write_errors)
+            for write_error in write_errors:
+                errors.append({"row": operation_rows[write_error["index"]], "error": write_error["errmsg"]})
+
+    logger.info("Bulk leave balance update: %s applied, %s failed", updated, len(errors))
+
+    return {
+        "success": True,
+        "total_rows": total_rows,
+        "updated": updated,
+        "failed": len(errors),
+        "errors": sorted(errors, key=lambda e: e["row"]),
+    }
+
+
+@api_router.post("/users/leave-balances")
+async def bulk_update_leave_balances(
+    bulk_data: BulkLeaveBalanceRequest,
+    request: Request,
+    user: Dict = Depends(get_current_user)
+):
+    """Set or adjust many leave balances at once (Admin only).
+
+    Each entry names a user by ``user_id`` or ``username`` and carries either
+    an absolute ``balance`` or a ``delta``. Errors report 1-based positions.
+    """
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    if len(bulk_data.adjustments) > LEAVE_BALANCE_BULK_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"Cannot exceed {LEAVE_BALANCE_BULK_MAX_ROWS} adjustments")
+
+    db = _ensure_db(request)
+    return await apply_leave_balance_adjustments(db, list(enumerate(bulk_data.adjustments, start=1)))
+
+
+@api_router.post("/users/leave-balances/import")
+async def import_leave_balances(request: Request, file: UploadFile = File(...), user: Dict = Depends(get_current_user)):
+    """Set or adjust leave balances from a CSV upload (Admin only).
+
+    Columns: user_id or username, leave_type, and balance or delta.
+    """
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    try:
+        content = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+
+    adjustments, errors = parse_leave_balance_csv(content)
+
+    db = _ensure_db(request)
+    return await apply_leave_balance_adjustments(db, adjustments, errors)
+
+
+# ============= LEAVE MANAGEMENT ENDPOINTS =============
+
+def calculate_days(start_date: str, end_date: str) -> float:
+    """Calculate number of days between two dates."""
+    from datetime import datetime
+    start = datetime.fromisoformat(start_date)
+    end = datetime.fromisoformat(end_date)
+    return (end - start).days + 1
+
+
+def leave_to_response(leave: Dict, employee_name: str = "") -> LeaveResponse:
+    """Convert database leave to LeaveResponse (trusted construction, see user_to_response)."""
+    return LeaveResponse.model_construct(
+        id=leave["_id"],
+        employee_id=leave["employee_id"],
+        employee_name=employee_name,
+        leave_type=leave["leave_type"],
+        start_date=leave["start_date"],
+        end_date=leave["end_date"],
+        days_count=leave["days_count"],
+        reason=leave["reason"],
+        status=leave["status"],
+        applied_date=leave["applied_date"],
+        reviewed_by=leave.get("reviewed_by"),
+        reviewed_date=leave.get("reviewed_date"),
+        comments=leave.get("comments")
+    )
+
+
+@api_router.post("/leaves/apply", response_model=LeaveResponse)
+async def apply_leave(leave_data: LeaveRequest, request: Request, user: Dict = Depends(get_current_user)):
+    """Apply for leave."""
+    db = _ensure_db(request)
+
+    # Validate leave type
+    if leave_data.leave_type not in ["cl", "el", "sl", "wfh", "compensatory"]:
+        raise HTTPException(status_code=400, detail="Invalid leave type")
+
+    # Calculate days
+    days = calculate_days(leave_data.start_date, leave_data.end_date)
+
+    # Check leave balance
+    current_balance = user["leave_balances"].get(leave_data.leave_type, 0)
+    if current_balance < days:
+        raise HTTPException(status_code=400, detail=f"Insufficient {leave_data.leave_type.upper()} balance")
+
+    # Create leave request
+    leave_id = str(uuid.uuid4())
+    leave = {
+        "_id": leave_id,
+        "employee_id": user["id"],
+        "leave_type": leave_data.leave_type,
+        "start_date": leave_data.start_date,
+        "end_date": leave_data.end_date,
+        "days_count": days,
+        "reason": leave_data.reason,
+        "status": "pending",
+        "applied_date": datetime.now(timezone.utc).isoformat(),
+        "reviewed_by": None,
+        "reviewed_date": None,
+        "comments": None
+    }
+
+    await db.leave_requests.insert_one(leave)
+    _get_report_cache(request.app).bump("leave_requests")
+
+    return leave_to_response(leave, user["username"])
+
+
+@api_router.get("/leaves/my-requests", response_model=List[LeaveResponse])
+async def get_my_leave_requests(request: Request, user: Dict = Depends(get_current_user)):
+    """Get employee's leave requests."""
+    db = _ensure_db(request)
+    leaves = await db.leave_requests.find({"employee_id": user["id"]}).sort("applied_date", -1).to_list(1000)
+    return trusted_json_response([leave_to_response(leave, user["username"]) for leave in leaves])
+
+
+@api_router.get("/leaves/pending", response_model=List[LeaveResponse])
+async def get_pending_leaves(request: Request, user: Dict = Depends(get_current_user)):
+    """Get pending leave requests (Manager/Admin)."""
+    if user["role"] not in ["manager", "admin"]:
+        raise HTTPException(status_code=403, detail="Manager or Admin access required")
+
+    db = _ensure_db(request)
     leaves = await db.leave_requests.find({"status": "pending"}).sort("applied_date", 1).to_list(1000)
 
-    # Get employee names
-    result = []
-    for leave in leaves:
-        employee = await db.users.find_one({"_id": leave["employee_id"]})
-        employee_name = employee["username"] if employee else "Unknown"
-        result.append(leave_to_response(leave, employee_name))
+    # Get employee names in one round trip
+    employee_ids = list({leave["employee_id"] for leave in leaves})
+    employees = await db.users.find({"_id": {"$in": employee_ids}}, {"username": 1}).to_list(len(employee_ids))
+    employee_names = {e["_id"]: e["username"] for e in employees}
 
-    return result
+    return trusted_json_response(
+        [leave_to_response(leave, employee_names.get(leave["employee_id"], "Unknown")) for leave in leaves]
+    )
 
 
 @api_router.put("/leaves/{leave_id}/approve")
@@ -637,6 +2502,7 @@ async def approve_leave(
             }
         }
     )
+    _get_report_cache(request.app).bump("leave_requests")
 
     # Deduct leave balance
     employee = await db.users.find_one({"_id": leave["employee_id"]})
@@ -683,6 +2549,7 @@ async def reject_leave(
             }
         }
     )
+    _get_report_cache(request.app).bump("leave_requests")
 
     return {"success": True, "message": "Leave rejected successfully"}
 
@@ -722,11 +2589,21 @@ async def get_leave_calendar(request: Request, user: Dict = Depends(get_current_
 
 @api_router.get("/leaves/report")
 async def get_leave_report(request: Request, user: Dict = Depends(get_current_user)):
-    """Export leave report (Admin only)."""
+    """Export leave report (Admin only).
+
+    Encoded responses are cached until the next leave request write.
+    """
     if user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
 
-    db = _ensure_db(request)
+    report_cache = _get_report_cache(request.app)
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    cache_key = report_cache.key(request, encoding, ("leave_requests",))
+    cached = report_cache.get(cache_key)
+    if cached is not None:
+        return encoded_json_response(cached[1], cached[0])
+
+    db = _ensure_report_db(request)
 
     # Get all leaves
     leaves = await db.leave_requests.find().sort("applied_date", -1).to_list(10000)
@@ -755,21 +2632,16 @@ async def get_leave_report(request: Request, user: Dict = Depends(get_current_us
             "comments": leave.get("comments", "N/A")
         })
 
-    return {"success": True, "report": report, "total_requests": len(report)}
+    return cached_report_response(
+        report_cache, cache_key, encoding, {"success": True, "report": report, "total_requests": len(report)}
+    )
 
 
 # ============= EMPLOYEE PROFILE ENDPOINTS =============
 
-@api_router.get("/profile", response_model=EmployeeProfileResponse)
-async def get_my_profile(request: Request, user: Dict = Depends(get_current_user)):
-    """Get current user's profile."""
-    db = _ensure_db(request)
-    user_data = await db.users.find_one({"_id": user["id"]})
-
-    if not user_data:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    return EmployeeProfileResponse(
+def profile_to_response(user_data: Dict) -> EmployeeProfileResponse:
+    """Convert database user to EmployeeProfileResponse (trusted construction, see user_to_response)."""
+    return EmployeeProfileResponse.model_construct(
         id=user_data["_id"],
         username=user_data["username"],
         email=user_data["email"],
@@ -780,6 +2652,7 @@ async def get_my_profile(request: Request, user: Dict = Depends(get_current_user
         address=user_data.get("address"),
         department=user_data.get("department"),
         designation=user_data.get("designation"),
+        site=user_data.get("site"),
         joining_date=user_data.get("joining_date"),
         date_of_birth=user_data.get("date_of_birth"),
         blood_group=user_data.get("blood_group"),
@@ -789,6 +2662,18 @@ async def get_my_profile(request: Request, user: Dict = Depends(get_current_user
     )
 
 
+@api_router.get("/profile", response_model=EmployeeProfileResponse)
+async def get_my_profile(request: Request, user: Dict = Depends(get_current_user)):
+    """Get current user's profile."""
+    db = _ensure_db(request)
+    user_data = await db.users.find_one({"_id": user["id"]})
+
+    if not user_data:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return profile_to_response(user_data)
+
+
 @api_router.put("/profile", response_model=EmployeeProfileResponse)
 async def update_my_profile(
     profile_data: EmployeeProfileUpdate,
@@ -813,24 +2698,7 @@ async def update_my_profile(
     # Fetch and return updated profile
     user_data = await db.users.find_one({"_id": user["id"]})
 
-    return EmployeeProfileResponse(
-        id=user_data["_id"],
-        username=user_data["username"],
-        email=user_data["email"],
-        role=user_data["role"],
-        phone=user_data.get("phone"),
-        emergency_contact=user_data.get("emergency_contact"),
-        emergency_phone=user_data.get("emergency_phone"),
-        address=user_data.get("address"),
-        department=user_data.get("department"),
-        designation=user_data.get("designation"),
-        joining_date=user_data.get("joining_date"),
-        date_of_birth=user_data.get("date_of_birth"),
-        blood_group=user_data.get("blood_group"),
-        skills=user_data.get("skills"),
-        documents=user_data.get("documents"),
-        profile_photo=user_data.get("profile_photo")
-    )
+    return profile_to_response(user_data)
 
 
 @api_router.get("/profile/{user_id}", response_model=EmployeeProfileResponse)
@@ -851,28 +2719,26 @@ async def get_user_profile(
     if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
 
-    return EmployeeProfileResponse(
-        id=user_data["_id"],
-        username=user_data["username"],
-        email=user_data["email"],
-        role=user_data["role"],
-        phone=user_data.get("phone"),
-        emergency_contact=user_data.get("emergency_contact"),
-        emergency_phone=user_data.get("emergency_phone"),
-        address=user_data.get("address"),
-        department=user_data.get("department"),
-        designation=user_data.get("designation"),
-        joining_date=user_data.get("joining_date"),
-        date_of_birth=user_data.get("date_of_birth"),
-        blood_group=user_data.get("blood_group"),
-        skills=user_data.get("skills"),
-        documents=user_data.get("documents"),
-        profile_photo=user_data.get("profile_photo")
-    )
+    return profile_to_response(user_data)
 
 
 # ============= ATTENDANCE ENDPOINTS =============
 
+def attendance_to_response(record: Dict, employee_name: str) -> AttendanceResponse:
+    """Convert database attendance record to AttendanceResponse (trusted construction, see user_to_response)."""
+    return AttendanceResponse.model_construct(
+        id=record["_id"],
+        employee_id=record["employee_id"],
+        employee_name=employee_name,
+        date=record["date"],
+        check_in=record["check_in"],
+        check_out=record.get("check_out"),
+        work_hours=record.get("work_hours"),
+        status=record["status"],
+        notes=record.get("notes")
+    )
+
+
 @api_router.post("/attendance/check-in", response_model=AttendanceResponse)
 async def check_in(
     check_in_data: AttendanceCheckIn,
@@ -895,15 +2761,15 @@ async def check_in(
 
     check_in_time = datetime.now(timezone.utc)
 
-    # Determine status based on time (assuming 9 AM is start time)
-    status = "present"
-    if check_in_time.hour > 9 or (check_in_time.hour == 9 and check_in_time.minute > 15):
-        status = "late"
+    # Determine status based on the site's shift policy
+    policy = await get_shift_policy(request, user.get("site"))
+    status = "late" if is_late_check_in(check_in_time, policy) else "present"
 
     attendance_id = str(uuid.uuid4())
     attendance = {
         "_id": attendance_id,
         "employee_id": user["id"],
+        "site": user.get("site"),
         "date": today,
         "check_in": check_in_time.isoformat(),
         "check_out": None,
@@ -912,19 +2778,18 @@ async def check_in(
         "notes": check_in_data.notes
     }
 
-    await db.attendance.insert_one(attendance)
-
-    return AttendanceResponse(
-        id=attendance_id,
-        employee_id=user["id"],
-        employee_name=user["username"],
-        date=today,
-        check_in=check_in_time.isoformat(),
-        check_out=None,
-        work_hours=None,
-        status=status,
-        notes=check_in_data.notes
+    try:
+        await db.attendance.insert_one(attendance)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent check-in or the end-of-day close
+        raise HTTPException(status_code=400, detail="Already checked in today")
+    _get_presence_board(request).check_in(
+        presence_entry(user["id"], user["username"], user.get("department"), check_in_time.isoformat())
     )
+    _get_attendance_cache(request).record(user["id"], today, status, None)
+    _get_report_cache(request.app).bump("attendance")
+
+    return attendance_to_response(attendance, user["username"])
 
 
 @api_router.post("/attendance/check-out", response_model=AttendanceResponse)
@@ -958,7 +2823,8 @@ async def check_out(
 
     # Update status based on work hours
     status = attendance["status"]
-    if work_hours < 4:
+    policy = await get_shift_policy(request, attendance.get("site", user.get("site")))
+    if work_hours < policy.half_day_hours:
         status = "half_day"
 
     # Update attendance
@@ -973,8 +2839,11 @@ async def check_out(
             }
         }
     )
+    _get_presence_board(request).check_out(user["id"])
+    _get_attendance_cache(request).record(user["id"], today, status, round(work_hours, 2))
+    _get_report_cache(request.app).bump("attendance")
 
-    return AttendanceResponse(
+    return AttendanceResponse.model_construct(
         id=attendance["_id"],
         employee_id=user["id"],
         employee_name=user["username"],
@@ -987,33 +2856,59 @@ async def check_out(
     )
 
 
+ATTENDANCE_RECORD_PROJECTION = {
+    "employee_id": 1,
+    "date": 1,
+    "check_in": 1,
+    "check_out": 1,
+    "work_hours": 1,
+    "status": 1,
+    "notes": 1,
+}
+
+
 @api_router.get("/attendance/my-records", response_model=List[AttendanceResponse])
 async def get_my_attendance(
     request: Request,
     user: Dict = Depends(get_current_user),
-    limit: int = 30
+    limit: int = 30,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    cursor: Optional[str] = None
 ):
-    """Get current user's attendance records."""
+    """Get current user's attendance records, newest first.
+
+    Pages are keyset-based: pass the ``X-Next-Cursor`` response header back
+    as ``cursor`` to fetch the next (older) page.
+    """
+    if not 1 <= limit <= ATTENDANCE_PAGE_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {ATTENDANCE_PAGE_MAX_LIMIT}")
+
+    date_filter = {}
+    for operator, value in [("$gte", from_date), ("$lte", to_date), ("$lt", cursor)]:
+        if value:
+            try:
+                date_filter[operator] = datetime.fromisoformat(value).date().isoformat()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+
+    query: Dict = {"employee_id": user["id"]}
+    if date_filter:
+        query["date"] = date_filter
+
     db = _ensure_db(request)
 
+    # Fetch one extra row to know whether another page exists
     records = await db.attendance.find(
-        {"employee_id": user["id"]}
-    ).sort("date", -1).limit(limit).to_list(limit)
+        query, ATTENDANCE_RECORD_PROJECTION
+    ).sort([("employee_id", 1), ("date", -1)]).limit(limit + 1).to_list(limit + 1)
 
-    return [
-        AttendanceResponse(
-            id=record["_id"],
-            employee_id=record["employee_id"],
-            employee_name=user["username"],
-            date=record["date"],
-            check_in=record["check_in"],
-            check_out=record.get("check_out"),
-            work_hours=record.get("work_hours"),
-            status=record["status"],
-            notes=record.get("notes")
-        )
-        for record in records
-    ]
+    headers = {}
+    if len(records) > limit:
+        records = records[:limit]
+        headers["X-Next-Cursor"] = records[-1]["date"]
+
+    return trusted_json_response([attendance_to_response(record, user["username"]) for record in records], headers)
 
 
 @api_router.get("/attendance/today")
@@ -1031,8 +2926,9 @@ async def get_today_attendance(request: Request, user: Dict = Depends(get_curren
     if not attendance:
         return {"checked_in": False, "date": today}
 
+    # The end-of-day close writes absent rows with no check-in
     return {
-        "checked_in": True,
+        "checked_in": attendance.get("check_in") is not None,
         "checked_out": attendance.get("check_out") is not None,
         "date": today,
         "check_in": attendance["check_in"],
@@ -1042,6 +2938,60 @@ async def get_today_attendance(request: Request, user: Dict = Depends(get_curren
     }
 
 
+@api_router.get("/attendance/presence")
+async def get_presence(request: Request, user: Dict = Depends(get_current_user), team: Optional[str] = None):
+    """Get who is currently checked in, grouped by team (Manager/Admin)."""
+    if user["role"] not in ["manager", "admin"]:
+        raise HTTPException(status_code=403, detail="Manager or Admin access required")
+
+    return {"success": True, **_get_presence_board(request).snapshot(team)}
+
+
+def _sse_event(event: str, data: Dict, event_id: Optional[Union[int, str]] = None) -> str:
+    message = f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data)}\n\n"
+
+
+@api_router.get("/attendance/presence/stream")
+async def stream_presence(request: Request, user: Dict = Depends(get_current_user), team: Optional[str] = None):
+    """Stream presence changes as Server-Sent Events (Manager/Admin)."""
+    if user["role"] not in ["manager", "admin"]:
+        raise HTTPException(status_code=403, detail="Manager or Admin access required")
+
+    board = _get_presence_board(request)
+
+    async def event_stream():
+        queue = board.subscribe()
+        try:
+            snapshot = board.snapshot(team)
+            yield _sse_event("snapshot", snapshot, snapshot["version"])
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+
+                if event["type"] in ["reset", "resync"]:
+                    snapshot = board.snapshot(team)
+                    yield _sse_event("snapshot", snapshot, snapshot["version"])
+                elif not team or event["employee"]["team"] == team:
+                    yield _sse_event(event["type"], event["employee"], event["version"])
+        finally:
+            board.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @api_router.get("/attendance/report")
 async def get_attendance_report(
     request: Request,
@@ -1049,11 +2999,21 @@ async def get_attendance_report(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None
 ):
-    """Get attendance report (Manager/Admin)."""
+    """Get attendance report (Manager/Admin).
+
+    Encoded responses are cached per date range until the next attendance write.
+    """
     if user["role"] not in ["manager", "admin"]:
         raise HTTPException(status_code=403, detail="Manager or Admin access required")
 
-    db = _ensure_db(request)
+    report_cache = _get_report_cache(request.app)
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    cache_key = report_cache.key(request, encoding, ("attendance",))
+    cached = report_cache.get(cache_key)
+    if cached is not None:
+        return encoded_json_response(cached[1], cached[0])
+
+    db = _ensure_report_db(request)
 
     # Build query
     query = {}
@@ -1081,18 +3041,687 @@ async def get_attendance_report(
             "notes": record.get("notes", "N/A")
         })
 
-    return {"success": True, "report": report, "total_records": len(report)}
+    return cached_report_response(
+        report_cache, cache_key, encoding, {"success": True, "report": report, "total_records": len(report)}
+    )
 
 
-# ============= ANNOUNCEMENTS ENDPOINTS =============
+ATTENDANCE_EXPORT_COLUMNS = [
+    "employee_id",
+    "employee_name",
+    "date",
+    "check_in",
+    "check_out",
+    "work_hours",
+    "status",
+    "notes",
+]
 
-@api_router.post("/announcements", response_model=AnnouncementResponse)
-async def create_announcement(
-    announcement_data: AnnouncementCreate,
-    request: Request,
-    user: Dict = Depends(get_current_user)
-):
-    """Create announcement (Admin only)."""
+
+def parse_date_window(start_date: str, end_date: str, max_days: int) -> tuple:
+    """Validate an inclusive ISO date window and return it as (start, end) strings."""
+    try:
+        start = datetime.fromisoformat(start_date).date()
+        end = datetime.fromisoformat(end_date).date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be in YYYY-MM-DD format")
+
+    if end < start:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+
+    if (end - start).days + 1 > max_days:
+        raise HTTPException(status_code=400, detail=f"Date window cannot exceed {max_days} days")
+
+    return start.isoformat(), end.isoformat()
+
+
+async def _iter_attendance_batches(db, query: Dict, batch_size: int):
+    """Yield export rows from the attendance cursor, one batch at a time."""
+    cursor = db.attendance.find(query).sort([("date", 1), ("employee_id", 1)]).batch_size(batch_size)
+
+    batch = []
+    async for record in cursor:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield await _attendance_export_rows(db, batch)
+            batch = []
+
+    if batch:
+        yield await _attendance_export_rows(db, batch)
+
+
+async def _attendance_export_rows(db, records: List[Dict]) -> List[Dict]:
+    """Resolve employee names for one batch of attendance records."""
+    employee_ids = list({record["employee_id"] for record in records})
+    users = await db.users.find({"_id": {"$in": employee_ids}}, {"username": 1}).to_list(len(employee_ids))
+    user_map = {u["_id"]: u["username"] for u in users}
+
+    return [
+        {
+            "employee_id": record["employee_id"],
+            "employee_name": user_map.get(record["employee_id"], "Unknown"),
+            "date": record["date"],
+            "check_in": record.get("check_in"),
+            "check_out": record.get("check_out"),
+            "work_hours": record.get("work_hours"),
+            "status": record["status"],
+            "notes": record.get("notes"),
+        }
+        for record in records
+    ]
+
+
+async def _stream_attendance_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=ATTENDANCE_EXPORT_COLUMNS)
+    writer.writeheader()
+
+    async for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    remaining = buffer.getvalue()
+    if remaining:
+        yield remaining.encode("utf-8")
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to the caller.
+
+    pyarrow tracks row group offsets via ``tell()``, so the position keeps
+    counting even though the buffered chunks are drained after each batch.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _stream_attendance_parquet(batches):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("employee_id", pa.string()),
+        ("employee_name", pa.string()),
+        ("date", pa.string()),
+        ("check_in", pa.string()),
+        ("check_out", pa.string()),
+        ("work_hours", pa.float64()),
+        ("status", pa.string()),
+        ("notes", pa.string()),
+    ])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        async for rows in batches:
+            # Each batch becomes its own row group, so memory stays bounded by the batch size
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+
+    yield sink.drain()
+
+
+@api_router.get("/attendance/export")
+async def export_attendance(
+    request: Request,
+    start_date: str,
+    end_date: str,
+    user: Dict = Depends(get_current_user),
+    format: str = "csv",
+    employee_id: Optional[str] = None,
+    department: Optional[str] = None
+):
+    """Stream full attendance history for a date window as CSV or Parquet (Manager/Admin)."""
+    if user["role"] not in ["manager", "admin"]:
+        raise HTTPException(status_code=403, detail="Manager or Admin access required")
+
+    if format not in ["csv", "parquet"]:
+        raise HTTPException(status_code=400, detail="Invalid format")
+
+    start, end = parse_date_window(start_date, end_date, ATTENDANCE_EXPORT_MAX_DAYS)
+
+    db = _ensure_report_db(request)
+
+    query: Dict = {"date": {"$gte": start, "$lte": end}}
+    if department:
+        members = await db.users.find({"department": department}, {"_id": 1}).to_list(None)
+        member_ids = [m["_id"] for m in members]
+        if employee_id:
+            member_ids = [m for m in member_ids if m == employee_id]
+        query["employee_id"] = {"$in": member_ids}
+    elif employee_id:
+        query["employee_id"] = employee_id
+
+    row_count = await db.attendance.count_documents(query)
+    batches = _iter_attendance_batches(db, query, ATTENDANCE_EXPORT_BATCH_SIZE)
+
+    filename = f"attendance_{start}_{end}.{format}"
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "X-Row-Count": str(row_count),
+    }
+
+    if format == "parquet":
+        return StreamingResponse(
+            _stream_attendance_parquet(batches),
+            media_type="application/vnd.apache.parquet",
+            headers=headers,
+        )
+
+    return StreamingResponse(
+        _stream_attendance_csv(batches),
+        media_type="text/csv",
+        headers=headers,
+    )
+
+
+# ============= SHIFT POLICY ENDPOINTS =============
+
+DEFAULT_SHIFT_POLICY = ShiftPolicy()
+
+
+def _shift_start_minutes(policy: ShiftPolicy) -> int:
+    hours, minutes = policy.shift_start.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def validate_shift_policy(policy: ShiftPolicy) -> ShiftPolicy:
+    """Reject policies with an unknown timezone or malformed shift start."""
+    try:
+        ZoneInfo(policy.timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid timezone")
+
+    try:
+        start_minutes = _shift_start_minutes(policy)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="shift_start must be in HH:MM format")
+
+    if not 0 <= start_minutes < 24 * 60 or policy.grace_minutes < 0 or policy.half_day_hours < 0:
+        raise HTTPException(status_code=400, detail="Invalid shift policy values")
+
+    if not 0 < policy.shift_hours <= 24 or any(day not in range(7) for day in policy.work_days):
+        raise HTTPException(status_code=400, detail="Invalid shift policy values")
+
+    return policy
+
+
+def is_late_check_in(check_in_time: datetime, policy: ShiftPolicy) -> bool:
+    """Return True if a check-in falls after the shift start plus grace period."""
+    local_time = check_in_time.astimezone(ZoneInfo(policy.timezone))
+    return local_time.hour * 60 + local_time.minute > _shift_start_minutes(policy) + policy.grace_minutes
+
+
+def classify_attendance(
+    check_in: np.ndarray,
+    check_out: np.ndarray,
+    policy: ShiftPolicy
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized status and work hours for UTC datetime64 check-in/check-out arrays.
+
+    Mirrors ``check_in``/``check_out``: late after shift start plus grace,
+    half_day when worked hours fall under the threshold. Missing check-outs
+    (NaT) produce NaN work hours and keep the check-in status.
+    """
+    local = pd.DatetimeIndex(check_in).tz_localize("UTC").tz_convert(policy.timezone)
+    minute_of_day = np.asarray(local.hour * 60 + local.minute)
+
+    late = minute_of_day > _shift_start_minutes(policy) + policy.grace_minutes
+    status = np.where(late, "late", "present").astype(object)
+
+    work_hours = (check_out - check_in) / np.timedelta64(1, "s") / 3600
+    status[work_hours < policy.half_day_hours] = "half_day"
+
+    return status, np.round(work_hours, 2)
+
+
+async def load_shift_policies(app: FastAPI) -> Dict[str, ShiftPolicy]:
+    """Load all shift policies keyed by site, caching them on app state.
+
+    The cache is reloaded after ``SHIFT_POLICY_CACHE_TTL_SECONDS`` so updates
+    made through another worker take effect everywhere.
+    """
+    policies = getattr(app.state, "shift_policies", None)
+    if policies is not None and perf_counter() - app.state.shift_policies_loaded_at < SHIFT_POLICY_CACHE_TTL_SECONDS:
+        return policies
+
+    documents = await app.state.db.shift_policies.find().to_list(None)
+    policies = {
+        doc["_id"]: ShiftPolicy(site=doc["_id"], **{key: value for key, value in doc.items() if key != "_id"})
+        for doc in documents
+    }
+    app.state.shift_policies = policies
+    app.state.shift_policies_loaded_at = perf_counter()
+    return policies
+
+
+def resolve_shift_policy(policies: Dict[str, ShiftPolicy], site: Optional[str]) -> ShiftPolicy:
+    """Pick the policy for a site, falling back to the default policy."""
+    if site and site in policies:
+        return policies[site]
+    return policies.get("default", DEFAULT_SHIFT_POLICY)
+
+
+async def get_shift_policy(request: Request, site: Optional[str]) -> ShiftPolicy:
+    """Resolve the policy for a site from the cached policies."""
+    return resolve_shift_policy(await load_shift_policies(request.app), site)
+
+
+@api_router.get("/attendance/policies", response_model=List[ShiftPolicy])
+async def get_shift_policies(request: Request, user: Dict = Depends(get_current_user)):
+    """List configured shift policies (Manager/Admin)."""
+    if user["role"] not in ["manager", "admin"]:
+        raise HTTPException(status_code=403, detail="Manager or Admin access required")
+
+    policies = await load_shift_policies(request.app)
+    if "default" not in policies:
+        return [DEFAULT_SHIFT_POLICY] + list(policies.values())
+    return list(policies.values())
+
+
+@api_router.put("/attendance/policies/{site}", response_model=ShiftPolicy)
+async def update_shift_policy(
+    site: str,
+    policy_data: ShiftPolicyUpdate,
+    request: Request,
+    user: Dict = Depends(get_current_user)
+):
+    """Create or replace the shift policy for a site (Admin only)."""
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    policy = validate_shift_policy(ShiftPolicy(site=site, **policy_data.model_dump()))
+
+    db = _ensure_db(request)
+    await db.shift_policies.replace_one(
+        {"_id": site},
+        policy.model_dump(exclude={"site"}),
+        upsert=True
+    )
+
+    policies = await load_shift_policies(request.app)
+    policies[site] = policy
+
+    return policy
+
+
+@api_router.post("/attendance/recompute")
+async def recompute_attendance(
+    recompute_data: AttendanceRecomputeRequest,
+    request: Request,
+    user: Dict = Depends(get_current_user)
+):
+    """Reclassify attendance status and work hours for a date range after a policy change (Admin only)."""
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    start, end = parse_date_window(recompute_data.start_date, recompute_data.end_date, ATTENDANCE_RECOMPUTE_MAX_DAYS)
+
+    db = _ensure_db(request)
+    policies = await load_shift_policies(request.app)
+
+    query: Dict = {"date": {"$gte": start, "$lte": end}, "check_in": {"$ne": None}}
+    if recompute_data.site:
+        members = await db.users.find({"site": recompute_data.site}, {"_id": 1}).to_list(None)
+        query["$or"] = [
+            {"site": recompute_data.site},
+            {"site": None, "employee_id": {"$in": [m["_id"] for m in members]}},
+        ]
+
+    projection = {"employee_id": 1, "site": 1, "check_in": 1, "check_out": 1, "status": 1, "work_hours": 1}
+    records = await db.attendance.find(query, projection).to_list(None)
+    if not records:
+        return {"success": True, "scanned": 0, "updated": 0}
+
+    frame = pd.DataFrame(records)
+    for column in ["site", "check_out", "work_hours"]:
+        if column not in frame:
+            frame[column] = None
+
+    # Records written before sites were tracked fall back to the employee's current site
+    missing_site = frame["site"].isna()
+    if missing_site.any():
+        employee_ids = frame.loc[missing_site, "employee_id"].unique().tolist()
+        users = await db.users.find({"_id": {"$in": employee_ids}}, {"site": 1}).to_list(len(employee_ids))
+        user_sites = {u["_id"]: u.get("site") for u in users}
+        frame.loc[missing_site, "site"] = frame.loc[missing_site, "employee_id"].map(user_sites)
+
+    frame["site"] = frame["site"].where(frame["site"].isin(list(policies)), "default")
+    check_in = pd.to_datetime(frame["check_in"], utc=True, format="ISO8601").dt.tz_localize(None).to_numpy()
+    check_out = pd.to_datetime(frame["check_out"], utc=True, format="ISO8601").dt.tz_localize(None).to_numpy()
+
+    new_status = np.empty(len(frame), dtype=object)
+    new_hours = np.full(len(frame), np.nan)
+    for site, positions in frame.groupby("site").indices.items():
+        policy = resolve_shift_policy(policies, site)
+        new_status[positions], new_hours[positions] = classify_attendance(check_in[positions], check_out[positions], policy)
+
+    old_hours = frame["work_hours"].astype(float).to_numpy()
+    hours_changed = ~((old_hours == new_hours) | (np.isnan(old_hours) & np.isnan(new_hours)))
+    changed = np.flatnonzero((frame["status"].to_numpy() != new_status) | hours_changed)
+
+    operations = [
+        UpdateOne(
+            {"_id": frame.at[i, "_id"]},
+            {"$set": {
+                "status": new_status[i],
+                "work_hours": None if np.isnan(new_hours[i]) else float(new_hours[i]),
+            }}
+        )
+        for i in changed
+    ]
+    if operations:
+        await db.attendance.bulk_write(operations, ordered=False)
+        _get_attendance_cache(request).invalidate(start, end)
+        _get_report_cache(request.app).bump("attendance")
+
+    logger.info("Recomputed attendance %s..%s: %s scanned, %s updated", start, end, len(frame), len(operations))
+
+    return {"success": True, "scanned": len(frame), "updated": len(operations)}
+
+
+# ============= END-OF-DAY ATTENDANCE JOB =============
+
+def shift_end_utc(day: str, policy: ShiftPolicy) -> np.datetime64:
+    """Return the end of a site's shift on a day as a naive UTC datetime64."""
+    hours, minutes = policy.shift_start.split(":")
+    shift_start = datetime.combine(
+        datetime.fromisoformat(day).date(),
+        time(int(hours), int(minutes)),
+        tzinfo=ZoneInfo(policy.timezone)
+    )
+    shift_end = (shift_start + timedelta(hours=policy.shift_hours)).astimezone(timezone.utc)
+    return np.datetime64(shift_end.replace(tzinfo=None), "ns")
+
+
+async def close_attendance_day(db, day: str, policies: Dict[str, ShiftPolicy], now: Optional[datetime] = None) -> Dict:
+    """Auto check-out open records and mark absentees for one day.
+
+    Safe to rerun: check-outs only apply to records still open, and absent
+    rows are upserted with ``$setOnInsert`` against the unique (employee_id,
+    date) index, so concurrent closes in several workers cannot duplicate
+    rows. Sites whose shift on ``day`` has not ended yet (west of UTC) are
+    skipped and reported in ``deferred_sites`` for a later run to close.
+    """
+    now = now or datetime.now(timezone.utc)
+    now_utc = np.datetime64(now.astimezone(timezone.utc).replace(tzinfo=None), "ns")
+    deferred = {
+        policy.site for policy in [resolve_shift_policy(policies, None), *policies.values()]
+        if shift_end_utc(day, policy) > now_utc
+    }
+
+    day_date = datetime.fromisoformat(day).date()
+    next_day = (day_date + timedelta(days=1)).isoformat()
+
+    users = await db.users.find(
+        {
+            "is_active": {"$ne": False},
+            "$or": [{"created_at": {"$lt": next_day}}, {"created_at": {"$exists": False}}],
+        },
+        {"site": 1}
+    ).to_list(None)
+    records = await db.attendance.find(
+        {"date": day},
+        {"employee_id": 1, "site": 1, "check_in": 1, "check_out": 1}
+    ).to_list(None)
+    leaves = await db.leave_requests.find(
+        {"status": "approved", "start_date": {"$lte": day}, "end_date": {"$gte": day}},
+        {"employee_id": 1}
+    ).to_list(None)
+
+    user_sites = {u["_id"]: u.get("site") for u in users}
+    attended = {record["employee_id"] for record in records}
+    on_leave = {leave["employee_id"] for leave in leaves}
+
+    operations = []
+
+    # Open records: check out at the end of the site's shift (or at check-in if that came later)
+    open_records = [r for r in records if r.get("check_in") and not r.get("check_out")]
+    by_site: Dict[str, List[Dict]] = {}
+    for record in open_records:
+        site = record.get("site") or user_sites.get(record["employee_id"])
+        by_site.setdefault(resolve_shift_policy(policies, site).site, []).append(record)
+
+    for site, site_records in by_site.items():
+        policy = resolve_shift_policy(policies, site)
+        if policy.site in deferred:
+            continue
+        check_in = pd.to_datetime(
+            [r["check_in"] for r in site_records], utc=True, format="ISO8601"
+        ).tz_localize(None).to_numpy()
+        check_out = np.maximum(check_in, shift_end_utc(day, policy))
+        status, work_hours = classify_attendance(check_in, check_out, policy)
+
+        for i, record in enumerate(site_records):
+            operations.append(UpdateOne(
+                {"_id": record["_id"], "check_out": None},
+                {"$set": {
+                    "check_out": pd.Timestamp(check_out[i], tz="UTC").isoformat(),
+                    "work_hours": float(work_hours[i]),
+                    "status": status[i],
+                    "auto_checkout": True,
+                }}
+            ))
+
+    # Absentees: active employees with no attendance row and no approved leave on a work day
+    absent_count = 0
+    for employee_id in set(user_sites) - attended - on_leave:
+        site = user_sites[employee_id]
+        policy = resolve_shift_policy(policies, site)
+        if policy.site in deferred or day_date.weekday() not in policy.work_days:
+            continue
+        absent_count += 1
+        operations.append(UpdateOne(
+            {"employee_id": employee_id, "date": day},
+            {"$setOnInsert": {
+                "_id": str(uuid.uuid4()),
+                "site": site,
+                "check_in": None,
+                "check_out": None,
+                "work_hours": 0.0,
+                "status": "absent",
+                "notes": None,
+            }},
+            upsert=True
+        ))
+
+    counts = {"nModified": 0, "nUpserted": 0}
+    if operations:
+        try:
+            result = await db.attendance.bulk_write(operations, ordered=False)
+            counts = {"nModified": result.modified_count, "nUpserted": result.upserted_count}
+        except BulkWriteError as exc:
+            # Duplicate keys mean a concurrent close or a late check-in already wrote that row
+            if any(error["code"] != 11000 for error in exc.details.get("writeErrors", [])):
+                raise
+            counts = {"nModified": exc.details.get("nModified", 0), "nUpserted": exc.details.get("nUpserted", 0)}
+
+    summary = {
+        "date": day,
+        "auto_checked_out": counts["nModified"],
+        "marked_absent": counts["nUpserted"],
+        "candidates": {"open": len(open_records), "absent": absent_count},
+        "deferred_sites": sorted(deferred),
+    }
+    logger.info("Closed attendance for %s: %s", day, summary)
+    return summary
+
+
+async def run_attendance_close_scheduler(app: FastAPI):
+    """Close recent UTC days once at startup, then daily at ATTENDANCE_CLOSE_TIME_UTC.
+
+    Each run closes the previous two days: sites west of UTC are still on
+    shift for yesterday at an early UTC run time, so they are deferred and
+    picked up by the following run. Closing is idempotent, so the repeat is
+    harmless for everyone else.
+    """
+    hours, minutes = ATTENDANCE_CLOSE_TIME_UTC.split(":")
+    run_time = time(int(hours), int(minutes), tzinfo=timezone.utc)
+
+    run_at = datetime.now(timezone.utc)
+    while True:
+        for offset in (2, 1):
+            day = (run_at.date() - timedelta(days=offset)).isoformat()
+            try:
+                await close_attendance_day(app.state.db, day, await load_shift_policies(app))
+                if hasattr(app.state, "attendance_cache"):
+                    app.state.attendance_cache.invalidate(day, day)
+                _get_report_cache(app).bump("attendance")
+            except Exception:
+                logger.exception("End-of-day attendance close failed for %s", day)
+
+        now = datetime.now(timezone.utc)
+        run_at = datetime.combine(now.date(), run_time)
+        if run_at <= now:
+            run_at += timedelta(days=1)
+        await asyncio.sleep((run_at - now).total_seconds())
+
+
+@api_router.post("/attendance/close-day")
+async def close_day(close_data: AttendanceCloseRequest, request: Request, user: Dict = Depends(get_current_user)):
+    """Run the end-of-day auto check-out and absent marking for a past day (Admin only)."""
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    day, _ = parse_date_window(close_data.date, close_data.date, 1)
+    if day >= datetime.now(timezone.utc).date().isoformat():
+        raise HTTPException(status_code=400, detail="Only past days can be closed")
+
+    db = _ensure_db(request)
+    summary = await close_attendance_day(db, day, await load_shift_policies(request.app))
+    _get_attendance_cache(request).invalidate(day, day)
+    _get_report_cache(request.app).bump("attendance")
+    return {"success": True, **summary}
+
+
+# ============= ATTENDANCE ANALYTICS ENDPOINTS =============
+
+@api_router.get("/attendance/heatmap")
+async def get_attendance_heatmap(
+    request: Request,
+    start_date: str,
+    end_date: str,
+    user: Dict = Depends(get_current_user),
+    department: Optional[str] = None
+):
+    """Employees x days status/hours heatmap with per-employee aggregates (Manager/Admin)."""
+    if user["role"] not in ["manager", "admin"]:
+        raise HTTPException(status_code=403, detail="Manager or Admin access required")
+
+    start, end = parse_date_window(start_date, end_date, ATTENDANCE_HEATMAP_MAX_DAYS)
+
+    db = _ensure_db(request)
+    query = {"department": department} if department else {}
+    employees = await db.users.find(query, {"username": 1}).sort("username", 1).to_list(None)
+    employee_ids = [e["_id"] for e in employees]
+
+    status, hours = await _get_attendance_cache(request).slice(db, employee_ids, start, end)
+
+    recorded = status > 0
+    attended = np.isin(status, [
+        ATTENDANCE_STATUS_CODES["present"],
+        ATTENDANCE_STATUS_CODES["late"],
+        ATTENDANCE_STATUS_CODES["half_day"],
+    ])
+    days_attended = attended.sum(axis=1)
+    late_days = (status == ATTENDANCE_STATUS_CODES["late"]).sum(axis=1)
+    hours_logged = ~np.isnan(hours)
+    hours_count = hours_logged.sum(axis=1)
+    hours_total = np.nansum(hours, axis=1)
+
+    on_time_streaks = longest_streaks(status == ATTENDANCE_STATUS_CODES["present"], recorded)
+    attendance_streaks = longest_streaks(attended, recorded)
+
+    start_day = datetime.fromisoformat(start).date()
+    dates = [(start_day + timedelta(days=offset)).isoformat() for offset in range(status.shape[1])]
+
+    return {
+        "success": True,
+        "start_date": start,
+        "end_date": end,
+        "department": department,
+        "dates": dates,
+        "status_codes": ATTENDANCE_STATUS_CODES,
+        "employees": [
+            {
+                "employee_id": employee["_id"],
+                "employee_name": employee["username"],
+                "status": status[i].tolist(),
+                "hours": np.where(hours_logged[i], np.round(hours[i], 2), None).tolist(),
+                "days_attended": int(days_attended[i]),
+                "mean_hours": round(float(hours_total[i] / hours_count[i]), 2) if hours_count[i] else None,
+                "late_rate": round(float(late_days[i] / days_attended[i]), 3) if days_attended[i] else None,
+                "longest_on_time_streak": int(on_time_streaks[i]),
+                "longest_attendance_streak": int(attendance_streaks[i]),
+            }
+            for i, employee in enumerate(employees)
+        ],
+        "daily_attendance": attended.sum(axis=0).tolist(),
+        "summary": {
+            "mean_hours": round(float(hours_total.sum() / hours_count.sum()), 2) if hours_count.sum() else None,
+            "late_rate": round(float(late_days.sum() / days_attended.sum()), 3) if days_attended.sum() else None,
+        },
+    }
+
+
+# ============= ANNOUNCEMENTS ENDPOINTS =============
+
+def announcement_to_response(announcement: Dict, creator_name: str) -> AnnouncementResponse:
+    """Convert database announcement to AnnouncementResponse (trusted construction, see user_to_response)."""
+    return AnnouncementResponse.model_construct(
+        id=announcement["_id"],
+        title=announcement["title"],
+        content=announcement["content"],
+        priority=announcement["priority"],
+        target_roles=announcement.get("target_roles"),
+        created_by=announcement["created_by"],
+        created_by_name=creator_name,
+        created_at=announcement["created_at"],
+        is_active=announcement["is_active"],
+        publish_at=announcement.get("publish_at"),
+        expires_at=announcement.get("expires_at")
+    )
+
+
+@api_router.post("/announcements", response_model=AnnouncementResponse)
+async def create_announcement(
+    announcement_data: AnnouncementCreate,
+    request: Request,
+    user: Dict = Depends(get_current_user)
+):
+    """Create announcement (Admin only)."""
     if user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
 
@@ -1108,6 +3737,13 @@ async def create_announcement(
             if role not in ["employee", "manager", "admin"]:
                 raise HTTPException(status_code=400, detail="Invalid target role")
 
+    created_at = datetime.now(timezone.utc).isoformat()
+    publish_at = parse_utc_datetime(announcement_data.publish_at, "publish_at") if announcement_data.publish_at else created_at
+    expires_at = parse_utc_datetime(announcement_data.expires_at, "expires_at") if announcement_data.expires_at else None
+
+    if expires_at and expires_at <= max(publish_at, created_at):
+        raise HTTPException(status_code=400, detail="expires_at must be after publish_at and in the future")
+
     announcement_id = str(uuid.uuid4())
     announcement = {
         "_id": announcement_id,
@@ -1116,58 +3752,413 @@ async def create_announcement(
         "priority": announcement_data.priority,
         "target_roles": announcement_data.target_roles,
         "created_by": user["id"],
-        "created_at": datetime.now(timezone.utc).isoformat(),
+        "created_at": created_at,
+        "publish_at": publish_at,
+        "expires_at": expires_at,
         "is_active": True
     }
 
     await db.announcements.insert_one(announcement)
 
-    return AnnouncementResponse(
-        id=announcement_id,
-        title=announcement_data.title,
-        content=announcement_data.content,
-        priority=announcement_data.priority,
-        target_roles=announcement_data.target_roles,
-        created_by=user["id"],
-        created_by_name=user["username"],
-        created_at=announcement["created_at"],
-        is_active=True
+    response = announcement_to_response(announcement, user["username"])
+
+    # Scheduled announcements go live later via the announcement scheduler
+    if publish_at <= created_at:
+        _invalidate_announcement_feeds(request)
+        _get_announcement_timeline(request).add(announcement)
+        _get_announcement_broadcaster(request).publish(
+            "announcement",
+            response.model_dump(),
+            announcement_data.target_roles,
+            f"{announcement['created_at']}|{announcement_id}"
+        )
+
+    return response
+
+
+def _get_announcement_feed_cache(request: Request) -> Dict[Tuple[str, int], Tuple]:
+    if not hasattr(request.app.state, "announcement_feed_cache"):
+        request.app.state.announcement_feed_cache = {}
+    return request.app.state.announcement_feed_cache
+
+
+def _invalidate_announcement_feeds(request: Request):
+    _get_announcement_feed_cache(request).clear()
+
+
+def parse_announcement_cursor(cursor: str) -> Tuple[str, str]:
+    """Split a ``created_at|id`` cursor (also used as the SSE event id)."""
+    created_at, _, announcement_id = cursor.partition("|")
+    if not announcement_id:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return created_at, announcement_id
+
+
+def parse_utc_datetime(value: str, field: str) -> str:
+    """Normalize an ISO datetime to a UTC isoformat string (naive values are taken as UTC)."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{field} must be an ISO datetime")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def live_window_query(now: str) -> Dict:
+    """Match announcements already published and not yet expired at ``now``.
+
+    ``$not`` keeps documents without publish_at/expires_at (created before
+    scheduling existed) in the window without an extra ``$or``.
+    """
+    return {
+        "publish_at": {"$not": {"$gt": now}},
+        "expires_at": {"$not": {"$lte": now}},
+    }
+
+
+def announcement_feed_query(role: str, cursor: Optional[str] = None, newer: bool = False) -> Dict:
+    """Live announcements targeted at everyone or at ``role``.
+
+    With a cursor, only announcements older than it are matched, or newer
+    than it when ``newer`` is set (used to replay missed stream events).
+    """
+    query: Dict = {
+        "is_active": True,
+        "$or": [{"target_roles": None}, {"target_roles": []}, {"target_roles": role}],
+        **live_window_query(datetime.now(timezone.utc).isoformat()),
+    }
+
+    if cursor:
+        created_at, announcement_id = parse_announcement_cursor(cursor)
+        operator = "$gt" if newer else "$lt"
+        query["$and"] = [{"$or": [
+            {"created_at": {operator: created_at}},
+            {"created_at": created_at, "_id": {operator: announcement_id}},
+        ]}]
+
+    return query
+
+
+class AnnouncementBroadcaster:
+    """Fans announcement events out to connected stream subscribers by role.
+
+    Each connection owns a bounded queue. A connection that cannot keep up
+    is dropped rather than buffered without limit; the client reconnects
+    with ``Last-Event-ID`` and the missed announcements are replayed from
+    Mongo.
+    """
+
+    def __init__(self, queue_size: int = ANNOUNCEMENT_STREAM_QUEUE_SIZE):
+        self._subscribers: Dict[asyncio.Queue, str] = {}
+        self._queue_size = queue_size
+
+    @property
+    def connection_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, role: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        self._subscribers[queue] = role
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.pop(queue, None)
+
+    def publish(self, event: str, data: Dict, target_roles: Optional[List[str]] = None, event_id: Optional[str] = None):
+        for queue, role in list(self._subscribers.items()):
+            if target_roles and role not in target_roles:
+                continue
+            try:
+                queue.put_nowait((event, data, event_id))
+            except asyncio.QueueFull:
+                # Backpressure: disconnect the slow consumer; it will replay on reconnect
+                self.unsubscribe(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+def _get_announcement_broadcaster(request: Request) -> AnnouncementBroadcaster:
+    if not hasattr(request.app.state, "announcement_broadcaster"):
+        request.app.state.announcement_broadcaster = AnnouncementBroadcaster()
+    return request.app.state.announcement_broadcaster
+
+
+@api_router.get("/announcements/stream")
+async def stream_announcements(
+    request: Request,
+    user: Dict = Depends(get_current_user),
+    last_event_id: Optional[str] = Header(None),
+    since: Optional[str] = None
+):
+    """Push new announcements for the caller's role as Server-Sent Events.
+
+    On reconnect the ``Last-Event-ID`` header (or ``since`` query parameter)
+    replays announcements created after that event.
+    """
+    resume_from = last_event_id or since
+    if resume_from:
+        parse_announcement_cursor(resume_from)
+
+    db = _ensure_db(request)
+    broadcaster = _get_announcement_broadcaster(request)
+    role = user["role"]
+
+    async def event_stream():
+        # Subscribe before replaying so nothing created in between is lost
+        queue = broadcaster.subscribe(role)
+        try:
+            last_sent: Tuple[str, str] = ("", "")
+            if resume_from:
+                last_sent = parse_announcement_cursor(resume_from)
+                missed = await db.announcements.find(
+                    announcement_feed_query(role, resume_from, newer=True)
+                ).sort([("created_at", 1), ("_id", 1)]).limit(ANNOUNCEMENT_REPLAY_LIMIT).to_list(ANNOUNCEMENT_REPLAY_LIMIT)
+
+                creator_ids = list({a["created_by"] for a in missed})
+                creators = await db.users.find({"_id": {"$in": creator_ids}}, {"username": 1}).to_list(len(creator_ids))
+                creator_names = {c["_id"]: c["username"] for c in creators}
+
+                for announcement in missed:
+                    data = announcement_to_response(
+                        announcement, creator_names.get(announcement["created_by"], "System")
+                    ).model_dump()
+                    last_sent = (announcement["created_at"], announcement["_id"])
+                    yield _sse_event("announcement", data, "|".join(last_sent))
+
+            yield ": connected\n\n"
+
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+
+                if message is None:
+                    break
+
+                event, data, event_id = message
+                if event_id and parse_announcement_cursor(event_id) <= last_sent:
+                    continue  # already delivered by the replay
+                yield _sse_event(event, data, event_id)
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
 @api_router.get("/announcements", response_model=List[AnnouncementResponse])
-async def get_announcements(request: Request, user: Dict = Depends(get_current_user)):
-    """Get announcements visible to current user."""
+async def get_announcements(
+    request: Request,
+    user: Dict = Depends(get_current_user),
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    """Get announcements visible to current user, newest first.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` for the
+    next page. First pages are cached per role until an announcement is
+    created or deleted.
+    """
+    if not 1 <= limit <= ANNOUNCEMENT_PAGE_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {ANNOUNCEMENT_PAGE_MAX_LIMIT}")
+
+    feed_cache = _get_announcement_feed_cache(request)
+    cache_key = (user["role"], limit)
+    now = datetime.now(timezone.utc).timestamp()
+
+    if not cursor and cache_key in feed_cache and feed_cache[cache_key][0] > now:
+        _, feed, next_cursor = feed_cache[cache_key]
+    else:
+        db = _ensure_db(request)
+        announcements = await db.announcements.find(
+            announcement_feed_query(user["role"], cursor)
+        ).sort([("created_at", -1), ("_id", -1)]).limit(limit + 1).to_list(limit + 1)
+
+        next_cursor = None
+        if len(announcements) > limit:
+            announcements = announcements[:limit]
+            next_cursor = f"{announcements[-1]['created_at']}|{announcements[-1]['_id']}"
+
+        creator_ids = list({a["created_by"] for a in announcements})
+        creators = await db.users.find({"_id": {"$in": creator_ids}}, {"username": 1}).to_list(len(creator_ids))
+        creator_names = {c["_id"]: c["username"] for c in creators}
+
+        feed = [
+            announcement_to_response(announcement, creator_names.get(announcement["created_by"], "System"))
+            for announcement in announcements
+        ]
+
+        if not cursor:
+            # Never serve a cached page past the moment one of its announcements expires
+            expires = [
+                datetime.fromisoformat(a["expires_at"]).timestamp() for a in announcements if a.get("expires_at")
+            ]
+            feed_cache[cache_key] = (min([now + ANNOUNCEMENT_FEED_CACHE_TTL] + expires), feed, next_cursor)
+
+    return trusted_json_response(feed, {"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+
+# ============= ANNOUNCEMENT READ TRACKING =============
+#
+# Read state is one small document per user in ``announcement_reads``:
+# ``read_through`` is a created_at high-water mark (created_at is the go-live
+# time; everything at or before it counts as read) and ``read_ids`` holds
+# announcements read out of order after it. Marking reads advances the mark
+# over any contiguous read prefix, so the exception set stays small.
+
+class AnnouncementTimeline:
+    """Sorted (created_at, id) keys of active announcements per role.
+
+    Lets unread counts be answered with a bisect against the user's
+    high-water mark instead of scanning announcements.
+    """
+
+    ROLES = ["employee", "manager", "admin"]
+
+    def __init__(self):
+        self.loaded_at: Optional[float] = None
+        self._reset()
+
+    def _reset(self):
+        self._keys: Dict[str, List[Tuple[str, str]]] = {role: [] for role in self.ROLES}
+        self._created: Dict[str, Dict[str, str]] = {role: {} for role in self.ROLES}
+
+    def load(self, announcements: List[Dict]):
+        self._reset()
+        for announcement in announcements:
+            self.add(announcement)
+        self.loaded_at = datetime.now(timezone.utc).timestamp()
+
+    def add(self, announcement: Dict):
+        key = (announcement["created_at"], announcement["_id"])
+        for role in announcement.get("target_roles") or self.ROLES:
+            if role in self._keys and announcement["_id"] not in self._created[role]:
+                bisect.insort(self._keys[role], key)
+                self._created[role][announcement["_id"]] = announcement["created_at"]
+
+    def remove(self, announcement_id: str):
+        for role in self.ROLES:
+            created_at = self._created[role].pop(announcement_id, None)
+            if created_at is not None:
+                keys = self._keys[role]
+                del keys[bisect.bisect_left(keys, (created_at, announcement_id))]
+
+    def keys_after(self, role: str, read_through: str) -> List[Tuple[str, str]]:
+        keys = self._keys.get(role, [])
+        return keys[bisect.bisect_right(keys, (read_through, "\uffff")):]
+
+    def unread_count(self, role: str, read_through: str, read_ids: List[str]) -> int:
+        keys = self._keys.get(role, [])
+        newer = len(keys) - bisect.bisect_right(keys, (read_through, "\uffff"))
+        created = self._created.get(role, {})
+        read_newer = sum(1 for announcement_id in set(read_ids) if created.get(announcement_id, "") > read_through)
+        return newer - read_newer
+
+
+def _get_announcement_timeline(request: Request) -> AnnouncementTimeline:
+    if not hasattr(request.app.state, "announcement_timeline"):
+        request.app.state.announcement_timeline = AnnouncementTimeline()
+    return request.app.state.announcement_timeline
+
+
+async def load_announcement_timeline(request: Request) -> AnnouncementTimeline:
+    """Return the timeline, reloading it when empty or older than the feed cache TTL."""
+    timeline = _get_announcement_timeline(request)
+    now = datetime.now(timezone.utc).timestamp()
+    if timeline.loaded_at is None or now - timeline.loaded_at > ANNOUNCEMENT_FEED_CACHE_TTL:
+        db = _ensure_db(request)
+        timeline.load(await db.announcements.find(
+            {"is_active": True, **live_window_query(datetime.now(timezone.utc).isoformat())},
+            {"created_at": 1, "target_roles": 1}
+        ).to_list(None))
+    return timeline
+
+
+def compact_read_state(keys_after: List[Tuple[str, str]], read_through: str, read_ids: List[str]) -> Tuple[str, List[str]]:
+    """Advance the high-water mark over the oldest contiguous run of read announcements."""
+    read = set(read_ids)
+    compacted = []
+    for created_at, announcement_id in keys_after:
+        if announcement_id not in read:
+            break
+        read_through = created_at
+        compacted.append(announcement_id)
+    return read_through, compacted
+
+
+@api_router.get("/announcements/unread-count")
+async def get_unread_announcement_count(request: Request, user: Dict = Depends(get_current_user)):
+    """Get the number of unread announcements visible to the current user."""
     db = _ensure_db(request)
+    timeline = await load_announcement_timeline(request)
+    state = await db.announcement_reads.find_one({"_id": user["id"]}) or {}
 
-    # Get active announcements
-    query = {"is_active": True}
-    announcements = await db.announcements.find(query).sort("created_at", -1).to_list(100)
-
-    # Filter by target roles
-    filtered = []
-    for announcement in announcements:
-        target_roles = announcement.get("target_roles")
-
-        # If no target roles, show to everyone
-        if not target_roles or user["role"] in target_roles:
-            # Get creator name
-            creator = await db.users.find_one({"_id": announcement["created_by"]})
-            creator_name = creator["username"] if creator else "System"
-
-            filtered.append(AnnouncementResponse(
-                id=announcement["_id"],
-                title=announcement["title"],
-                content=announcement["content"],
-                priority=announcement["priority"],
-                target_roles=announcement.get("target_roles"),
-                created_by=announcement["created_by"],
-                created_by_name=creator_name,
-                created_at=announcement["created_at"],
-                is_active=announcement["is_active"]
-            ))
+    return {
+        "success": True,
+        "unread": timeline.unread_count(user["role"], state.get("read_through", ""), state.get("read_ids", [])),
+    }
+
+
+@api_router.post("/announcements/read-all")
+async def mark_all_announcements_read(request: Request, user: Dict = Depends(get_current_user)):
+    """Mark every announcement visible to the current user as read."""
+    db = _ensure_db(request)
+    timeline = await load_announcement_timeline(request)
+    newest = timeline.keys_after(user["role"], "")
+
+    if newest:
+        await db.announcement_reads.update_one(
+            {"_id": user["id"]},
+            {"$max": {"read_through": newest[-1][0]}, "$set": {"read_ids": []}},
+            upsert=True
+        )
+
+    return {"success": True, "unread": 0}
+
+
+@api_router.post("/announcements/{announcement_id}/read")
+async def mark_announcement_read(announcement_id: str, request: Request, user: Dict = Depends(get_current_user)):
+    """Mark one announcement as read for the current user."""
+    db = _ensure_db(request)
+    timeline = await load_announcement_timeline(request)
+
+    state = await db.announcement_reads.find_one({"_id": user["id"]}) or {}
+    read_through = state.get("read_through", "")
+    read_ids = state.get("read_ids", [])
+
+    keys_after = timeline.keys_after(user["role"], read_through)
+    if announcement_id not in {key[1] for key in keys_after}:
+        # Already covered by the high-water mark, or not visible to this user
+        return {"success": True, "unread": timeline.unread_count(user["role"], read_through, read_ids)}
 
-    return filtered
+    if len(read_ids) >= ANNOUNCEMENT_READ_SET_MAX:
+        raise HTTPException(status_code=400, detail="Too many unread announcements marked individually; use read-all")
+
+    read_ids = read_ids + [announcement_id]
+    new_read_through, compacted = compact_read_state(keys_after, read_through, read_ids)
+
+    if announcement_id not in compacted:
+        await db.announcement_reads.update_one(
+            {"_id": user["id"]}, {"$addToSet": {"read_ids": announcement_id}}, upsert=True
+        )
+    if compacted:
+        await db.announcement_reads.update_one(
+            {"_id": user["id"]},
+            {"$max": {"read_through": new_read_through}, "$pull": {"read_ids": {"$in": compacted}}},
+            upsert=True
+        )
+
+    remaining = [i for i in read_ids if i not in compacted]
+    return {"success": True, "unread": timeline.unread_count(user["role"], new_read_through, remaining)}
 
 
 @api_router.delete("/announcements/{announcement_id}")
@@ -1191,9 +4182,404 @@ async def delete_announcement(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Announcement not found")
 
+    _invalidate_announcement_feeds(request)
+    _get_announcement_timeline(request).remove(announcement_id)
+    _get_announcement_broadcaster(request).publish("announcement_deleted", {"id": announcement_id})
+
     return {"success": True, "message": "Announcement deleted successfully"}
 
 
+# ============= ANNOUNCEMENT SCHEDULING AND ARCHIVAL =============
+
+async def archive_announcements(db, now: str) -> int:
+    """Move expired and deleted announcements into ``announcements_history``.
+
+    Reruns are safe: documents already copied by an interrupted run are
+    skipped as duplicate keys and then removed from the live collection.
+    """
+    archived = 0
+    while True:
+        batch = await db.announcements.find(
+            {"$or": [{"is_active": False}, {"expires_at": {"$lte": now}}]}
+        ).limit(ANNOUNCEMENT_ARCHIVE_BATCH_SIZE).to_list(ANNOUNCEMENT_ARCHIVE_BATCH_SIZE)
+        if not batch:
+            return archived
+
+        archived_at = datetime.now(timezone.utc)
+        for announcement in batch:
+            announcement["archived_at"] = archived_at
+            announcement["archive_reason"] = "deleted" if not announcement["is_active"] else "expired"
+
+        try:
+            await db.announcements_history.insert_many(batch, ordered=False)
+        except BulkWriteError as exc:
+            if any(error["code"] != 11000 for error in exc.details.get("writeErrors", [])):
+                raise
+
+        await db.announcements.delete_many({"_id": {"$in": [a["_id"] for a in batch]}})
+        archived += len(batch)
+
+
+async def publish_due_announcements(app: FastAPI, now: str) -> int:
+    """Take every due, not yet published scheduled announcement live and push it to open streams.
+
+    ``created_at`` is restamped to the go-live time first: feed cursors, SSE
+    event ids, replay and read high-water marks all order by it, so keeping
+    the creation time would file the announcement behind what clients have
+    already seen. An announcement counts as unpublished while ``created_at``
+    still predates ``publish_at``, so ones that fell due while no worker was
+    running are caught on the next pass, and when several workers race the
+    first one's stamp wins.
+    """
+    db = app.state.db
+    due = await db.announcements.find(
+        {"is_active": True, "publish_at": {"$lte": now}, "$expr": {"$lt": ["$created_at", "$publish_at"]}},
+        {"publish_at": 1}
+    ).to_list(None)
+    if not due:
+        return 0
+
+    live_at = datetime.now(timezone.utc).isoformat()
+    await db.announcements.bulk_write([
+        UpdateOne({"_id": a["_id"], "created_at": {"$lt": a["publish_at"]}}, {"$set": {"created_at": live_at}})
+        for a in due
+    ], ordered=False)
+    published = await db.announcements.find(
+        {"_id": {"$in": [a["_id"] for a in due]}}
+    ).sort([("created_at", 1), ("_id", 1)]).to_list(None)
+
+    app.state.announcement_feed_cache.clear()
+    app.state.announcement_timeline.loaded_at = None
+
+    creator_ids = list({a["created_by"] for a in published})
+    creators = await db.users.find({"_id": {"$in": creator_ids}}, {"username": 1}).to_list(len(creator_ids))
+    creator_names = {c["_id"]: c["username"] for c in creators}
+
+    for announcement in published:
+        app.state.announcement_broadcaster.publish(
+            "announcement",
+            announcement_to_response(announcement, creator_names.get(announcement["created_by"], "System")).model_dump(),
+            announcement.get("target_roles"),
+            f"{announcement['created_at']}|{announcement['_id']}"
+        )
+    return len(published)
+
+
+async def run_announcement_scheduler(app: FastAPI):
+    """Push announcements whose publish time has arrived and archive expired ones."""
+    while True:
+        now = datetime.now(timezone.utc).isoformat()
+        try:
+            published = await publish_due_announcements(app, now)
+            archived = await archive_announcements(app.state.db, now)
+
+            if archived:
+                app.state.announcement_feed_cache.clear()
+                app.state.announcement_timeline.loaded_at = None
+
+            if published or archived:
+                logger.info("Announcement scheduler: %s published, %s archived", published, archived)
+        except Exception:
+            logger.exception("Announcement scheduler run failed")
+        await asyncio.sleep(ANNOUNCEMENT_SCHEDULER_INTERVAL_SECONDS)
+
+
+# ============= MEMORY DIAGNOSTICS =============
+
+def read_rss_bytes() -> Optional[int]:
+    """Current resident set size from /proc; None where that is unavailable."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def sample_memory_stats() -> Dict:
+    """Update the memory gauges and return the values."""
+    rss = read_rss_bytes()
+    if rss is not None:
+        WORKER_RSS_BYTES.set(rss)
+
+    pending = gc.get_count()
+    for generation, count in enumerate(pending):
+        GC_PENDING_OBJECTS.labels(str(generation)).set(count)
+
+    traced = None
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        TRACEMALLOC_TRACED_BYTES.labels("current").set(current)
+        TRACEMALLOC_TRACED_BYTES.labels("peak").set(peak)
+        traced = {"current_bytes": current, "peak_bytes": peak}
+
+    return {
+        "rss_bytes": rss,
+        "gc_pending": list(pending),
+        "gc_collections": [generation["collections"] for generation in gc.get_stats()],
+        "gc_uncollectable": sum(generation["uncollectable"] for generation in gc.get_stats()),
+        "tracemalloc": traced,
+    }
+
+
+async def run_memory_stats_sampler():
+    while True:
+        try:
+            sample_memory_stats()
+        except Exception:
+            logger.exception("Memory stats sampling failed")
+        await asyncio.sleep(MEMORY_STATS_INTERVAL_SECONDS)
+
+
+def _get_memory_snapshots(app: FastAPI) -> "OrderedDict[str, Dict]":
+    if not hasattr(app.state, "memory_snapshots"):
+        app.state.memory_snapshots = OrderedDict()
+    return app.state.memory_snapshots
+
+
+def take_memory_snapshot() -> tracemalloc.Snapshot:
+    """Snapshot traced allocations, leaving out tracemalloc's and the import system's own."""
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ])
+
+
+def _restrict_snapshot(snapshot: tracemalloc.Snapshot, path: Optional[str]) -> tracemalloc.Snapshot:
+    """Keep only traces with a frame in files matching ``path`` (e.g. "ai_agents")."""
+    if not path:
+        return snapshot
+    return snapshot.filter_traces([tracemalloc.Filter(True, f"*{path}*", all_frames=True)])
+
+
+def _allocation_site(stat, group_by: str) -> Dict:
+    frames = [{"file": frame.filename, "line": frame.lineno} for frame in stat.traceback]
+    site = {"file": frames[0]["file"], "line": frames[0]["line"]} if frames else {}
+    if group_by == "filename":
+        site.pop("line", None)
+    if group_by == "traceback":
+        site["traceback"] = frames
+    return site
+
+
+def top_allocations(snapshot: tracemalloc.Snapshot, group_by: str, limit: int, path: Optional[str] = None) -> List[Dict]:
+    stats = _restrict_snapshot(snapshot, path).statistics(group_by)
+    return [
+        {**_allocation_site(stat, group_by), "size_bytes": stat.size, "count": stat.count}
+        for stat in stats[:limit]
+    ]
+
+
+def allocation_diff(
+    base: tracemalloc.Snapshot,
+    target: tracemalloc.Snapshot,
+    group_by: str,
+    limit: int,
+    path: Optional[str] = None
+) -> List[Dict]:
+    stats = _restrict_snapshot(target, path).compare_to(_restrict_snapshot(base, path), group_by)
+    return [
+        {
+            **_allocation_site(stat, group_by),
+            "size_bytes": stat.size,
+            "size_diff_bytes": stat.size_diff,
+            "count": stat.count,
+            "count_diff": stat.count_diff,
+        }
+        for stat in stats[:limit]
+    ]
+
+
+# ============= DIAGNOSTICS ENDPOINTS (ADMIN) =============
+
+@api_router.get("/admin/slow-queries")
+async def get_slow_queries(user: Dict = Depends(get_current_user)):
+    """Slow MongoDB query shapes seen by this worker, most recent first (Admin only)."""
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return {
+        "success": True,
+        "threshold_ms": slow_query_log.threshold_micros / 1000,
+        "explain_enabled": slow_query_log.explain,
+        "queries": list(reversed(slow_query_log.shapes.values())),
+    }
+
+
+@api_router.get("/admin/profiles")
+async def list_profiles(request: Request, user: Dict = Depends(get_current_user)):
+    """Recent request profiles captured by this worker (Admin only)."""
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return {"success": True, "profiles": _get_profile_store(request.app).list()}
+
+
+@api_router.get("/admin/profiles/{profile_id}")
+async def get_profile(request: Request, profile_id: str, user: Dict = Depends(get_current_user), format: str = "html"):
+    """Render a captured profile (Admin only).
+
+    ``html`` is pyinstrument's interactive call tree, ``text`` a plain call
+    tree, and ``speedscope`` a flame graph file for speedscope.app.
+    """
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    profile = _get_profile_store(request.app).get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    from pyinstrument.renderers import ConsoleRenderer, HTMLRenderer, SpeedscopeRenderer
+
+    if format == "html":
+        return Response(content=HTMLRenderer().render(profile["session"]), media_type="text/html")
+    if format == "text":
+        content = ConsoleRenderer(unicode=True, color=False, show_all=False).render(profile["session"])
+        return Response(content=content, media_type="text/plain")
+    if format == "speedscope":
+        return Response(
+            content=SpeedscopeRenderer().render(profile["session"]),
+            media_type="application/json",
+            headers={"Content-Disposition": f'attachment; filename="profile_{profile_id}.speedscope.json"'},
+        )
+    raise HTTPException(status_code=400, detail="Invalid format")
+
+
+@api_router.get("/admin/memory")
+async def get_memory_stats(user: Dict = Depends(get_current_user)):
+    """RSS, GC and tracemalloc status for this worker (Admin only)."""
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return {"success": True, "pid": os.getpid(), "tracing": tracemalloc.is_tracing(), **sample_memory_stats()}
+
+
+@api_router.post("/admin/memory/tracemalloc/start")
+async def start_tracemalloc(user: Dict = Depends(get_current_user), frames: int = 10):
+    """Start tracing allocations, keeping ``frames`` frames per traceback (Admin only).
+
+    Tracing slows allocation-heavy code noticeably; stop it when done.
+    """
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    if not 1 <= frames <= 100:
+        raise HTTPException(status_code=400, detail="frames must be between 1 and 100")
+
+    if tracemalloc.is_tracing():
+        return {"success": True, "message": "tracemalloc already running", "frames": tracemalloc.get_traceback_limit()}
+
+    tracemalloc.start(frames)
+    return {"success": True, "message": "tracemalloc started", "frames": frames}
+
+
+@api_router.post("/admin/memory/tracemalloc/stop")
+async def stop_tracemalloc(request: Request, user: Dict = Depends(get_current_user)):
+    """Stop tracing and drop stored snapshots (Admin only)."""
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    tracemalloc.stop()
+    _get_memory_snapshots(request.app).clear()
+    TRACEMALLOC_TRACED_BYTES.clear()
+    return {"success": True, "message": "tracemalloc stopped"}
+
+
+@api_router.post("/admin/memory/snapshots")
+async def create_memory_snapshot(
+    request: Request,
+    user: Dict = Depends(get_current_user),
+    group_by: str = "lineno",
+    limit: int = 25,
+    path: Optional[str] = None
+):
+    """Snapshot traced allocations and return the top sites (Admin only).
+
+    Keeps the last MEMORY_MAX_SNAPSHOTS snapshots for diffing. ``path``
+    narrows results to files matching it, e.g. ``server.py`` or ``ai_agents``.
+    """
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    if group_by not in ["lineno", "filename", "traceback"]:
+        raise HTTPException(status_code=400, detail="Invalid group_by")
+
+    if not tracemalloc.is_tracing():
+        raise HTTPException(status_code=400, detail="tracemalloc is not running")
+
+    snapshot = await asyncio.to_thread(take_memory_snapshot)
+    snapshot_id = str(uuid.uuid4())
+    snapshots = _get_memory_snapshots(request.app)
+    snapshots[snapshot_id] = {
+        "id": snapshot_id,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "rss_bytes": read_rss_bytes(),
+        "snapshot": snapshot,
+    }
+    while len(snapshots) > MEMORY_MAX_SNAPSHOTS:
+        snapshots.popitem(last=False)
+
+    top = await asyncio.to_thread(top_allocations, snapshot, group_by, limit, path)
+    return {
+        "success": True,
+        "id": snapshot_id,
+        "created_at": snapshots[snapshot_id]["created_at"],
+        "rss_bytes": snapshots[snapshot_id]["rss_bytes"],
+        "top": top,
+    }
+
+
+@api_router.get("/admin/memory/snapshots")
+async def list_memory_snapshots(request: Request, user: Dict = Depends(get_current_user)):
+    """Stored snapshots, oldest first (Admin only)."""
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return {
+        "success": True,
+        "snapshots": [
+            {key: value for key, value in entry.items() if key != "snapshot"}
+            for entry in _get_memory_snapshots(request.app).values()
+        ],
+    }
+
+
+@api_router.get("/admin/memory/diff")
+async def diff_memory_snapshots(
+    request: Request,
+    base: str,
+    user: Dict = Depends(get_current_user),
+    target: Optional[str] = None,
+    group_by: str = "lineno",
+    limit: int = 25,
+    path: Optional[str] = None
+):
+    """Allocation growth from ``base`` to ``target`` (default: latest snapshot) (Admin only)."""
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    if group_by not in ["lineno", "filename", "traceback"]:
+        raise HTTPException(status_code=400, detail="Invalid group_by")
+
+    snapshots = _get_memory_snapshots(request.app)
+    target = target or next(reversed(snapshots), None)
+    if base not in snapshots or target not in snapshots:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+
+    diff = await asyncio.to_thread(
+        allocation_diff, snapshots[base]["snapshot"], snapshots[target]["snapshot"], group_by, limit, path
+    )
+    base_rss, target_rss = snapshots[base]["rss_bytes"], snapshots[target]["rss_bytes"]
+    return {
+        "success": True,
+        "base": base,
+        "target": target,
+        "rss_diff_bytes": target_rss - base_rss if base_rss is not None and target_rss is not None else None,
+        "diff": diff,
+    }
+
+
 @api_router.post("/status", response_model=StatusCheck)
 async def create_status_check(input: StatusCheckCreate, request: Request):
     db = _ensure_db(request)
@@ -1304,4 +4690,8 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Row-Count", "X-Profile-Id"],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfilerMiddleware)
+app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,43 @@
+"""Tests for compact announcement read tracking."""
+
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from server import AnnouncementTimeline, compact_read_state
+
+
+def _timeline():
+    timeline = AnnouncementTimeline()
+    timeline.load([
+        {"_id": "a", "created_at": "2025-01-01", "target_roles": None},
+        {"_id": "b", "created_at": "2025-01-02", "target_roles": ["manager"]},
+        {"_id": "c", "created_at": "2025-01-03", "target_roles": []},
+        {"_id": "d", "created_at": "2025-01-04", "target_roles": ["employee", "admin"]},
+    ])
+    return timeline
+
+
+def test_unread_count_uses_high_water_mark_and_exceptions():
+    timeline = _timeline()
+
+    assert timeline.unread_count("employee", "", []) == 3
+    assert timeline.unread_count("manager", "", []) == 3
+    assert timeline.unread_count("employee", "2025-01-01", ["d"]) == 1
+    # Ids at or before the mark, or not visible to the role, are ignored
+    assert timeline.unread_count("employee", "2025-01-03", ["a", "b", "d"]) == 0
+
+    timeline.remove("d")
+    timeline.add({"_id": "e", "created_at": "2025-01-05", "target_roles": None})
+    assert [key[1] for key in timeline.keys_after("employee", "2025-01-01")] == ["c", "e"]
+
+
+def test_compaction_advances_over_contiguous_reads_only():
+    keys = _timeline().keys_after("employee", "")
+
+    assert compact_read_state(keys, "", ["a", "d"]) == ("2025-01-01", ["a"])
+    assert compact_read_state(keys, "", ["c", "a", "d"]) == ("2025-01-04", ["a", "c", "d"])
+    assert compact_read_state(keys, "", ["d"]) == ("", [])
@@ -0,0 +1,139 @@
+"""Tests for announcement fan-out, cursors and scheduling helpers."""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from server import (
+    AnnouncementBroadcaster,
+    AnnouncementTimeline,
+    announcement_feed_query,
+    parse_announcement_cursor,
+    parse_utc_datetime,
+    publish_due_announcements,
+)
+
+
+def test_publish_respects_target_roles():
+    broadcaster = AnnouncementBroadcaster()
+    employee = broadcaster.subscribe("employee")
+    manager = broadcaster.subscribe("manager")
+
+    broadcaster.publish("announcement", {"id": "1"}, ["manager"], "t1|1")
+    broadcaster.publish("announcement", {"id": "2"}, None, "t2|2")
+
+    assert employee.qsize() == 1
+    assert employee.get_nowait()[1] == {"id": "2"}
+    assert manager.qsize() == 2
+
+
+def test_slow_subscriber_is_disconnected():
+    broadcaster = AnnouncementBroadcaster(queue_size=2)
+    slow = broadcaster.subscribe("employee")
+
+    for i in range(3):
+        broadcaster.publish("announcement", {"id": str(i)})
+
+    assert broadcaster.connection_count == 0
+    assert slow.get_nowait() is None
+    assert slow.empty()
+
+
+def test_cursor_queries_and_validation():
+    assert parse_announcement_cursor("2025-01-01T00:00:00+00:00|abc") == ("2025-01-01T00:00:00+00:00", "abc")
+    with pytest.raises(HTTPException):
+        parse_announcement_cursor("garbage")
+
+    newer = announcement_feed_query("employee", "t|x", newer=True)
+    assert newer["$and"][0]["$or"][0] == {"created_at": {"$gt": "t"}}
+    assert {"target_roles": "employee"} in newer["$or"]
+
+
+def test_schedule_datetimes_normalize_to_utc():
+    assert parse_utc_datetime("2025-03-01T09:00:00+05:30", "publish_at") == "2025-03-01T03:30:00+00:00"
+    assert parse_utc_datetime("2025-03-01T09:00:00", "publish_at") == "2025-03-01T09:00:00+00:00"
+    with pytest.raises(HTTPException):
+        parse_utc_datetime("next tuesday", "expires_at")
+
+    query = announcement_feed_query("employee")
+    assert "$gt" in query["publish_at"]["$not"]
+    assert "$lte" in query["expires_at"]["$not"]
+
+
+def _announcement(announcement_id, created_at, publish_at):
+    return {
+        "_id": announcement_id, "title": "t", "content": "c", "priority": "normal", "target_roles": None,
+        "created_by": "admin", "created_at": created_at, "publish_at": publish_at, "expires_at": None,
+        "is_active": True,
+    }
+
+
+def _scheduler_app(db):
+    return SimpleNamespace(state=SimpleNamespace(
+        db=db,
+        announcement_broadcaster=AnnouncementBroadcaster(),
+        announcement_feed_cache={("employee", 100): ()},
+        announcement_timeline=AnnouncementTimeline(),
+    ))
+
+
+def test_scheduled_announcement_goes_live_after_what_clients_have_seen():
+    async def run():
+        db = AsyncMongoMockClient()["announcements_test"]
+        # Scheduled before the immediate post was made, due to go live after it
+        await db.announcements.insert_many([
+            _announcement("scheduled", "2025-01-01T08:00:00+00:00", "2025-01-01T10:00:00+00:00"),
+            _announcement("immediate", "2025-01-01T09:00:00+00:00", "2025-01-01T09:00:00+00:00"),
+            _announcement("later", "2025-01-01T08:00:00+00:00", "2025-01-01T11:00:00+00:00"),
+        ])
+        app = _scheduler_app(db)
+        stream = app.state.announcement_broadcaster.subscribe("employee")
+
+        # The client has seen the immediate post and read everything before the publish
+        last_sent = ("2025-01-01T09:00:00+00:00", "immediate")
+        read_through = last_sent[0]
+
+        assert await publish_due_announcements(app, "2025-01-01T10:00:30+00:00") == 1
+        assert app.state.announcement_feed_cache == {}
+
+        _, data, event_id = stream.get_nowait()
+        assert data["id"] == "scheduled"
+        assert parse_announcement_cursor(event_id) > last_sent
+
+        # Already stamped: later passes, in this or another worker, leave it alone
+        assert await publish_due_announcements(app, "2025-01-01T10:01:00+00:00") == 0
+        assert stream.empty()
+
+        timeline = AnnouncementTimeline()
+        timeline.load(await db.announcements.find({"_id": {"$ne": "later"}}).to_list(None))
+        assert timeline.unread_count("employee", read_through, []) == 1
+
+    asyncio.run(run())
+
+
+def test_announcement_due_while_scheduler_was_down_is_published():
+    async def run():
+        db = AsyncMongoMockClient()["announcements_downtime_test"]
+        # publish_at passed long before this worker (and its scheduler) started
+        await db.announcements.insert_one(
+            _announcement("missed", "2025-01-01T08:00:00+00:00", "2025-01-01T10:00:00+00:00")
+        )
+        app = _scheduler_app(db)
+        stream = app.state.announcement_broadcaster.subscribe("employee")
+
+        assert await publish_due_announcements(app, "2025-01-03T12:00:00+00:00") == 1
+
+        stored = await db.announcements.find_one({"_id": "missed"})
+        assert stored["created_at"] > stored["publish_at"]
+        assert stream.get_nowait()[1]["id"] == "missed"
+
+    asyncio.run(run())
@@ -0,0 +1,55 @@
+"""Tests for attendance heatmap aggregation helpers."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+from mongomock_motor import AsyncMongoMockClient
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import server
+from server import ATTENDANCE_STATUS_CODES, AttendanceColumnarCache, longest_streaks
+
+
+def test_longest_streaks_skip_days_without_records():
+    present, late = ATTENDANCE_STATUS_CODES["present"], ATTENDANCE_STATUS_CODES["late"]
+    status = np.array([
+        [present, present, 0, 0, present, late, present],
+        [late, late, late, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0],
+    ], dtype=np.int8)
+
+    streaks = longest_streaks(status == present, status > 0)
+
+    # Weekend gaps (no record) do not break the first employee's run of three
+    assert streaks.tolist() == [3, 0, 0]
+    assert longest_streaks(status > 0, status > 0).tolist() == [5, 3, 0]
+
+
+def test_cached_month_reloads_after_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(server, "perf_counter", lambda: clock[0])
+
+    async def run():
+        db = AsyncMongoMockClient()["attendance_cache_test"]
+        await db.attendance.insert_one({"employee_id": "e1", "date": "2025-03-03", "status": "present", "work_hours": 8.0})
+        cache = AttendanceColumnarCache(ttl_seconds=60)
+
+        status, _ = await cache.slice(db, ["e1", "e2"], "2025-03-03", "2025-03-03")
+        assert status.tolist() == [[ATTENDANCE_STATUS_CODES["present"]], [0]]
+
+        # Another worker checks e2 in: this cache never sees the write
+        await db.attendance.insert_one({"employee_id": "e2", "date": "2025-03-03", "status": "late", "work_hours": None})
+        clock[0] += 30
+        status, _ = await cache.slice(db, ["e1", "e2"], "2025-03-03", "2025-03-03")
+        assert status.tolist() == [[ATTENDANCE_STATUS_CODES["present"]], [0]]
+
+        clock[0] += 31
+        status, _ = await cache.slice(db, ["e1", "e2"], "2025-03-03", "2025-03-03")
+        assert status.tolist() == [[ATTENDANCE_STATUS_CODES["present"]], [ATTENDANCE_STATUS_CODES["late"]]]
+
+    asyncio.run(run())
@@ -0,0 +1,101 @@
+"""Tests for the end-of-day attendance close job."""
+
+import asyncio
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import server
+from server import (
+    DEFAULT_SHIFT_POLICY,
+    ShiftPolicy,
+    build_user_document,
+    close_attendance_day,
+    create_jwt_token,
+    dedupe_attendance,
+)
+
+POLICIES = {
+    "default": DEFAULT_SHIFT_POLICY,
+    "la": ShiftPolicy(site="la", timezone="America/Los_Angeles", shift_start="09:00"),
+}
+
+
+def test_sites_still_on_shift_are_deferred():
+    async def run():
+        db = AsyncMongoMockClient()["close_test"]
+        await db.users.insert_many([
+            {"_id": "u-utc", "site": None}, {"_id": "u-la", "site": "la"},
+            {"_id": "absent-utc", "site": None}, {"_id": "absent-la", "site": "la"},
+        ])
+        await db.attendance.insert_many([
+            {"_id": "r-utc", "employee_id": "u-utc", "date": "2025-03-03", "check_in": "2025-03-03T09:00:00+00:00", "check_out": None},
+            {"_id": "r-la", "employee_id": "u-la", "date": "2025-03-03", "check_in": "2025-03-03T17:00:00+00:00", "check_out": None},
+        ])
+
+        # 00:30 UTC on Tuesday: Los Angeles is still on Monday's shift
+        early = datetime(2025, 3, 4, 0, 30, tzinfo=timezone.utc)
+        summary = await close_attendance_day(db, "2025-03-03", POLICIES, now=early)
+        assert summary["deferred_sites"] == ["la"]
+        assert summary["auto_checked_out"] == 1 and summary["marked_absent"] == 1
+        assert (await db.attendance.find_one({"_id": "r-la"}))["check_out"] is None
+        assert await db.attendance.count_documents({"employee_id": "absent-la"}) == 0
+
+        # The next day's run closes the rest without touching what is already closed
+        summary = await close_attendance_day(db, "2025-03-03", POLICIES, now=datetime(2025, 3, 5, 0, 30, tzinfo=timezone.utc))
+        assert summary["deferred_sites"] == []
+        assert summary["auto_checked_out"] == 1 and summary["marked_absent"] == 1
+        assert (await db.attendance.find_one({"_id": "r-la"}))["check_out"] == "2025-03-04T02:00:00+00:00"
+
+    asyncio.run(run())
+
+
+def test_dedupe_keeps_the_most_complete_row():
+    async def run():
+        db = AsyncMongoMockClient()["dedupe_test"]
+        await db.attendance.insert_many([
+            {"_id": "absent", "employee_id": "e1", "date": "2025-03-03", "check_in": None, "check_out": None},
+            {"_id": "open", "employee_id": "e1", "date": "2025-03-03", "check_in": "2025-03-03T09:00:00+00:00", "check_out": None},
+            {"_id": "closed", "employee_id": "e1", "date": "2025-03-03", "check_in": "2025-03-03T09:05:00+00:00", "check_out": "2025-03-03T17:00:00+00:00"},
+            {"_id": "single", "employee_id": "e2", "date": "2025-03-03", "check_in": None, "check_out": None},
+        ])
+
+        assert await dedupe_attendance(db) == 2
+        assert sorted(row["_id"] for row in await db.attendance.find().to_list(None)) == ["closed", "single"]
+        assert await dedupe_attendance(db) == 0
+
+    asyncio.run(run())
+
+
+def test_absent_row_does_not_report_checked_in(monkeypatch):
+    db = AsyncMongoMockClient()["today_test"]
+    monkeypatch.setattr(server.app.state, "db", db, raising=False)
+    today = datetime.now(timezone.utc).date().isoformat()
+    users = [build_user_document(name, f"{name}@example.com", "hash", "employee") for name in ["absent", "open"]]
+
+    async def run():
+        await db.users.insert_many(users)
+        await db.attendance.insert_many([
+            {"_id": "r-absent", "employee_id": users[0]["_id"], "date": today, "check_in": None,
+             "check_out": None, "work_hours": 0, "status": "absent"},
+            {"_id": "r-open", "employee_id": users[1]["_id"], "date": today, "check_in": f"{today}T09:00:00+00:00",
+             "check_out": None, "work_hours": None, "status": "present"},
+        ])
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test/api") as client:
+            return [
+                (await client.get("/attendance/today", headers={
+                    "Authorization": f"Bearer {create_jwt_token(u['_id'], u['username'], 'employee')}"
+                })).json()
+                for u in users
+            ]
+
+    absent, open_row = asyncio.run(run())
+    assert (absent["checked_in"], absent["checked_out"], absent["status"]) == (False, False, "absent")
+    assert (open_row["checked_in"], open_row["checked_out"]) == (True, False)
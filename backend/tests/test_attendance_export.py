@@ -0,0 +1,75 @@
+"""Tests for the streaming attendance export helpers."""
+
+import csv
+import io
+import sys
+from pathlib import Path
+
+import pyarrow.parquet as pq
+import pytest
+from fastapi import HTTPException
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from server import _stream_attendance_csv, _stream_attendance_parquet, parse_date_window
+
+
+def _rows(start, count):
+    return [
+        {
+            "employee_id": f"emp-{i}",
+            "employee_name": f"user{i}",
+            "date": "2025-01-02",
+            "check_in": "2025-01-02T09:00:00+00:00",
+            "check_out": None,
+            "work_hours": None if i % 2 else 8.0,
+            "status": "present",
+            "notes": None,
+        }
+        for i in range(start, start + count)
+    ]
+
+
+async def _batches(sizes):
+    start = 0
+    for size in sizes:
+        yield _rows(start, size)
+        start += size
+
+
+def test_parse_date_window_validates_bounds():
+    assert parse_date_window("2025-01-01", "2025-01-31", 31) == ("2025-01-01", "2025-01-31")
+
+    with pytest.raises(HTTPException) as exc:
+        parse_date_window("2025-01-01", "2025-02-01", 31)
+    assert exc.value.status_code == 400
+
+    with pytest.raises(HTTPException):
+        parse_date_window("2025-02-01", "2025-01-01", 31)
+
+    with pytest.raises(HTTPException):
+        parse_date_window("01/02/2025", "2025-01-03", 31)
+
+
+@pytest.mark.asyncio
+async def test_csv_stream_yields_header_and_every_row():
+    chunks = [chunk async for chunk in _stream_attendance_csv(_batches([3, 2]))]
+    assert len(chunks) == 2
+
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert len(rows) == 5
+    assert rows[0]["employee_name"] == "user0"
+    assert rows[4]["employee_id"] == "emp-4"
+
+
+@pytest.mark.asyncio
+async def test_parquet_stream_writes_one_row_group_per_batch():
+    chunks = [chunk async for chunk in _stream_attendance_parquet(_batches([4, 4, 1]))]
+    parquet_file = pq.ParquetFile(io.BytesIO(b"".join(chunks)))
+
+    assert parquet_file.metadata.num_rows == 9
+    assert parquet_file.num_row_groups == 3
+    table = parquet_file.read()
+    assert table.column("work_hours").to_pylist()[:2] == [8.0, None]
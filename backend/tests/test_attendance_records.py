@@ -0,0 +1,87 @@
+"""Tests for the paginated my-records attendance listing."""
+
+import asyncio
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import server
+from server import build_user_document, create_jwt_token
+
+
+def _client(monkeypatch, days=5):
+    """Seed `days` consecutive records ending 2025-03-05 for alice, plus one for bob."""
+    db = AsyncMongoMockClient()["records_test"]
+    monkeypatch.setattr(server.app.state, "db", db, raising=False)
+
+    alice = build_user_document("alice", "alice@example.com", "hash", "employee")
+    bob = build_user_document("bob", "bob@example.com", "hash", "employee")
+    records = [
+        {"_id": f"a{i}", "employee_id": alice["_id"], "date": (date(2025, 3, 5) - timedelta(days=i)).isoformat(),
+         "check_in": None, "check_out": None, "work_hours": None, "status": "present"}
+        for i in range(days)
+    ]
+    records.append({**records[0], "_id": "b0", "employee_id": bob["_id"]})
+    asyncio.run(db.users.insert_many([alice, bob]))
+    asyncio.run(db.attendance.insert_many(records))
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test/api")
+    headers = {"Authorization": f"Bearer {create_jwt_token(alice['_id'], 'alice', 'employee')}"}
+    return client, headers
+
+
+def test_cursor_walks_pages_newest_first_until_exhausted(monkeypatch):
+    client, headers = _client(monkeypatch)
+
+    async def run():
+        pages, params = [], {"limit": 2}
+        async with client:
+            while True:
+                response = await client.get("/attendance/my-records", params=params, headers=headers)
+                assert response.status_code == 200
+                pages.append([r["date"] for r in response.json()])
+                if "X-Next-Cursor" not in response.headers:
+                    return pages
+                params["cursor"] = response.headers["X-Next-Cursor"]
+
+    assert asyncio.run(run()) == [
+        ["2025-03-05", "2025-03-04"],
+        ["2025-03-03", "2025-03-02"],
+        ["2025-03-01"],
+    ]
+
+
+def test_date_range_is_inclusive_and_a_full_last_page_has_no_cursor(monkeypatch):
+    client, headers = _client(monkeypatch)
+
+    async def run():
+        async with client:
+            return await client.get(
+                "/attendance/my-records", params={"from_date": "2025-03-02", "to_date": "2025-03-04", "limit": 3},
+                headers=headers,
+            )
+
+    response = asyncio.run(run())
+    assert [r["date"] for r in response.json()] == ["2025-03-04", "2025-03-03", "2025-03-02"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_bad_dates_and_limits_are_rejected(monkeypatch):
+    client, headers = _client(monkeypatch)
+
+    async def run():
+        async with client:
+            return [
+                (await client.get("/attendance/my-records", params=params, headers=headers)).status_code
+                for params in [{"from_date": "03/02/2025"}, {"cursor": "yesterday"}, {"limit": 0},
+                               {"limit": server.ATTENDANCE_PAGE_MAX_LIMIT + 1}]
+            ]
+
+    assert asyncio.run(run()) == [400, 400, 400, 400]
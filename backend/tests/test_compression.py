@@ -0,0 +1,95 @@
+"""Tests for response compression and the report cache."""
+
+import asyncio
+import gzip
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from server import CompressionMiddleware, ReportCache, choose_encoding
+
+
+def _run(app, accept_encoding="gzip"):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=100)(scope, receive, send))
+    headers = {key.decode(): value.decode() for key, value in messages[0]["headers"]}
+    return headers, [message["body"] for message in messages[1:]]
+
+
+def _app(chunks, content_type=b"application/json"):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type)]})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+    return app
+
+
+def test_choose_encoding_honours_quality():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("*") in ("br", "gzip")
+
+
+def test_small_body_is_sent_uncompressed():
+    headers, bodies = _run(_app([b"{}"]))
+
+    assert "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert bodies == [b"{}"]
+
+
+def test_large_body_is_gzipped_with_length():
+    payload = b'{"rows": "' + b"x" * 5000 + b'"}'
+    headers, bodies = _run(_app([payload]))
+
+    assert headers["content-encoding"] == "gzip"
+    assert headers["content-length"] == str(len(bodies[0]))
+    assert gzip.decompress(bodies[0]) == payload
+
+
+def test_stream_is_compressed_chunk_by_chunk():
+    chunks = [b"a" * 80, b"b" * 80, b"c" * 500, b""]
+    headers, bodies = _run(_app(chunks, b"text/csv"))
+
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    # The first two chunks are buffered up to the threshold, then each chunk is flushed
+    assert len(bodies) == 3
+    assert gzip.decompress(b"".join(bodies)) == b"".join(chunks)
+
+
+def test_event_streams_pass_through():
+    chunks = [b"data: " + b"x" * 500 + b"\n\n", b""]
+    headers, bodies = _run(_app(chunks, b"text/event-stream"))
+
+    assert "content-encoding" not in headers
+    assert bodies == chunks
+
+
+def test_report_cache_keys_on_data_version():
+    cache = ReportCache(max_entries=2, ttl_seconds=60)
+    request = SimpleNamespace(url=SimpleNamespace(path="/api/attendance/report"), query_params=SimpleNamespace(
+        multi_items=lambda: [("start_date", "2024-01-01")]
+    ))
+
+    key = cache.key(request, "gzip", ("attendance",))
+    cache.put(key, "gzip", b"report")
+    assert cache.get(cache.key(request, "gzip", ("attendance",))) == ("gzip", b"report")
+    assert cache.get(cache.key(request, None, ("attendance",))) is None
+
+    cache.bump("attendance")
+    assert cache.get(cache.key(request, "gzip", ("attendance",))) is None
+    assert cache.get(cache.key(request, "gzip", ("leave_requests",))) is None
@@ -0,0 +1,40 @@
+"""Tests for the event loop lag monitor."""
+
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from server import EventLoopMonitor
+
+
+def _blocking_call():
+    time.sleep(0.4)
+
+
+def test_blocking_call_is_counted_and_its_stack_logged(caplog):
+    before = REGISTRY.get_sample_value("event_loop_blocked_total") or 0
+
+    async def run():
+        monitor = EventLoopMonitor(interval=0.02, threshold_ms=100)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.1)
+            _blocking_call()
+            await asyncio.sleep(0.1)
+        finally:
+            monitor.stop()
+
+    with caplog.at_level(logging.WARNING, logger="server"):
+        asyncio.run(run())
+
+    assert REGISTRY.get_sample_value("event_loop_blocked_total") == before + 1
+    assert any("_blocking_call" in record.getMessage() for record in caplog.records)
+    assert REGISTRY.get_sample_value("event_loop_lag_seconds_count") > 0
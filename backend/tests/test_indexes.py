@@ -0,0 +1,88 @@
+"""Tests for the required index spec, ensure_indexes and the index audit."""
+
+import asyncio
+import logging
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from mongomock_motor import AsyncMongoMockClient
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from server import REQUIRED_INDEXES, audit_indexes, ensure_indexes
+
+SINCE = datetime(2025, 3, 1, tzinfo=timezone.utc)
+
+
+class _IndexStatsCollection:
+    """Mongomock has no $indexStats; report canned access counts per index name."""
+
+    def __init__(self, collection, accesses):
+        self._collection = collection
+        self._accesses = accesses
+
+    async def index_information(self):
+        return await self._collection.index_information()
+
+    async def aggregate(self, pipeline):
+        assert pipeline == [{"$indexStats": {}}]
+        for name in await self._collection.index_information():
+            yield {"name": name, "accesses": {"ops": self._accesses.get(name, 1), "since": SINCE}}
+
+
+class _IndexStatsDatabase:
+    def __init__(self, db, accesses):
+        self._db = db
+        self._accesses = accesses
+
+    async def list_collection_names(self):
+        return await self._db.list_collection_names()
+
+    def __getitem__(self, collection):
+        return _IndexStatsCollection(self._db[collection], self._accesses)
+
+
+def test_ensure_indexes_is_idempotent_and_survives_one_failure(caplog):
+    async def run():
+        db = AsyncMongoMockClient()["index_test"]
+        # Duplicate usernames block only the unique username index
+        await db.users.insert_many([
+            {"username": "alice", "email": "alice@example.com"},
+            {"username": "alice", "email": "alice2@example.com"},
+        ])
+
+        with caplog.at_level(logging.ERROR, logger="server"):
+            await ensure_indexes(db)
+            await ensure_indexes(db)
+
+        return {c: set(await db[c].index_information()) for c in REQUIRED_INDEXES}
+
+    names = asyncio.run(run())
+    assert [r.getMessage() for r in caplog.records] == ["Failed to create index users.username_unique"] * 2
+    for collection, indexes in REQUIRED_INDEXES.items():
+        expected = {options["name"] for _, options in indexes} - {"username_unique"}
+        assert expected <= names[collection]
+    assert "username_unique" not in names["users"]
+
+
+def test_audit_reports_missing_mismatched_and_unused_indexes():
+    async def run():
+        db = AsyncMongoMockClient()["audit_test"]
+        await ensure_indexes(db)
+        # The pre-unique attendance index has the right keys but not the unique flag
+        await db.attendance.drop_index("employee_date_unique")
+        await db.attendance.create_index([("employee_id", 1), ("date", -1)], name="employee_date")
+        await db.leave_requests.drop_index("status_applied_date")
+        await db.users.create_index([("legacy", 1)], name="legacy")
+
+        return await audit_indexes(_IndexStatsDatabase(db, {"legacy": 0}))
+
+    report = asyncio.run(run())
+    assert [(m["collection"], m["name"]) for m in report["missing"]] == [
+        ("attendance", "employee_date_unique"),
+        ("leave_requests", "status_applied_date"),
+    ]
+    assert report["unused"] == [{"collection": "users", "name": "legacy", "since": SINCE.isoformat()}]
@@ -0,0 +1,109 @@
+"""Tests for bulk leave balance CSV parsing and application."""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import BulkWriteError
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from server import LeaveBalanceAdjustment, apply_leave_balance_adjustments, parse_leave_balance_csv
+
+
+async def _seed(db):
+    await db.users.insert_many([
+        {"_id": "u1", "username": "alice", "leave_balances": {"cl": 5.0, "el": 10.0}},
+        {"_id": "u2", "username": "bob", "leave_balances": {"cl": 1.0}},
+    ])
+
+
+async def _balances(db):
+    return {u["username"]: u["leave_balances"] for u in await db.users.find().to_list(None)}
+
+
+def test_rows_parse_with_blank_cells_as_missing():
+    adjustments, errors = parse_leave_balance_csv(
+        "username,leave_type,balance,delta\n"
+        "alice,cl,10,\n"
+        "bob,el,,-1.5\n"
+        "carol,sl,,oops\n"
+    )
+
+    assert [(row, a.username, a.balance, a.delta) for row, a in adjustments] == [
+        (2, "alice", 10.0, None),
+        (3, "bob", None, -1.5),
+    ]
+    assert [e["row"] for e in errors] == [4]
+
+
+def test_header_must_name_user_and_value_columns():
+    with pytest.raises(HTTPException) as exc:
+        parse_leave_balance_csv("username,leave_type\nalice,cl\n")
+    assert exc.value.status_code == 400
+
+
+def test_deltas_increment_and_balances_overwrite():
+    async def run():
+        db = AsyncMongoMockClient()["balance_test"]
+        await _seed(db)
+        result = await apply_leave_balance_adjustments(db, [
+            (1, LeaveBalanceAdjustment(username="alice", leave_type="cl", delta=2.5)),
+            (2, LeaveBalanceAdjustment(user_id="u1", leave_type="el", balance=3)),
+            (3, LeaveBalanceAdjustment(username="bob", leave_type="sl", delta=1)),
+        ])
+
+        assert (result["updated"], result["failed"]) == (3, 0)
+        assert await _balances(db) == {"alice": {"cl": 7.5, "el": 3.0}, "bob": {"cl": 1.0, "sl": 1.0}}
+
+    asyncio.run(run())
+
+
+def test_unknown_users_and_negative_results_are_rejected_per_row():
+    async def run():
+        db = AsyncMongoMockClient()["balance_test"]
+        await _seed(db)
+        result = await apply_leave_balance_adjustments(db, [
+            (1, LeaveBalanceAdjustment(username="nobody", leave_type="cl", delta=1)),
+            (2, LeaveBalanceAdjustment(username="bob", leave_type="cl", delta=-2)),
+            (3, LeaveBalanceAdjustment(username="bob", leave_type="el", balance=-1)),
+            (4, LeaveBalanceAdjustment(username="alice", leave_type="cl", delta=-5)),
+        ], errors=[{"row": 5, "error": "Invalid number"}])
+
+        assert (result["total_rows"], result["updated"], result["failed"]) == (5, 1, 4)
+        assert [(e["row"], e["error"]) for e in result["errors"]] == [
+            (1, "User not found"),
+            (2, "Adjustment would make the balance negative"),
+            (3, "Balance cannot be negative"),
+            (5, "Invalid number"),
+        ]
+        # Draining a balance to exactly zero is allowed; rejected rows leave balances untouched
+        assert await _balances(db) == {"alice": {"cl": 0.0, "el": 10.0}, "bob": {"cl": 1.0}}
+
+    asyncio.run(run())
+
+
+def test_write_errors_are_reported_against_their_rows():
+    async def run():
+        mock_db = AsyncMongoMockClient()["balance_test"]
+        await _seed(mock_db)
+
+        async def failing_bulk_write(operations, ordered=True):
+            raise BulkWriteError({"writeErrors": [{"index": 1, "errmsg": "write conflict"}], "nModified": 1})
+
+        db = SimpleNamespace(users=SimpleNamespace(find=mock_db.users.find, bulk_write=failing_bulk_write))
+        result = await apply_leave_balance_adjustments(db, [
+            (2, LeaveBalanceAdjustment(username="alice", leave_type="cl", delta=1)),
+            (3, LeaveBalanceAdjustment(username="bob", leave_type="cl", delta=1)),
+        ])
+
+        assert (result["updated"], result["failed"]) == (1, 1)
+        assert result["errors"] == [{"row": 3, "error": "write conflict"}]
+
+    asyncio.run(run())
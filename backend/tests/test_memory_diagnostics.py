@@ -0,0 +1,34 @@
+"""Tests for tracemalloc snapshot helpers."""
+
+import sys
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from server import allocation_diff, read_rss_bytes, take_memory_snapshot, top_allocations
+
+
+def test_diff_pins_growth_to_allocating_line():
+    tracemalloc.start(5)
+    try:
+        base = take_memory_snapshot()
+        retained = [bytearray(1024) for _ in range(500)]  # noqa: F841 - kept alive for the snapshot
+        target = take_memory_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    diff = allocation_diff(base, target, "lineno", 5, path="test_memory_diagnostics")
+    assert diff[0]["file"].endswith("test_memory_diagnostics.py")
+    assert diff[0]["size_diff_bytes"] >= 500 * 1024
+    assert diff[0]["count_diff"] >= 500
+
+    by_file = top_allocations(target, "filename", 5, path="test_memory_diagnostics")
+    assert "line" not in by_file[0]
+
+
+def test_rss_is_reported_on_linux():
+    rss = read_rss_bytes()
+    assert rss is None or rss > 0
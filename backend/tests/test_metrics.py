@@ -0,0 +1,85 @@
+"""Tests for Prometheus instrumentation helpers."""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+from prometheus_client import REGISTRY
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import server
+from server import MongoCommandMetrics, _route_template, app, command_shape, summarize_explain
+
+
+def _scope(method, path):
+    return {"type": "http", "method": method, "path": path, "app": app, "root_path": ""}
+
+
+def test_route_template_uses_path_pattern():
+    assert _route_template(_scope("PUT", "/api/users/123/role")) == "/api/users/{user_id}/role"
+    assert _route_template(_scope("GET", "/api/no/such/route")) == "unmatched"
+
+
+def test_command_listener_labels_by_collection_and_command():
+    listener = MongoCommandMetrics()
+    labels = {"collection": "leave_requests", "command": "getMore", "status": "success"}
+    before = REGISTRY.get_sample_value("mongodb_command_duration_seconds_count", labels) or 0
+
+    listener.started(SimpleNamespace(
+        command={"getMore": 42, "collection": "leave_requests"},
+        command_name="getMore",
+        connection_id=("db", 27017),
+        request_id=1,
+    ))
+    listener.succeeded(SimpleNamespace(command_name="getMore", connection_id=("db", 27017), request_id=1, duration_micros=2500))
+
+    assert REGISTRY.get_sample_value("mongodb_command_duration_seconds_count", labels) == before + 1
+    assert listener._collections == {}
+
+
+def test_command_shape_ignores_literal_values():
+    first = command_shape("find", {"find": "attendance", "filter": {"employee_id": "a", "date": {"$gte": "2025-01-01"}}, "sort": {"date": -1}})
+    second = command_shape("find", {"find": "attendance", "filter": {"employee_id": "b", "date": {"$gte": "2025-06-01"}}, "sort": {"date": -1}})
+    other = command_shape("find", {"find": "attendance", "filter": {"date": {"$gte": "2025-01-01"}}})
+
+    assert first == second
+    assert first != other
+    assert command_shape("update", {"update": "users", "updates": [{"q": {"_id": "x"}, "u": {}}]}) == \
+        command_shape("update", {"update": "users", "updates": [{"q": {"_id": "y"}, "u": {}}]})
+
+
+def test_summarize_explain_reports_winning_plan():
+    summary = summarize_explain({
+        "queryPlanner": {
+            "winningPlan": {"stage": "COLLSCAN"},
+            "rejectedPlans": [{"stage": "IXSCAN", "indexName": "unused"}],
+        },
+        "executionStats": {"totalDocsExamined": 5000, "totalKeysExamined": 0, "nReturned": 3},
+    })
+
+    assert summary["collscan"] is True
+    assert summary["indexes"] == []
+    assert summary["docs_examined"] == 5000
+    assert summary["returned"] == 3
+
+
+def test_metrics_scrape_fails_closed_without_a_token(monkeypatch):
+    async def scrape(headers):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test/api") as client:
+            return await client.get("/metrics", headers=headers)
+
+    monkeypatch.setattr(server, "METRICS_TOKEN", None)
+    assert asyncio.run(scrape({})).status_code == 404
+    assert asyncio.run(scrape({"Authorization": "Bearer "})).status_code == 404
+
+    monkeypatch.setattr(server, "METRICS_TOKEN", "scrape-secret")
+    assert asyncio.run(scrape({})).status_code == 401
+    assert asyncio.run(scrape({"Authorization": "Bearer wrong"})).status_code == 401
+    response = asyncio.run(scrape({"Authorization": "Bearer scrape-secret"}))
+    assert response.status_code == 200
+    assert b"http_request_duration_seconds" in response.content
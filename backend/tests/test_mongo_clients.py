@@ -0,0 +1,51 @@
+"""Tests for MongoDB client configuration.
+
+Set MONGO_REPLSET_URL (e.g. a local single-node replica set started with
+``mongod --replSet rs0``) to also run the round-trip check.
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+from pymongo import ReadPreference
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from server import MONGO_MAX_POOL_SIZE, MONGO_REPORT_MAX_POOL_SIZE, MONGO_REPORT_MAX_STALENESS_SECONDS, create_mongo_clients
+
+
+def test_report_client_prefers_secondaries_with_its_own_pool():
+    client, report_client = create_mongo_clients("mongodb://localhost:27017")
+    try:
+        assert client.read_preference == ReadPreference.PRIMARY
+        assert client.delegate.options.pool_options.max_pool_size == MONGO_MAX_POOL_SIZE
+
+        assert report_client.read_preference.mode == ReadPreference.SECONDARY_PREFERRED.mode
+        assert report_client.read_preference.max_staleness == MONGO_REPORT_MAX_STALENESS_SECONDS
+        assert report_client.delegate.options.pool_options.max_pool_size == MONGO_REPORT_MAX_POOL_SIZE
+    finally:
+        report_client.close()
+        client.close()
+
+
+@pytest.mark.skipif(not os.getenv("MONGO_REPLSET_URL"), reason="MONGO_REPLSET_URL not set")
+def test_report_client_reads_writes_from_replica_set():
+    async def run():
+        client, report_client = create_mongo_clients(os.environ["MONGO_REPLSET_URL"])
+        db_name = f"hris_test_{uuid.uuid4().hex[:8]}"
+        try:
+            await client[db_name].attendance.insert_one({"_id": "a1", "date": "2025-01-02"})
+            # Single-node sets have no secondary, so secondaryPreferred falls back to the primary
+            return await report_client[db_name].attendance.find_one({"_id": "a1"})
+        finally:
+            await client.drop_database(db_name)
+            report_client.close()
+            client.close()
+
+    assert asyncio.run(run())["date"] == "2025-01-02"
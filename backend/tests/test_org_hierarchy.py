@@ -0,0 +1,111 @@
+"""Tests for materialized manager paths."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import server
+from server import build_user_document, compute_manager_paths, create_jwt_token
+
+
+def _org(monkeypatch):
+    """Seed ceo -> dir -> mgr -> eng plus a separate ops lead; returns (db, client, admin headers)."""
+    db = AsyncMongoMockClient()["org_test"]
+    monkeypatch.setattr(server.app.state, "db", db, raising=False)
+    users = {}
+    for name, manager in [("admin", None), ("ceo", None), ("dir", "ceo"), ("mgr", "dir"), ("eng", "mgr"), ("ops", "ceo")]:
+        doc = build_user_document(name, f"{name}@example.com", "hash", "admin" if name == "admin" else "manager")
+        doc["_id"] = name
+        doc["manager_id"] = manager
+        doc["manager_path"] = (users[manager]["manager_path"] + [manager]) if manager else []
+        users[name] = doc
+    asyncio.run(db.users.insert_many(list(users.values())))
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test/api")
+    headers = {"Authorization": f"Bearer {create_jwt_token('admin', 'admin', 'admin')}"}
+    return db, client, headers
+
+
+async def _paths(db):
+    return {u["_id"]: u["manager_path"] for u in await db.users.find({}, {"manager_path": 1}).to_list(None)}
+
+
+def test_paths_run_from_top_of_org_to_direct_manager():
+    paths = compute_manager_paths({"ceo": None, "dir": "ceo", "mgr": "dir", "eng": "mgr", "ops": "ceo"})
+
+    assert paths == {
+        "ceo": [],
+        "dir": ["ceo"],
+        "mgr": ["ceo", "dir"],
+        "eng": ["ceo", "dir", "mgr"],
+        "ops": ["ceo"],
+    }
+
+
+def test_dangling_managers_and_cycles_terminate():
+    paths = compute_manager_paths({"a": "b", "b": "a", "self": "self", "orphan": "missing", "child": "orphan"})
+
+    assert paths["orphan"] == []
+    assert paths["child"] == ["orphan"]
+    assert paths["self"] == []
+    assert sorted([paths["a"], paths["b"]]) == [[], ["b"]]
+
+
+def test_moving_a_manager_re_roots_their_subtree(monkeypatch):
+    db, client, headers = _org(monkeypatch)
+
+    async def run():
+        async with client:
+            response = await client.put("/users/dir/manager", json={"manager_id": "ops"}, headers=headers)
+            assert response.status_code == 200
+            assert response.json()["reports_updated"] == 2
+
+            team = await client.get("/team", params={"manager_id": "ops", "scope": "all"}, headers=headers)
+            assert [u["username"] for u in team.json()] == ["dir", "eng", "mgr"]
+        return await _paths(db)
+
+    paths = asyncio.run(run())
+    assert paths["dir"] == ["ceo", "ops"]
+    assert paths["mgr"] == ["ceo", "ops", "dir"]
+    assert paths["eng"] == ["ceo", "ops", "dir", "mgr"]
+    assert paths["ops"] == ["ceo"]
+
+
+def test_assigning_a_descendant_as_manager_is_rejected(monkeypatch):
+    db, client, headers = _org(monkeypatch)
+
+    async def run():
+        before = await _paths(db)
+        async with client:
+            for manager_id in ["eng", "dir"]:
+                response = await client.put("/users/dir/manager", json={"manager_id": manager_id}, headers=headers)
+                assert response.status_code == 400
+        assert await _paths(db) == before
+
+    asyncio.run(run())
+
+
+def test_retrying_after_a_partial_rewrite_repairs_the_subtree(monkeypatch):
+    db, client, headers = _org(monkeypatch)
+
+    async def run():
+        # Simulate a crash after the moved user was written but before their reports were
+        await db.users.update_one({"_id": "mgr"}, {"$set": {"manager_id": None, "manager_path": []}})
+
+        async with client:
+            response = await client.put("/users/mgr/manager", json={"manager_id": None}, headers=headers)
+            assert response.json()["reports_updated"] == 1
+            response = await client.put("/users/mgr/manager", json={"manager_id": None}, headers=headers)
+            assert response.json()["reports_updated"] == 0
+        return await _paths(db)
+
+    paths = asyncio.run(run())
+    assert paths["mgr"] == []
+    assert paths["eng"] == ["mgr"]
@@ -0,0 +1,48 @@
+"""Tests for the in-memory presence board."""
+
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from server import PresenceBoard, presence_entry
+
+
+def _entry(employee_id, team):
+    return presence_entry(employee_id, f"user-{employee_id}", team, "2025-01-02T09:00:00+00:00")
+
+
+def test_snapshot_groups_by_team_and_tracks_check_out():
+    board = PresenceBoard()
+    board.check_in(_entry("1", "Engineering"))
+    board.check_in(_entry("2", "Engineering"))
+    board.check_in(_entry("3", None))
+    board.check_out("2")
+
+    snapshot = board.snapshot()
+    assert snapshot["count"] == 2
+    assert snapshot["teams"]["Engineering"]["count"] == 1
+    assert snapshot["teams"]["Unassigned"]["employees"][0]["employee_id"] == "3"
+
+    assert board.snapshot("Engineering")["count"] == 1
+    assert board.snapshot("Sales")["count"] == 0
+
+
+def test_subscribers_receive_events_and_slow_ones_resync():
+    board = PresenceBoard(queue_size=2)
+    queue = board.subscribe()
+
+    board.check_in(_entry("1", "Ops"))
+    assert queue.get_nowait()["type"] == "check_in"
+
+    for employee_id in ["2", "3", "4"]:
+        board.check_in(_entry(employee_id, "Ops"))
+
+    assert queue.qsize() == 1
+    assert queue.get_nowait()["type"] == "resync"
+
+    board.unsubscribe(queue)
+    board.check_out("1")
+    assert queue.empty()
@@ -0,0 +1,97 @@
+"""Tests for request profiling triggers."""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from mongomock_motor import AsyncMongoMockClient
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import server
+from server import ProfilerMiddleware, ProfileStore, _profile_trigger, app, create_jwt_token
+
+
+def _scope(*headers, app=None):
+    return {"type": "http", "headers": list(headers), "app": app}
+
+
+def _bearer(user_id, role="admin"):
+    return (b"authorization", f"Bearer {create_jwt_token(user_id, 'someone', role)}".encode())
+
+
+def test_header_only_counts_for_users_stored_as_admin(monkeypatch):
+    monkeypatch.setattr(server, "PROFILE_SAMPLE_RATE", 0.0)
+
+    async def run():
+        db = AsyncMongoMockClient()["profiling_test"]
+        await db.users.insert_many([{"_id": "admin", "role": "admin"}, {"_id": "demoted", "role": "employee"}])
+        users = SimpleNamespace(state=SimpleNamespace(db=db))
+
+        assert await _profile_trigger(_scope((b"x-profile", b"1"), _bearer("admin"), app=users)) == "header"
+        # A token minted while the user was admin no longer counts once the stored role changes
+        assert await _profile_trigger(_scope((b"x-profile", b"1"), _bearer("demoted"), app=users)) is None
+        assert await _profile_trigger(_scope((b"x-profile", b"1"), _bearer("ghost"), app=users)) is None
+        assert await _profile_trigger(_scope((b"x-profile", b"1"), (b"authorization", b"Bearer not-a-jwt"), app=users)) is None
+        assert await _profile_trigger(_scope(_bearer("admin"), app=users)) is None
+
+    asyncio.run(run())
+
+
+def test_sample_rate_profiles_any_request(monkeypatch):
+    monkeypatch.setattr(server, "PROFILE_SAMPLE_RATE", 1.0)
+    assert asyncio.run(_profile_trigger(_scope())) == "sampled"
+
+
+def test_event_stream_does_not_block_later_profiles(monkeypatch):
+    monkeypatch.setattr(server, "PROFILE_SAMPLE_RATE", 1.0)
+
+    async def run():
+        stream_open = asyncio.Event()
+        close_stream = asyncio.Event()
+
+        async def endpoint(scope, receive, send):
+            content_type = b"text/event-stream" if scope["path"] == "/api/announcements/stream" else b"application/json"
+            await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type)]})
+            if content_type == b"text/event-stream":
+                stream_open.set()
+                await close_stream.wait()
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        middleware = ProfilerMiddleware(endpoint)
+
+        async def request(path):
+            started = []
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    started.append(dict(message["headers"]))
+
+            scope = {"type": "http", "method": "GET", "path": path, "headers": [], "app": app}
+            await middleware(scope, None, send)
+            return started[0]
+
+        stream = asyncio.create_task(request("/api/announcements/stream"))
+        await stream_open.wait()
+
+        # The stream is still open, yet the next request is profiled
+        headers = await request("/api/users")
+        assert b"x-profile-id" in headers
+
+        close_stream.set()
+        assert b"x-profile-id" not in await stream
+
+    asyncio.run(run())
+
+
+def test_store_keeps_most_recent_profiles():
+    store = ProfileStore(max_profiles=2)
+    for profile_id in ["a", "b", "c"]:
+        store.add({"id": profile_id, "session": object()})
+
+    assert store.get("a") is None
+    assert [p["id"] for p in store.list()] == ["c", "b"]
+    assert "session" not in store.list()[0]
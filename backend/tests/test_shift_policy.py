@@ -0,0 +1,104 @@
+"""Tests for shift policy classification."""
+
+import asyncio
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import server
+from server import (
+    EmployeeProfileUpdate,
+    ShiftPolicy,
+    classify_attendance,
+    is_late_check_in,
+    load_shift_policies,
+    shift_end_utc,
+    validate_shift_policy,
+)
+
+
+def _utc(values):
+    return np.array(values, dtype="datetime64[ns]")
+
+
+def test_default_policy_matches_legacy_rules():
+    policy = ShiftPolicy()
+    check_in = _utc(["2025-01-02T09:15:59", "2025-01-02T09:16:00", "2025-01-02T08:00:00", "2025-01-02T10:00:00"])
+    check_out = _utc(["2025-01-02T18:00:00", "NaT", "2025-01-02T11:59:00", "2025-01-02T14:00:00"])
+
+    status, work_hours = classify_attendance(check_in, check_out, policy)
+
+    assert list(status) == ["present", "late", "half_day", "late"]
+    assert work_hours[0] == pytest.approx(8.73)
+    assert np.isnan(work_hours[1])
+    assert work_hours[3] == 4.0
+
+
+def test_vectorized_and_scalar_classification_agree_across_timezones():
+    policy = ShiftPolicy(site="pune", timezone="Asia/Kolkata", shift_start="09:30", grace_minutes=10)
+    times = ["2025-03-01T03:59:00", "2025-03-01T04:10:00", "2025-03-01T04:11:00", "2025-03-01T12:00:00"]
+
+    status, _ = classify_attendance(_utc(times), _utc(["NaT"] * len(times)), policy)
+
+    expected = [
+        "late" if is_late_check_in(datetime.fromisoformat(t).replace(tzinfo=timezone.utc), policy) else "present"
+        for t in times
+    ]
+    assert list(status) == expected == ["present", "present", "late", "late"]
+
+
+def test_shift_end_uses_site_timezone():
+    assert shift_end_utc("2025-01-06", ShiftPolicy()) == np.datetime64("2025-01-06T18:00:00")
+
+    policy = ShiftPolicy(site="nyc", timezone="America/New_York", shift_start="08:00", shift_hours=8)
+    assert shift_end_utc("2025-01-06", policy) == np.datetime64("2025-01-06T21:00:00")
+    assert shift_end_utc("2025-07-07", policy) == np.datetime64("2025-07-07T20:00:00")
+
+
+def test_validate_shift_policy_rejects_bad_values():
+    with pytest.raises(HTTPException):
+        validate_shift_policy(ShiftPolicy(timezone="Mars/Olympus"))
+
+    with pytest.raises(HTTPException):
+        validate_shift_policy(ShiftPolicy(shift_start="9am"))
+
+    with pytest.raises(HTTPException):
+        validate_shift_policy(ShiftPolicy(shift_start="25:00"))
+
+    with pytest.raises(HTTPException):
+        validate_shift_policy(ShiftPolicy(work_days=[0, 7]))
+
+
+def test_site_is_not_self_service():
+    # The site selects the shift policy, so PUT /profile must not accept it
+    assert "site" not in EmployeeProfileUpdate(site="nyc", phone="123").model_dump(exclude_unset=True)
+
+
+def test_policy_updated_by_another_worker_is_picked_up(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(server, "perf_counter", lambda: clock[0])
+
+    async def run():
+        db = AsyncMongoMockClient()["shift_policy_test"]
+        await db.shift_policies.insert_one({"_id": "pune", "timezone": "Asia/Kolkata", "shift_start": "09:30"})
+        app = SimpleNamespace(state=SimpleNamespace(db=db))
+        assert (await load_shift_policies(app))["pune"].shift_start == "09:30"
+
+        # Written straight to Mongo, as PUT /attendance/policies on another worker would
+        await db.shift_policies.update_one({"_id": "pune"}, {"$set": {"shift_start": "10:00"}})
+        assert (await load_shift_policies(app))["pune"].shift_start == "09:30"
+
+        clock[0] += server.SHIFT_POLICY_CACHE_TTL_SECONDS
+        assert (await load_shift_policies(app))["pune"].shift_start == "10:00"
+
+    asyncio.run(run())
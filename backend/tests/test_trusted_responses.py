@@ -0,0 +1,60 @@
+"""Tests for the trusted (non-validating) response construction path."""
+
+import sys
+from pathlib import Path
+
+import orjson
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from server import (
+    AttendanceResponse,
+    LeaveResponse,
+    UserResponse,
+    attendance_to_response,
+    build_user_document,
+    leave_to_response,
+    trusted_json_response,
+    user_to_response,
+)
+
+
+def test_trusted_user_matches_validated_model():
+    user = build_user_document("alice", "alice@example.com", "hash", "employee")
+    user["_id"] = "u1"
+
+    trusted = user_to_response(user)
+    validated = UserResponse.model_validate(trusted.model_dump())
+
+    assert trusted.model_dump() == validated.model_dump()
+
+
+def test_trusted_leave_and_attendance_match_validated_models():
+    leave = {
+        "_id": "l1", "employee_id": "u1", "leave_type": "el", "start_date": "2024-03-01",
+        "end_date": "2024-03-02", "days_count": 2.0, "reason": "trip", "status": "pending",
+        "applied_date": "2024-02-20T09:00:00+00:00",
+    }
+    record = {
+        "_id": "a1", "employee_id": "u1", "date": "2024-03-04", "check_in": "2024-03-04T09:00:00+00:00",
+        "check_out": None, "work_hours": None, "status": "present",
+    }
+
+    assert leave_to_response(leave, "alice").model_dump() == LeaveResponse(
+        id="l1", employee_name="alice", **{k: v for k, v in leave.items() if k != "_id"}
+    ).model_dump()
+    assert attendance_to_response(record, "alice").model_dump() == AttendanceResponse(
+        id="a1", employee_name="alice", **{k: v for k, v in record.items() if k != "_id"}
+    ).model_dump()
+
+
+def test_trusted_json_response_serializes_list_with_headers():
+    user = build_user_document("bob", "bob@example.com", "hash", "manager")
+    user["_id"] = "u2"
+
+    response = trusted_json_response([user_to_response(user)], {"X-Next-Cursor": "bob"})
+
+    assert response.headers["X-Next-Cursor"] == "bob"
+    assert orjson.loads(response.body) == [user_to_response(user).model_dump()]
@@ -0,0 +1,70 @@
+"""Tests for bulk user import CSV parsing and password hashing."""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from prometheus_client import REGISTRY
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from server import (
+    hash_passwords_parallel,
+    parse_user_import_csv,
+    shutdown_password_hash_pool,
+    verify_password,
+)
+
+
+def test_valid_rows_keep_profile_fields_and_default_role():
+    rows, errors = parse_user_import_csv(
+        "username,email,password,role,department\n"
+        "alice,alice@example.com,secret,,Engineering\n"
+        "bob,bob@example.com,secret,manager,\n"
+    )
+
+    assert errors == []
+    assert [r["row"] for r in rows] == [2, 3]
+    assert rows[0]["user"].role == "employee"
+    assert rows[0]["profile"] == {"department": "Engineering"}
+    assert rows[1]["user"].role == "manager"
+    assert rows[1]["profile"] == {}
+
+
+def test_invalid_rows_are_reported_with_row_numbers():
+    rows, errors = parse_user_import_csv(
+        "username,email,password,role\n"
+        "alice,alice@example.com,secret,\n"
+        "bad,not-an-email,secret,\n"
+        "eve,eve@example.com,secret,owner\n"
+        "alice,other@example.com,secret,\n"
+        "nopass,nopass@example.com,,\n"
+    )
+
+    assert [r["user"].username for r in rows] == ["alice"]
+    assert [(e["row"], e["username"]) for e in errors] == [(3, "bad"), (4, "eve"), (5, "alice"), (6, "nopass")]
+    assert errors[1]["error"] == "Invalid role"
+    assert errors[2]["error"] == "Duplicate username or email in file"
+
+
+def test_missing_columns_rejected():
+    with pytest.raises(HTTPException) as exc:
+        parse_user_import_csv("username,email\nalice,alice@example.com\n")
+    assert exc.value.status_code == 400
+
+
+def test_parallel_hashing_is_timed_in_the_parent():
+    labels = {"operation": "hash"}
+    before = REGISTRY.get_sample_value("bcrypt_duration_seconds_count", labels) or 0
+    try:
+        hashed = asyncio.run(hash_passwords_parallel(["one", "two", "three"]))
+    finally:
+        shutdown_password_hash_pool()
+
+    assert [verify_password(p, h) for p, h in zip(["one", "two", "three"], hashed)] == [True] * 3
+    # Pool workers have their own registry; the observations must come from this process
+    assert REGISTRY.get_sample_value("bcrypt_duration_seconds_count", labels) == before + 3
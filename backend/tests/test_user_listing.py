@@ -0,0 +1,87 @@
+"""Tests for the paginated and streamed /users listing."""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+import server
+from server import build_user_document, create_jwt_token
+
+
+def _client(monkeypatch):
+    """Seed an admin and five employees split across two departments."""
+    db = AsyncMongoMockClient()["users_test"]
+    monkeypatch.setattr(server.app.state, "db", db, raising=False)
+
+    admin = build_user_document("admin", "admin@example.com", "hash", "admin")
+    users = [admin] + [
+        build_user_document(name, f"{name}@example.com", "hash", "employee",
+                            department="Engineering" if i % 2 == 0 else "Sales", photo="x" * 1000)
+        for i, name in enumerate(["erin", "carol", "alice", "dave", "bob"])
+    ]
+    asyncio.run(db.users.insert_many(users))
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test/api")
+    headers = {"Authorization": f"Bearer {create_jwt_token(admin['_id'], 'admin', 'admin')}"}
+    return client, headers
+
+
+def test_filtered_pages_follow_username_order(monkeypatch):
+    client, headers = _client(monkeypatch)
+
+    async def run():
+        pages, params = [], {"role": "employee", "limit": 2}
+        async with client:
+            while True:
+                response = await client.get("/users", params=params, headers=headers)
+                assert response.status_code == 200
+                pages.append([u["username"] for u in response.json()])
+                if "X-Next-Cursor" not in response.headers:
+                    return pages
+                params["cursor"] = response.headers["X-Next-Cursor"]
+
+    assert asyncio.run(run()) == [["alice", "bob"], ["carol", "dave"], ["erin"]]
+
+
+def test_ndjson_streams_every_match_without_private_fields(monkeypatch):
+    client, headers = _client(monkeypatch)
+
+    async def run():
+        async with client:
+            return await client.get("/users", params={"format": "ndjson", "department": "Engineering", "limit": 1},
+                                    headers=headers)
+
+    response = asyncio.run(run())
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    # The page limit does not apply to the stream
+    assert [row["username"] for row in rows] == ["alice", "bob", "erin"]
+    assert not {"password_hash", "photo"} & set().union(*rows)
+
+
+def test_listing_is_admin_only_and_validates_arguments(monkeypatch):
+    client, headers = _client(monkeypatch)
+    employee_token = create_jwt_token(
+        asyncio.run(server.app.state.db.users.find_one({"username": "alice"}))["_id"], "alice", "employee"
+    )
+
+    async def run():
+        async with client:
+            return [
+                (await client.get("/users", params=params, headers=request_headers)).status_code
+                for params, request_headers in [
+                    ({}, {"Authorization": f"Bearer {employee_token}"}),
+                    ({"format": "csv"}, headers),
+                    ({"limit": server.USER_PAGE_MAX_LIMIT + 1}, headers),
+                ]
+            ]
+
+    assert asyncio.run(run()) == [403, 400, 400]
@@ -6,6 +6,7 @@ import { API } from "../App";
 const AdminDashboard = () => {
   const { user, logout, token } = useAuth();
   const [users, setUsers] = useState([]);
+  const [usersCursor, setUsersCursor] = useState(null);
   const [report, setReport] = useState([]);
   const [calendar, setCalendar] = useState([]);
   const [activeTab, setActiveTab] = useState("users");
@@ -23,10 +24,12 @@ const AdminDashboard = () => {
     fetchCalendar();
   }, []);
 
-  const fetchUsers = async () => {
+  const fetchUsers = async (cursor = null) => {
     try {
-      const res = await axios.get(`${API}/users`, { headers });
-      setUsers(res.data);
+      const params = cursor ? { cursor } : {};
+      const res = await axios.get(`${API}/users`, { headers, params });
+      setUsers((current) => (cursor ? [...current, ...res.data] : res.data));
+      setUsersCursor(res.headers["x-next-cursor"] || null);
     } catch (err) {
       console.error("Error fetching users:", err);
     }
@@ -234,6 +237,16 @@ const AdminDashboard = () => {
                 </tbody>
               </table>
             </div>
+            {usersCursor && (
+              <div className="mt-4 text-center">
+                <button
+                  onClick={() => fetchUsers(usersCursor)}
+                  className="text-sm px-4 py-2 border border-slate-300 hover:bg-slate-50 text-slate-700 font-semibold rounded transition-colors"
+                >
+                  Load more users
+                </button>
+              </div>
+            )}
           </div>
         )}
 
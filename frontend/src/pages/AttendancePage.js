@@ -12,6 +12,8 @@ const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:8001';
 function AttendancePage() {
   const [todayAttendance, setTodayAttendance] = useState(null);
   const [attendanceRecords, setAttendanceRecords] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const navigate = useNavigate();
 
@@ -29,6 +31,7 @@ function AttendancePage() {
 
       const recordsResponse = await axios.get(`${API_BASE}/api/attendance/my-records?limit=30`, { headers });
       setAttendanceRecords(recordsResponse.data);
+      setNextCursor(recordsResponse.headers['x-next-cursor'] || null);
     } catch (error) {
       console.error('Error fetching attendance:', error);
       if (error.response?.status === 401) {
@@ -39,6 +42,24 @@ function AttendancePage() {
     }
   };
 
+  const loadMoreRecords = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const token = localStorage.getItem('token');
+      const response = await axios.get(
+        `${API_BASE}/api/attendance/my-records?limit=30&cursor=${nextCursor}`,
+        { headers: { Authorization: `Bearer ${token}` } }
+      );
+      setAttendanceRecords((records) => [...records, ...response.data]);
+      setNextCursor(response.headers['x-next-cursor'] || null);
+    } catch (error) {
+      console.error('Error loading more attendance:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleCheckIn = async () => {
     try {
       const token = localStorage.getItem('token');
@@ -259,6 +280,13 @@ function AttendancePage() {
                 </Table>
               </div>
             )}
+            {nextCursor && (
+              <div className="text-center mt-6">
+                <Button variant="outline" onClick={loadMoreRecords} disabled={loadingMore}>
+                  {loadingMore ? 'Loading...' : 'Load older records'}
+                </Button>
+              </div>
+            )}
           </CardContent>
         </Card>
       </div>